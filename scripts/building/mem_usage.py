@@ -16,24 +16,34 @@
 # memory banks from the MCU package.
 # Then it extracts the memory regions defined in the linker script, i.e.
 # where code and data can be stored for the selected linker mode.
-# Later it parses the allocated ELF sections, classifies them by section
-# type, and maps them onto the linker memory regions to estimate the
-# amount of code and data stored in each area.
+# Later it reads the allocated ELF sections and the LOAD program headers
+# directly from the ELF32 file (memory-mapped, without calling readelf),
+# classifies the sections by section type, and maps them onto the linker
+# memory regions to estimate the amount of code and data stored in each area.
 # The script also handles interleaved (IL) memory banks. For regions
-# mapped onto IL groups, the bank-by-bank visualization projects the
-# shared address space onto each physical bank assuming a homogeneous
-# distribution across the interleaved banks, although the real placement
-# may differ. Multiple IL groups are handled independently.
+# mapped onto IL groups, the bank-by-bank visualization decodes each address
+# as the memory subsystem does (the il_level address bits above the word
+# offset select the bank of the group), so the bytes shown in each physical
+# bank are the ones actually stored there. Multiple IL groups are handled
+# independently.
+# With --symbols N, the function and object symbols of the ELF symbol table
+# are attributed to the linker memory regions and to the banks, and the N
+# largest ones of each are listed, e.g. to find what to move to another bank.
 # When code is linked in FLASH, the script reports RAM data usage,
 # emits a warning instead of trying to represent FLASH-resident code in
 # the RAM bank visualization, and summarizes the amount of FLASH image
 # space occupied by the application.
+# Several ELF files can be given with --elf: the MCU package and the linker
+# script are then parsed only once and one report is printed per ELF file.
+# With --json, the reports are printed as JSON for further processing.
 
 
 import argparse
+import json
+import mmap
 from pathlib import Path
 import re
-import subprocess
+import struct
 import sys
 
 
@@ -42,18 +52,62 @@ DEFAULT_ELF_PATH = X_HEEP_ROOT / "sw" / "build" / "main.elf"
 DEFAULT_LD_PATH = X_HEEP_ROOT / "sw" / "build" / "main.ld"
 DEFAULT_MCU_PKG_PATH = X_HEEP_ROOT / "hw" / "core-v-mini-mcu" / "include" / "core_v_mini_mcu_pkg.sv"
 
-
-def is_readelf_available():
-    try:
-        subprocess.run(["readelf", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except FileNotFoundError:
-        return False
+ELF_MAGIC = b"\x7fELF"
+EI_NIDENT = 16
+EI_CLASS = 4
+EI_DATA = 5
+ELFCLASS32 = 1
+ELF_BYTE_ORDER = {1: "<", 2: ">"}
+SHN_XINDEX = 0xFFFF
+ELF_SECTION_TYPES = {
+    0: "NULL",
+    1: "PROGBITS",
+    2: "SYMTAB",
+    3: "STRTAB",
+    4: "RELA",
+    5: "HASH",
+    6: "DYNAMIC",
+    7: "NOTE",
+    8: "NOBITS",
+    9: "REL",
+    11: "DYNSYM",
+    14: "INIT_ARRAY",
+    15: "FINI_ARRAY",
+    16: "PREINIT_ARRAY",
+    17: "GROUP",
+    18: "SYMTAB_SHNDX",
+    0x70000003: "RISCV_ATTRIBUTES",
+}
+# Section flag letters, in the order printed by readelf
+ELF_SECTION_FLAGS = (
+    (0x1, "W"),
+    (0x2, "A"),
+    (0x4, "X"),
+    (0x10, "M"),
+    (0x20, "S"),
+    (0x40, "I"),
+    (0x80, "L"),
+    (0x100, "O"),
+    (0x200, "G"),
+    (0x400, "T"),
+    (0x800, "C"),
+    (0x80000000, "E"),
+)
+ELF_SEGMENT_TYPES = {0: "NULL", 1: "LOAD", 2: "DYNAMIC", 3: "INTERP", 4: "NOTE", 6: "PHDR", 7: "TLS"}
+ELF_SEGMENT_FLAGS = ((0x4, "R"), (0x2, "W"), (0x1, "E"))
+ELF_SYMBOL_TYPES = {0: "NOTYPE", 1: "OBJECT", 2: "FUNC", 3: "SECTION", 4: "FILE", 5: "COMMON", 6: "TLS"}
+ELF_SYMBOL_BINDS = {0: "LOCAL", 1: "GLOBAL", 2: "WEAK"}
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Display the memory utilization of an X-HEEP application build.")
-    parser.add_argument("--elf", type=Path, default=DEFAULT_ELF_PATH, help="Path to the ELF file to analyze.")
+    parser.add_argument(
+        "--elf",
+        type=Path,
+        nargs="+",
+        default=[DEFAULT_ELF_PATH],
+        help="Path to the ELF file to analyze. Several ELF files can be given to analyze them against the same linker script and MCU package.",
+    )
     parser.add_argument("--ld", type=Path, default=DEFAULT_LD_PATH, help="Path to the linker script copy used for the build.")
     parser.add_argument(
         "--mcu-pkg",
@@ -62,8 +116,22 @@ def parse_args():
         default=DEFAULT_MCU_PKG_PATH,
         help="Path to core_v_mini_mcu_pkg.sv.",
     )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the memory utilization as JSON instead of the text report (a list with one entry per ELF file when several are given).",
+    )
+    parser.add_argument(
+        "--symbols",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Also report the N largest functions and objects of each linker memory region and of each memory bank.",
+    )
     args = parser.parse_args()
-    args.elf = args.elf.expanduser().resolve(strict=False)
+    if args.symbols < 0:
+        parser.error("--symbols must be a positive integer")
+    args.elf = [elf.expanduser().resolve(strict=False) for elf in args.elf]
     args.ld = args.ld.expanduser().resolve(strict=False)
     args.mcu_pkg = args.mcu_pkg.expanduser().resolve(strict=False)
     return args
@@ -222,116 +290,249 @@ def get_memory_sections(ld_path):
     return sections
 
 
-def get_readelf_output(elf_file):
+class ElfFile:
     """
-    Executes readelf -W -S on the provided ELF file.
+    In-process reader of the headers of an ELF32 file.
+
+    The file is memory-mapped and the section and program headers are decoded
+    with struct.unpack_from, so no readelf process is needed and only the
+    headers and the section name string table are actually read from disk.
     """
-    if not elf_file.is_file():
-        raise FileNotFoundError(f"ELF file not found: {elf_file}")
 
-    try:
-        result = subprocess.run(["readelf", "-W", "-S", str(elf_file)], check=True, capture_output=True, text=True)
-    except subprocess.CalledProcessError as error:
-        stderr = error.stderr.strip()
-        raise RuntimeError(f"readelf failed for {elf_file}: {stderr or error}") from error
+    def __init__(self, elf_file):
+        if not elf_file.is_file():
+            raise FileNotFoundError(f"ELF file not found: {elf_file}")
+
+        self.path = elf_file
+        self._section_headers = None
+        with elf_file.open("rb") as file:
+            try:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as error:
+                raise ValueError(f"Not an ELF file: {elf_file} ({error})") from error
+
+        try:
+            self._parse_header()
+        except (ValueError, struct.error) as error:
+            self.close()
+            if isinstance(error, struct.error):
+                raise ValueError(f"Truncated ELF file: {elf_file}") from error
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def _parse_header(self):
+        ident = self.data[:EI_NIDENT]
+        if len(ident) < EI_NIDENT or ident[:4] != ELF_MAGIC:
+            raise ValueError(f"Not an ELF file: {self.path}")
+        if ident[EI_CLASS] != ELFCLASS32:
+            raise ValueError(f"Only ELF32 files are supported: {self.path}")
+        if ident[EI_DATA] not in ELF_BYTE_ORDER:
+            raise ValueError(f"Unknown ELF byte order {ident[EI_DATA]} in {self.path}")
+
+        self.byte_order = ELF_BYTE_ORDER[ident[EI_DATA]]
+        (
+            _,  # e_type
+            _,  # e_machine
+            _,  # e_version
+            _,  # e_entry
+            self.phoff,
+            self.shoff,
+            _,  # e_flags
+            _,  # e_ehsize
+            self.phentsize,
+            self.phnum,
+            self.shentsize,
+            self.shnum,
+            self.shstrndx,
+        ) = struct.unpack_from(self.byte_order + "HHIIIIIHHHHHH", self.data, EI_NIDENT)
+
+        # Extended numbering: the real counts are stored in the first section header
+        if self.shoff and (self.shnum == 0 or self.shstrndx == SHN_XINDEX):
+            _, _, _, _, _, size, link, _, _, _ = self._unpack_section(0)
+            if self.shnum == 0:
+                self.shnum = size
+            if self.shstrndx == SHN_XINDEX:
+                self.shstrndx = link
+
+    def _unpack_section(self, index):
+        return struct.unpack_from(self.byte_order + "10I", self.data, self.shoff + index * self.shentsize)
+
+    def string(self, offset):
+        """
+        Reads a null-terminated string starting at the given file offset.
+        """
+        end = self.data.find(b"\0", offset)
+        if end < 0:
+            end = len(self.data)
+        return self.data[offset:end].decode("utf-8", errors="replace")
+
+    def section_headers(self):
+        """
+        Returns all the section headers, with the same fields as readelf -S.
+        """
+        if self._section_headers is None:
+            self._section_headers = self._read_section_headers()
+        return self._section_headers
+
+    def _read_section_headers(self):
+        if not self.shoff:
+            return []
+
+        raw_sections = [self._unpack_section(index) for index in range(self.shnum)]
+        names_offset = raw_sections[self.shstrndx][4] if self.shstrndx < self.shnum else None
+
+        sections = []
+        for index, (name, section_type, flags, address, offset, size, link, info, align, entsize) in enumerate(raw_sections):
+            sections.append(
+                {
+                    "index": index,
+                    "name": "" if names_offset is None else self.string(names_offset + name),
+                    "type": ELF_SECTION_TYPES.get(section_type, f"0x{section_type:x}"),
+                    "flags": "".join(letter for mask, letter in ELF_SECTION_FLAGS if flags & mask),
+                    "addr": address,
+                    "offset": offset,
+                    "size": size,
+                    "link": link,
+                    "info": info,
+                    "align": align,
+                    "entsize": entsize,
+                }
+            )
 
-    return result.stdout
+        return sections
 
+    def program_headers(self):
+        """
+        Returns all the program headers, with the same fields as readelf -l.
+        """
+        program_headers = []
+        for index in range(self.phnum):
+            segment_type, offset, virt_addr, phys_addr, file_size, mem_size, flags, align = struct.unpack_from(
+                self.byte_order + "8I", self.data, self.phoff + index * self.phentsize
+            )
+            program_headers.append(
+                {
+                    "Type": ELF_SEGMENT_TYPES.get(segment_type, f"0x{segment_type:x}"),
+                    "Offset": offset,
+                    "VirtAddr": virt_addr,
+                    "PhysAddr": phys_addr,
+                    "FileSiz": file_size,
+                    "MemSiz": mem_size,
+                    "Flg": "".join(letter for mask, letter in ELF_SEGMENT_FLAGS if flags & mask),
+                    "Align": align,
+                }
+            )
 
-def get_readelf_program_headers_output(elf_file):
-    """
-    Executes readelf -l on the provided ELF file.
-    """
-    if not elf_file.is_file():
-        raise FileNotFoundError(f"ELF file not found: {elf_file}")
+        return program_headers
 
-    try:
-        result = subprocess.run(["readelf", "-l", str(elf_file)], check=True, capture_output=True, text=True)
-    except subprocess.CalledProcessError as error:
-        stderr = error.stderr.strip()
-        raise RuntimeError(f"readelf failed for {elf_file}: {stderr or error}") from error
+    def symbols(self):
+        """
+        Returns the entries of the symbol tables, with the same fields as
+        readelf -s and the name of the section of each symbol.
+        """
+        sections = self.section_headers()
 
-    return result.stdout
+        symbols = []
+        for symtab in sections:
+            if symtab["type"] != "SYMTAB" or symtab["entsize"] == 0 or symtab["link"] >= len(sections):
+                continue
 
+            names_offset = sections[symtab["link"]]["offset"]
+            for offset in range(symtab["offset"], symtab["offset"] + symtab["size"], symtab["entsize"]):
+                name, value, size, info, _, section_index = struct.unpack_from(
+                    self.byte_order + "IIIBBH", self.data, offset
+                )
+                symbols.append(
+                    {
+                        "name": self.string(names_offset + name),
+                        "value": value,
+                        "size": size,
+                        "type": ELF_SYMBOL_TYPES.get(info & 0xF, str(info & 0xF)),
+                        "bind": ELF_SYMBOL_BINDS.get(info >> 4, str(info >> 4)),
+                        "section": sections[section_index]["name"] if 0 < section_index < len(sections) else None,
+                    }
+                )
+
+        return symbols
 
-def parse_section_headers(readelf_output):
+
+def parse_section_headers(elf):
     """
-    Parses the readelf output to extract allocated ELF section headers.
+    Extracts the allocated ELF section headers.
     """
     sections = []
 
-    for line in readelf_output.splitlines():
-        match = re.match(r"^\s*\[\s*(\d+)\]\s+(.*)$", line)
-        if not match:
+    for section in elf.section_headers():
+        if not section["name"] or section["size"] == 0 or "A" not in section["flags"]:
             continue
 
-        parts = match.group(2).split()
-        if len(parts) < 10:
-            continue
-
-        name, section_type, address, _, size, _, flags = parts[:7]
-        size_B = int(size, 16)
-        if not name or size_B == 0 or "A" not in flags:
-            continue
-
-        start_address = int(address, 16)
         sections.append(
             {
-                "name": name,
-                "type": section_type,
-                "flags": flags,
-                "start_add": start_address,
-                "size_B": size_B,
-                "end_add": start_address + size_B,
+                "name": section["name"],
+                "type": section["type"],
+                "flags": section["flags"],
+                "start_add": section["addr"],
+                "size_B": section["size"],
+                "end_add": section["addr"] + section["size"],
             }
         )
 
     if not sections:
-        raise ValueError("No allocated ELF sections found in readelf output")
+        raise ValueError(f"No allocated ELF sections found in {elf.path}")
 
     return sorted(sections, key=lambda section: section["start_add"])
 
 
-def parse_program_headers(readelf_output):
+def parse_program_headers(elf):
     """
-    Parses the readelf -l output to extract LOAD program headers.
+    Extracts the LOAD program headers.
     """
-    program_headers = []
-    headers_started = False
+    program_headers = [ph for ph in elf.program_headers() if ph["Type"] == "LOAD"]
 
-    for line in readelf_output.splitlines():
-        stripped = line.strip()
-        if stripped == "Program Headers:":
-            headers_started = True
-            continue
-        if not headers_started:
-            continue
-        if stripped.startswith("Section to Segment mapping:"):
-            break
-        if not stripped or stripped.startswith("Type"):
-            continue
+    if not program_headers:
+        raise ValueError(f"No LOAD program headers found in {elf.path}")
 
-        parts = re.split(r"\s+", stripped)
-        if len(parts) < 8 or parts[0] != "LOAD":
-            continue
+    return program_headers
 
-        program_headers.append(
-            {
-                "Type": parts[0],
-                "Offset": int(parts[1], 16),
-                "VirtAddr": int(parts[2], 16),
-                "PhysAddr": int(parts[3], 16),
-                "FileSiz": int(parts[4], 16),
-                "MemSiz": int(parts[5], 16),
-                "Flg": "".join(parts[6:-1]),
-                "Align": int(parts[-1], 16),
-            }
-        )
 
-    if not program_headers:
-        raise ValueError("No LOAD program headers found in readelf output")
+def parse_symbols(elf):
+    """
+    Extracts the functions and objects allocated in memory, without the
+    aliases sharing the same address, size and type.
+    """
+    allocated_sections = {section["name"] for section in elf.section_headers() if "A" in section["flags"]}
 
-    return program_headers
+    symbols = {}
+    for symbol in elf.symbols():
+        if symbol["type"] not in ("FUNC", "OBJECT") or symbol["size"] == 0:
+            continue
+        if symbol["section"] not in allocated_sections:
+            continue
+
+        key = (symbol["value"], symbol["size"], symbol["type"])
+        # Prefer the global name of an aliased symbol
+        if key not in symbols or (symbol["bind"] == "GLOBAL" and symbols[key]["bind"] != "GLOBAL"):
+            symbols[key] = symbol
+
+    return [
+        {
+            "name": symbol["name"],
+            "type": symbol["type"],
+            "section_name": symbol["section"],
+            "start_add": symbol["value"],
+            "size_B": symbol["size"],
+            "end_add": symbol["value"] + symbol["size"],
+        }
+        for symbol in symbols.values()
+    ]
 
 
 def get_regions(section_headers):
@@ -500,6 +701,8 @@ def create_banks(num_banks, bank_sizes_B, bank_origins, il_groups, ram_base_addr
     il_group_by_bank = {}
 
     for group in il_groups:
+        if group["num_banks"] & (group["num_banks"] - 1):
+            raise ValueError(f"RAM_IL{group['index']} has {group['num_banks']} banks, expected a power of two")
         for bank_idx in group["bank_indices"]:
             il_group_by_bank[bank_idx] = group
 
@@ -507,74 +710,74 @@ def create_banks(num_banks, bank_sizes_B, bank_origins, il_groups, ram_base_addr
         size_B = bank_sizes_B[index]
         origin = bank_origins[index] if bank_origins else ram_base_address + sum(bank_sizes_B[:index])
         il_group = il_group_by_bank.get(index)
+        # Same interleaving parameters as memory_ss.ram_bank.Bank: il_level address
+        # bits above the word offset select the bank il_offset of the group
         bank = {
             "type": "IntL" if il_group is not None else "Cont",
             "size": size_B,
             "origin": origin,
             "il_group": il_group,
+            "il_level": il_group["num_banks"].bit_length() - 1 if il_group is not None else 0,
+            "il_offset": index - il_group["first_bank_idx"] if il_group is not None else 0,
         }
         banks.append(bank)
 
     return banks
 
 
-def project_region_onto_bank(bank, region):
+def bank_address_window(bank, local_start=0, local_end=None):
     """
-    Project a memory region onto the visualization space of a single bank.
-
-    For interleaved groups, the visualization compresses the shared address
-    space into the per-bank physical capacity by dividing both offset and size
-    by the number of banks in the group.
+    Returns the address range covering the bytes [local_start, local_end) of a
+    bank. For an interleaved bank, the range also contains the words of the
+    other banks of its group.
     """
+    if local_end is None:
+        local_end = bank["size"]
     if bank["type"] == "Cont":
-        bank_start = bank["origin"]
-        bank_end = bank_start + bank["size"]
-        if not regions_overlap(region["start_add"], region["end_add"], bank_start, bank_end):
-            return None
-        return max(region["start_add"], bank_start), min(region["end_add"], bank_end)
-
-    il_group = bank["il_group"]
-    if il_group is None:
-        return None
+        return bank["origin"] + local_start, bank["origin"] + local_end
 
-    overlap_start = max(region["start_add"], il_group["origin"])
-    overlap_end = min(region["end_add"], il_group["end"])
-    if overlap_start >= overlap_end:
-        return None
+    group_origin = bank["il_group"]["origin"]
+    return group_origin + (local_start << bank["il_level"]), group_origin + (local_end << bank["il_level"])
 
-    group_origin = il_group["origin"]
-    group_bank_count = il_group["num_banks"]
-    bank_view_start = group_origin + (overlap_start - group_origin) // group_bank_count
-    bank_view_end = group_origin + (overlap_end - group_origin + group_bank_count - 1) // group_bank_count
-    bank_view_limit = group_origin + bank["size"]
-    if bank_view_start >= bank_view_limit:
-        return None
 
-    return bank_view_start, min(bank_view_end, bank_view_limit)
+def bank_bytes(bank, start_add, end_add, local_start=0, local_end=None):
+    """
+    Counts the bytes of the address range [start_add, end_add) stored in the
+    bytes [local_start, local_end) of a bank, given as multiples of 4 bytes.
+
+    Interleaved groups are decoded as by the memory subsystem: the bank of an
+    address is given by the il_level address bits above the 32-bit word offset,
+    so a range is split word by word over the banks of its group.
+    """
+    window_start, window_end = bank_address_window(bank, local_start, local_end)
+    start_add = max(start_add, window_start)
+    end_add = min(end_add, window_end)
+    if start_add >= end_add:
+        return 0
+    if bank["type"] == "Cont":
+        return end_add - start_add
+
+    stride_B = 4 << bank["il_level"]
+    bank_word_start = 4 * bank["il_offset"]
 
+    def bank_bytes_below(address):
+        # Bytes of the bank between address 0 and address
+        return address // stride_B * 4 + min(max(address % stride_B - bank_word_start, 0), 4)
 
-def interval_overlap(start_a, end_a, start_b, end_b):
-    return max(0, min(end_a, end_b) - max(start_a, start_b))
+    return bank_bytes_below(end_add) - bank_bytes_below(start_add)
 
 
-def print_summary_and_bank_usage(memory_sections, regions, program_headers, banks):
+def get_memory_usage(memory_sections, regions, program_headers, banks):
+    """
+    Computes the usage of the linker memory regions, of the FLASH image and of
+    each memory bank. The banks are not modified, so they can be shared by the
+    reports of several ELF files.
+    """
     summaries = {
         "Code": summarize_region(memory_sections, regions, "code", ("ram0", "FLASH0", "FLASH")),
         "Data": summarize_region(memory_sections, regions, "data", ("ram1", "RAM")),
         "ILdata": summarize_region(memory_sections, regions, "IL data", ()),
     }
-    flash_summary = summarize_flash_image(memory_sections, program_headers)
-
-    continuous_sizes_kB = [int(bank["size"] / 1024) for bank in banks if bank["type"] == "Cont"]
-    interleaved_sizes_kB = [int(bank["size"] / 1024) for bank in banks if bank["type"] == "IntL"]
-    total_size_B = sum(bank["size"] for bank in banks)
-    print(
-        f"Total space: {total_size_B/1024:0.1f} kB = Continuous:",
-        continuous_sizes_kB if continuous_sizes_kB else [],
-        "kB + Interleaved:",
-        interleaved_sizes_kB if interleaved_sizes_kB else [0],
-        "kB",
-    )
 
     flash_code = summaries["Code"] is not None and any(is_flash_section(name) for name in summaries["Code"]["host_sections"])
     flash_load_code = (
@@ -583,13 +786,153 @@ def print_summary_and_bank_usage(memory_sections, regions, program_headers, bank
         and any(is_ram_section(name) for name in summaries["Code"]["host_sections"])
         and any(re.fullmatch(r"FLASH\d+", name) for name in memory_sections)
     )
+    code_placement = None
+    if summaries["Code"] is not None:
+        if flash_code:
+            code_placement = "flash_exec"
+        elif flash_load_code:
+            code_placement = "flash_load"
+        else:
+            code_placement = "ram"
+
+    granularity_B = 1024
+    # FLASH data is never placed in the RAM banks
+    bank_regions = [region for region in regions if region["name"] != "FLASH data"]
+
+    bank_usage = []
+    for bank_idx, bank in enumerate(banks):
+        use = ["-"] * int(bank["size"] / granularity_B)
+        utilization = 0
+        window_start, window_end = bank_address_window(bank)
+        bank_regions_in_window = [
+            region for region in bank_regions if regions_overlap(region["start_add"], region["end_add"], window_start, window_end)
+        ]
+
+        for piece in range(len(use)):
+            piece_start = granularity_B * piece
+            piece_end = piece_start + granularity_B
+
+            for region in bank_regions_in_window:
+                overlap = bank_bytes(bank, region["start_add"], region["end_add"], piece_start, piece_end)
+                if overlap > 0:
+                    use[piece] = region["symbol"]
+                    utilization += overlap
+
+        bank_usage.append(
+            {
+                "index": bank_idx,
+                "type": bank["type"],
+                "origin": bank["origin"],
+                "size": bank["size"],
+                "used": utilization,
+                "utilization": 100 * (utilization / bank["size"]),
+                "use": "".join(use),
+            }
+        )
+
+    return {
+        "total_size": sum(bank["size"] for bank in banks),
+        "continuous_sizes_kB": [int(bank["size"] / 1024) for bank in banks if bank["type"] == "Cont"],
+        "interleaved_sizes_kB": [int(bank["size"] / 1024) for bank in banks if bank["type"] == "IntL"],
+        "regions": {label: summary for label, summary in summaries.items() if summary is not None},
+        "code_placement": code_placement,
+        "flash": summarize_flash_image(memory_sections, program_headers),
+        "banks": bank_usage,
+    }
+
+
+def get_largest_symbols(symbols, memory_sections, banks, count):
+    """
+    Attributes the functions and objects to the linker memory regions and to
+    the memory banks, and keeps the count largest ones of each, sorted by the
+    number of bytes they occupy there. For interleaved banks, only the bytes
+    of a symbol actually stored in the bank are counted.
+    """
+
+    def largest(symbols_bytes):
+        entries = [
+            {
+                "name": symbol["name"],
+                "type": symbol["type"],
+                "section_name": symbol["section_name"],
+                "start_add": symbol["start_add"],
+                "size_B": symbol["size_B"],
+                "bytes": placed_B,
+            }
+            for symbol, placed_B in symbols_bytes
+            if placed_B > 0
+        ]
+        entries.sort(key=lambda entry: (-entry["bytes"], entry["start_add"], entry["name"]))
+        return entries[:count]
+
+    memory_section_symbols = {}
+    for name, section in sorted(memory_sections.items(), key=lambda item: item[1]["origin"]):
+        section_start = section["origin"]
+        section_end = section_start + section["length"]
+        memory_section_symbols[name] = largest(
+            (symbol, min(symbol["end_add"], section_end) - max(symbol["start_add"], section_start))
+            for symbol in symbols
+        )
+
+    bank_symbols = []
+    for bank in banks:
+        window_start, window_end = bank_address_window(bank)
+        bank_symbols.append(
+            largest(
+                (symbol, bank_bytes(bank, symbol["start_add"], symbol["end_add"]))
+                for symbol in symbols
+                if regions_overlap(symbol["start_add"], symbol["end_add"], window_start, window_end)
+            )
+        )
+
+    return memory_section_symbols, bank_symbols
+
+
+def print_largest_symbols(usage):
+    header = f"{'Bytes':>8} {'Size':>8} {'Type':<6} {'Address':>10} {'Section':<20} Name"
+
+    print("")
+    print("Largest symbols per memory region:")
+    for name, symbols in usage["memory_sections"].items():
+        if not symbols:
+            continue
+        print(f"{name}:")
+        print(f"  {header}")
+        for symbol in symbols:
+            print(
+                f"  {symbol['bytes']:8d} {symbol['size_B']:8d} {symbol['type']:<6} 0x{symbol['start_add']:08X} "
+                f"{symbol['section_name']:<20} {symbol['name']}"
+            )
+
+    print("")
+    print("Largest symbols per bank:")
+    for bank in usage["banks"]:
+        if not bank["symbols"]:
+            continue
+        print(f"{bank['type']} {bank['index']}:")
+        print(f"  {header}")
+        for symbol in bank["symbols"]:
+            print(
+                f"  {symbol['bytes']:8d} {symbol['size_B']:8d} {symbol['type']:<6} 0x{symbol['start_add']:08X} "
+                f"{symbol['section_name']:<20} {symbol['name']}"
+            )
+
+
+def print_summary_and_bank_usage(usage):
+    print(
+        f"Total space: {usage['total_size']/1024:0.1f} kB = Continuous:",
+        usage["continuous_sizes_kB"],
+        "kB + Interleaved:",
+        usage["interleaved_sizes_kB"] if usage["interleaved_sizes_kB"] else [0],
+        "kB",
+    )
 
     print(f"{'Region':<8} {'Mem':<9} {'Start':>8} {'End':>8} {'Sz(kB)':>8} {'Usd(kB)':>8} {'Req(kB)':>8} {'Utilz(%)':>9}")
     for label in ("Code", "Data", "ILdata"):
-        summary = summaries[label]
+        summary = usage["regions"].get(label)
         if summary is None:
             continue
-        if label == "Code" and flash_code:
+        if label == "Code" and usage["code_placement"] == "flash_exec":
             continue
         utilization = 0.0 if summary["length"] == 0 else 100 * summary["required"] / summary["length"]
         print(
@@ -597,14 +940,14 @@ def print_summary_and_bank_usage(memory_sections, regions, program_headers, bank
             f"{summary['length']/1024:8.1f} {summary['used']/1024:8.1f} {summary['required']/1024:8.1f} {utilization:9.1f}"
         )
 
-    if summaries["Code"] is not None:
-        if flash_code:
-            print("Code placement: execute in FLASH; RAM bank visualization excludes FLASH-resident code.")
-        elif flash_load_code:
-            print("Code placement: load from FLASH, execute from RAM; bank visualization reflects RAM execution addresses.")
-        else:
-            print("Code placement: execute from RAM.")
+    if usage["code_placement"] == "flash_exec":
+        print("Code placement: execute in FLASH; RAM bank visualization excludes FLASH-resident code.")
+    elif usage["code_placement"] == "flash_load":
+        print("Code placement: load from FLASH, execute from RAM; bank visualization reflects RAM execution addresses.")
+    elif usage["code_placement"] == "ram":
+        print("Code placement: execute from RAM.")
 
+    flash_summary = usage["flash"]
     if flash_summary is not None:
         flash_utilization = 0.0 if flash_summary["length"] == 0 else 100 * flash_summary["required"] / flash_summary["length"]
         print(
@@ -613,50 +956,39 @@ def print_summary_and_bank_usage(memory_sections, regions, program_headers, bank
             f"({flash_utilization:0.1f}% of available FLASH image space)."
         )
 
-    granularity_B = 1024
-
     print("")
-    for bank_idx, bank in enumerate(banks):
-        bank["use"] = ["-"] * int(bank["size"] / granularity_B)
-        utilization = 0
+    for bank in usage["banks"]:
+        print(bank["type"], bank["index"], bank["use"], f"\t{bank['utilization']:5.1f}%")
 
-        for piece in range(len(bank["use"])):
-            address_base = bank["origin"] if bank["type"] == "Cont" else bank["il_group"]["origin"]
-            address = address_base + granularity_B * piece
-            address_end = address + granularity_B
 
-            for region in regions:
-                if region["name"] == "FLASH data":
-                    continue
+def get_elf_memory_usage(elf_file, memory_sections, banks, symbol_count=0):
+    """
+    Reads the headers of an ELF file and computes its memory usage. With a
+    positive symbol_count, the largest symbols of each memory region and bank
+    are also reported.
+    """
+    with ElfFile(elf_file) as elf:
+        section_headers = parse_section_headers(elf)
+        program_headers = parse_program_headers(elf)
+        symbols = parse_symbols(elf) if symbol_count > 0 else None
 
-                bank_region = project_region_onto_bank(bank, region)
-                if bank_region is None:
-                    continue
+    regions = get_regions(section_headers)
+    usage = get_memory_usage(memory_sections, regions, program_headers, banks)
 
-                region_start, region_end = bank_region
-                overlap = interval_overlap(address, address_end, region_start, region_end)
-                if overlap > 0:
-                    bank["use"][piece] = region["symbol"]
-                    utilization += overlap
+    if symbols is not None:
+        if not symbols:
+            raise ValueError(f"No function or object symbols found in {elf_file}, is it stripped?")
+        usage["memory_sections"], bank_symbols = get_largest_symbols(symbols, memory_sections, banks, symbol_count)
+        for bank, symbols in zip(usage["banks"], bank_symbols):
+            bank["symbols"] = symbols
 
-        bank["use"] = "".join(bank["use"])
-        print(bank["type"], bank_idx, bank["use"], f"\t{100*(utilization/bank['size']):5.1f}%")
+    return usage
 
 
 def main():
     args = parse_args()
 
-    if not is_readelf_available():
-        print("readelf not available. Will not print the memory utilization report.", file=sys.stderr)
-        return 1
-
     try:
-        readelf_sections_output = get_readelf_output(args.elf)
-        readelf_program_headers_output = get_readelf_program_headers_output(args.elf)
-        section_headers = parse_section_headers(readelf_sections_output)
-        program_headers = parse_program_headers(readelf_program_headers_output)
-        regions = get_regions(section_headers)
-
         num_banks, _, bank_sizes_B, bank_origins, il_groups = get_banks_and_sizes(args.mcu_pkg)
         memory_sections = get_memory_sections(args.ld)
 
@@ -666,12 +998,40 @@ def main():
 
         ram_base_address = min(section["origin"] for section in ram_sections)
         banks = create_banks(num_banks, bank_sizes_B, bank_origins, il_groups, ram_base_address)
-        print_summary_and_bank_usage(memory_sections, regions, program_headers, banks)
     except (FileNotFoundError, RuntimeError, ValueError) as error:
         print(error, file=sys.stderr)
         return 1
 
-    return 0
+    # The MCU package and the linker script are parsed once for all the ELF files
+    status = 0
+    reports = []
+    for index, elf_file in enumerate(args.elf):
+        try:
+            usage = get_elf_memory_usage(elf_file, memory_sections, banks, args.symbols)
+        except (FileNotFoundError, RuntimeError, ValueError) as error:
+            status = 1
+            if args.json:
+                reports.append({"elf": str(elf_file), "error": str(error)})
+            else:
+                print(error, file=sys.stderr)
+            continue
+
+        if args.json:
+            reports.append({"elf": str(elf_file), **usage})
+            continue
+        if len(args.elf) > 1:
+            if index > 0:
+                print("")
+            print(f"{elf_file}:")
+        print_summary_and_bank_usage(usage)
+        if args.symbols > 0:
+            print_largest_symbols(usage)
+
+    if args.json:
+        json.dump(reports if len(args.elf) > 1 else reports[0], sys.stdout, indent=2)
+        print("")
+
+    return status
 
 
 if __name__ == "__main__":
@@ -15,18 +15,22 @@
 
 # Author: Jose Miranda, Juan Sapriza (jose.mirandacalero / juan.sapriza @epfl.ch)
 
-build : build/Makefile
+# Build folder, relative to sw/ or absolute. Several applications can be built at the same time in
+# different build folders.
+SW_BUILD_DIR ?= build
+
+build : ${SW_BUILD_DIR}/Makefile
 	@echo Build 
-	${MAKE} -s -C build
+	${MAKE} -s -C ${SW_BUILD_DIR}
 
-setup : build/Makefile
+setup : ${SW_BUILD_DIR}/Makefile
 
-build/Makefile : CMakeLists.txt ${CMAKE_DIR}/riscv.cmake
-	@if [ ! -d build ] ; then mkdir build ; fi
-	@cd build;  \
+${SW_BUILD_DIR}/Makefile : CMakeLists.txt ${CMAKE_DIR}/riscv.cmake
+	@if [ ! -d ${SW_BUILD_DIR} ] ; then mkdir -p ${SW_BUILD_DIR} ; fi
+	@cd ${SW_BUILD_DIR};  \
 		${CMAKE} \
 		    -G "Unix Makefiles" \
-			-DCMAKE_TOOLCHAIN_FILE=../${CMAKE_DIR}/riscv.cmake \
+			-DCMAKE_TOOLCHAIN_FILE=${mkfile_path}/${CMAKE_DIR}/riscv.cmake \
 			-DROOT_PROJECT=${ROOT_PROJECT} \
 			-DSOURCE_PATH=${SOURCE_PATH} \
 			-DTARGET=${TARGET} \
@@ -39,10 +43,10 @@ build/Makefile : CMakeLists.txt ${CMAKE_DIR}/riscv.cmake
 			-DCOMPILER_FLAGS:STRING="${COMPILER_FLAGS}"\
 			-DCLANG_LINKER_USE_LD:BOOL=${CLANG_LINKER_USE_LD}\
 			-DVERBOSE:STRING=${VERBOSE} \
-		    ../ 
+		    ${mkfile_path}
 
 clean:
-	rm -rf build
+	rm -rf ${SW_BUILD_DIR}
 
 .PHONY: setup build
 .SUFFIXES:
@@ -127,6 +127,15 @@ _init_bss:
     call atexit
     call __libc_init_array
 
+#ifdef PERF_COUNTERS
+/* count the cycles and the retired instructions of the program (dumped by _exit) */
+    csrci  0x320, 0x5 /* mcountinhibit: enable mcycle and minstret */
+    csrw   mcycle, zero
+    csrw   mcycleh, zero
+    csrw   minstret, zero
+    csrw   minstreth, zero
+#endif
+
 /* call main */
     lw a0, 0(sp)                    /* a0 = argc */
     addi a1, sp, __SIZEOF_POINTER__ /* a1 = argv */
@@ -35,6 +35,9 @@ extern "C" {
 #include "core_v_mini_mcu.h"
 #include "error.h"
 #include "x-heep.h"
+#ifdef PERF_COUNTERS
+#include "csr.h"
+#endif
 
 #undef errno
 extern int errno;
@@ -106,8 +109,64 @@ int _execve(const char *name, char *const argv[], char *const env[])
     return -1;
 }
 
+#ifdef PERF_COUNTERS
+/*
+ * Reads a 64-bit counter made of a low and a high CSR, consistently even if the
+ * low half overflows between the reads.
+ */
+#define PERF_READ_COUNTER(csr, csrh, dest)    \
+  do {                                        \
+    uint32_t lo, hi, hi2;                     \
+    do {                                      \
+      CSR_READ(csrh, &hi);                    \
+      CSR_READ(csr, &lo);                     \
+      CSR_READ(csrh, &hi2);                   \
+    } while (hi != hi2);                      \
+    *(dest) = ((uint64_t)hi << 32) | lo;      \
+  } while (false)
+
+static char *perf_append_u64(char *buf, uint64_t value)
+{
+    char digits[20];
+    int n = 0;
+    do {
+        digits[n++] = '0' + value % 10;
+        value /= 10;
+    } while (value);
+    while (n) {
+        *buf++ = digits[--n];
+    }
+    return buf;
+}
+
+/*
+ * Prints the performance counters started by crt0, as "[PERF] <name>=<value>..."
+ * on a single line. stdio is already closed when _exit is called, so the line
+ * is formatted here and written to the UART directly.
+ */
+static void perf_counters_dump(void)
+{
+    uint64_t mcycle, minstret;
+    PERF_READ_COUNTER(CSR_REG_MCYCLE, CSR_REG_MCYCLEH, &mcycle);
+    PERF_READ_COUNTER(CSR_REG_MINSTRET, CSR_REG_MINSTRETH, &minstret);
+
+    char line[64];
+    char *end = line;
+    memcpy(end, "[PERF] mcycle=", 14);
+    end = perf_append_u64(end + 14, mcycle);
+    memcpy(end, " minstret=", 10);
+    end = perf_append_u64(end + 10, minstret);
+    *end++ = '\n';
+    _write(STDOUT_FILENO, line, end - line);
+}
+#endif
+
 void _exit(int exit_status)
 {
+#ifdef PERF_COUNTERS
+    perf_counters_dump();
+#endif
+
     soc_ctrl_t soc_ctrl;
     soc_ctrl.base_addr = mmio_region_from_addr((uintptr_t)SOC_CTRL_START_ADDRESS);
     soc_ctrl_set_exit_value(&soc_ctrl, exit_status);
@@ -1,5 +1,6 @@
 #include "XHEEP_CmdLineOptions.hh"
 #include <iostream>
+#include <stdexcept>
 #include <string>
 
 XHEEP_CmdLineOptions::XHEEP_CmdLineOptions(int argc, char* argv[]) // define default constructor
@@ -109,3 +110,83 @@ unsigned int XHEEP_CmdLineOptions::get_boot_sel()
 
   return boot_sel;
 }
+
+bool XHEEP_CmdLineOptions::get_server()
+{
+  std::string arg_server = this->getCmdOption(this->argc, this->argv, "+server=");
+
+  bool server = false;
+
+  if(!arg_server.empty() && arg_server.compare("0") != 0) {
+    std::cout<<"[TESTBENCH]: Server mode, reading the firmware paths from the standard input"<<std::endl;
+    server = true;
+  }
+
+  return server;
+}
+
+std::string XHEEP_CmdLineOptions::get_checkpoint()
+{
+  std::string checkpoint = this->getCmdOption(this->argc, this->argv, "+checkpoint=");
+
+  if(!checkpoint.empty()) {
+    std::cout<<"[TESTBENCH]: Checkpoint of X-HEEP after the boot: "<<checkpoint<<std::endl;
+  }
+
+  return checkpoint;
+}
+
+// Number of clock cycles of a +trace_start=, +trace_stop= or +trace_cycles= option, 0 if it is not given
+unsigned long long XHEEP_CmdLineOptions::get_trace_cycles(const std::string& option)
+{
+  std::string arg = this->getCmdOption(this->argc, this->argv, option);
+  unsigned long long cycles = 0;
+
+  if(!arg.empty()) {
+    size_t u = 0;
+    try {
+      cycles = stoull(arg, &u, 0);
+    } catch(const std::exception&) {
+    }
+    if(u == 0 || u != arg.length()) {
+      std::cout<<"[TESTBENCH]: ERROR: "<<option<<" must be a number of clock cycles"<<std::endl;
+      exit(EXIT_FAILURE);
+    }
+    std::cout<<"[TESTBENCH]: "<<option<<cycles<<" clock cycles"<<std::endl;
+  }
+
+  return cycles;
+}
+
+bool XHEEP_CmdLineOptions::get_trace_pc(unsigned int& pc)
+{
+  std::string arg = this->getCmdOption(this->argc, this->argv, "+trace_pc=");
+
+  if(arg.empty()) {
+    return false;
+  }
+
+  size_t u = 0;
+  try {
+    pc = stoul(arg, &u, 16);
+  } catch(const std::exception&) {
+  }
+  if(u == 0 || u != arg.length()) {
+    std::cout<<"[TESTBENCH]: ERROR: +trace_pc must be a hexadecimal address"<<std::endl;
+    exit(EXIT_FAILURE);
+  }
+  std::cout<<"[TESTBENCH]: Tracing from PC 0x"<<std::hex<<pc<<std::dec<<std::endl;
+
+  return true;
+}
+
+std::string XHEEP_CmdLineOptions::get_trace_scope()
+{
+  std::string scope = this->getCmdOption(this->argc, this->argv, "+trace_scope=");
+
+  if(!scope.empty()) {
+    std::cout<<"[TESTBENCH]: Tracing the signals of "<<scope<<std::endl;
+  }
+
+  return scope;
+}
@@ -17,6 +17,11 @@ class XHEEP_CmdLineOptions // declare Calculator class
     std::string get_firmware();
     unsigned long long get_max_sim_time(bool& run_all);
     unsigned int get_boot_sel();
+    bool get_server();
+    std::string get_checkpoint();
+    unsigned long long get_trace_cycles(const std::string& option);
+    bool get_trace_pc(unsigned int& pc);
+    std::string get_trace_scope();
     int argc;
     char** argv;
 
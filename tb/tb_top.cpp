@@ -4,88 +4,221 @@
 
 #include "verilated.h"
 #include "verilated_fst_c.h"
+#ifdef TB_SAVABLE
+#include "verilated_save.h"
+#endif
 #include "Vtestharness.h"
+#include "Vtestharness__Dpi.h"
 #include "Vtestharness__Syms.h"
 
+#include <stdio.h>
 #include <stdlib.h>
+#include <unistd.h>
 #include <iostream>
+#include <string>
 
 #include "XHEEP_CmdLineOptions.hh"
 
+// Printed by the server mode when it is ready to receive the path of the next firmware
+#define SERVER_READY_MESSAGE "[TESTBENCH]: Waiting for firmware"
+
+// Written at the start of the checkpoints of this testbench
+#define CHECKPOINT_MAGIC 0x58484545504b5032ULL
+
+// Maximum number of clock cycles simulated after the reset to reach the point of the boot saved
+// in the checkpoints, which is only a few hundred cycles when booting from the flash
+#define CHECKPOINT_MAX_BOOT_CYCLES 10000
+
 vluint64_t sim_time = 0;
 
+// Window of each run traced in the waveform (see the +trace_* simulation parameters), in clock
+// cycles since the start of the run. By default, the whole run is traced.
+struct TraceWindow {
+  vluint64_t start = 0;        // cycle from which the tracing can start
+  vluint64_t stop = 0;         // cycle at which the tracing stops, 0 for the end of the run
+  vluint64_t cycles = 0;       // number of traced cycles once the tracing started, 0 for no limit
+  bool pc_trigger = false;     // if true, the tracing starts when the CPU decodes pc
+  unsigned int pc = 0;
+  bool enabled = false;        // false if the whole run is traced
+  // State of the current run
+  vluint64_t run_start = 0;    // simulation time of the start of the run
+  vluint64_t trace_start = 0;  // cycle at which the tracing started
+  bool tracing = true;
+  bool done = false;
+};
+
+TraceWindow trace_window;
+
+// Starts or stops the tracing at the current cycle of the run
+void updateTraceWindow(VerilatedFstC *m_trace){
+  vluint64_t cycle = (sim_time - trace_window.run_start) / CLK_PERIOD_ps;
+
+  if(!trace_window.tracing) {
+    if(trace_window.done || cycle < trace_window.start) {
+      return;
+    }
+    if(trace_window.pc_trigger) {
+      unsigned int pc;
+      svBit valid;
+      tb_get_decode_pc(&pc, &valid);
+      if(!valid || pc != trace_window.pc) {
+        return;
+      }
+    }
+    trace_window.tracing = true;
+    trace_window.trace_start = cycle;
+    std::cout<<"[TESTBENCH]: Tracing started at cycle "<<cycle<<std::endl;
+  } else if((trace_window.stop && cycle >= trace_window.stop) ||
+            (trace_window.cycles && cycle >= trace_window.trace_start + trace_window.cycles)) {
+    trace_window.tracing = false;
+    trace_window.done = true;
+    m_trace->flush();
+    std::cout<<"[TESTBENCH]: Tracing stopped at cycle "<<cycle<<std::endl;
+  }
+}
+
 void runCycles(unsigned int ncycles, Vtestharness *dut, VerilatedFstC *m_trace){
   for(unsigned int i = 0; i < 2*ncycles; i++) {
     sim_time += CLK_PERIOD_ps/2;
     dut->clk_i ^= 1;
     dut->eval();
-    m_trace->dump(sim_time);
+    if(trace_window.enabled && dut->clk_i) {
+      updateTraceWindow(m_trace);
+    }
+    if(trace_window.tracing) {
+      m_trace->dump(sim_time);
+    }
   }
 }
 
-int main (int argc, char * argv[])
-{
+// Runs the boot of X-HEEP after the reset up to its last point which does not depend on the
+// firmware, where the checkpoints are saved. When loading the memory from the testbench, the
+// bootrom is already waiting for the exit loop flag. When booting from the flash, it is when the
+// flash received the read command of the firmware. Returns false if this point is not reached.
+bool runBoot(unsigned int boot_sel, Vtestharness *dut, VerilatedFstC *m_trace){
+  svBit pending = 0;
 
-  std::string firmware;
-  vluint64_t max_sim_time;
-  unsigned int boot_sel, exit_val;
-  bool use_openocd;
-  bool run_all = false;
+  if(boot_sel != 1) {
+    return true;
+  }
 
-  Verilated::commandArgs(argc, argv);
+  for(unsigned int i = 0; i < CHECKPOINT_MAX_BOOT_CYCLES && !pending; i++) {
+    runCycles(1, dut, m_trace);
+    tb_flash_read_pending(&pending);
+  }
+  return pending;
+}
 
-  // Instantiate the model
-  Vtestharness *dut = new Vtestharness;
+#ifdef TB_SAVABLE
+// Saves the state of X-HEEP after the boot, with the simulation time taken by the reset and the
+// boot, in a checkpoint. The checkpoint is written to a temporary file which is then renamed, so
+// that the simulations running in parallel never restore a partial checkpoint.
+void saveCheckpoint(const std::string &checkpoint, unsigned int boot_sel, vluint64_t boot_time,
+                    Vtestharness *dut){
+  std::string tmp_checkpoint = checkpoint + ".tmp" + std::to_string(getpid());
+  vluint64_t magic = CHECKPOINT_MAGIC;
+  vluint64_t checkpoint_boot_sel = boot_sel;
 
-  // Open VCD
-  Verilated::traceEverOn (true);
-  VerilatedFstC *m_trace = new VerilatedFstC;
-  dut->trace (m_trace, 99);
-  m_trace->open ("waveform.fst");
+  VerilatedSave os;
+  os.open(tmp_checkpoint.c_str());
+  if(!os.isOpen()) {
+    std::cout<<"[TESTBENCH]: Warning: cannot write the checkpoint "<<checkpoint<<std::endl;
+    return;
+  }
+  os << magic << checkpoint_boot_sel << boot_time << *dut;
+  os.close();
 
-  XHEEP_CmdLineOptions* cmd_lines_options = new XHEEP_CmdLineOptions(argc,argv);
+  if(rename(tmp_checkpoint.c_str(), checkpoint.c_str()) != 0) {
+    std::cout<<"[TESTBENCH]: Warning: cannot write the checkpoint "<<checkpoint<<std::endl;
+    remove(tmp_checkpoint.c_str());
+  } else {
+    std::cout<<"[TESTBENCH]: Checkpoint saved after "<<(boot_time/CLK_PERIOD_ps)<<" clock cycles of boot"<<std::endl;
+  }
+}
 
-  use_openocd = cmd_lines_options->get_use_openocd();
-  firmware = cmd_lines_options->get_firmware();
+// Restores the state of X-HEEP after the boot from a checkpoint saved by saveCheckpoint with the
+// same model and boot_sel. The UART DPI context belongs to this process, so it is kept. Returns
+// false if there is no such checkpoint, in which case the boot must be simulated.
+bool restoreCheckpoint(const std::string &checkpoint, unsigned int boot_sel,
+                       vluint64_t &boot_time, Vtestharness *dut){
+  vluint64_t magic, checkpoint_boot_sel;
+  void *uart_ctx;
 
-  if(firmware.empty() && use_openocd==false){
-      std::cout<<"You must specify the firmware if you are not using OpenOCD"<<std::endl;
-      exit(EXIT_FAILURE);
+  if(access(checkpoint.c_str(), R_OK) != 0) {
+    return false;
   }
 
-  max_sim_time = cmd_lines_options->get_max_sim_time(run_all);
+  VerilatedRestore os;
+  os.open(checkpoint.c_str());
+  if(!os.isOpen()) {
+    return false;
+  }
+  os >> magic >> checkpoint_boot_sel;
+  if(magic != CHECKPOINT_MAGIC || checkpoint_boot_sel != boot_sel) {
+    std::cout<<"[TESTBENCH]: Warning: "<<checkpoint<<" is not a checkpoint for +boot_sel="<<boot_sel<<std::endl;
+    os.close();
+    return false;
+  }
 
-  boot_sel     = cmd_lines_options->get_boot_sel();
+  tb_get_uartdpi_ctx(&uart_ctx);
+  os >> boot_time >> *dut;
+  os.close();
+  tb_set_uartdpi_ctx(uart_ctx);
+  return true;
+}
+#endif
 
-  svSetScope(svGetScopeFromName("TOP.testharness"));
-  svScope scope = svGetScope();
-  if (!scope) {
-    std::cout<<"Warning: svGetScope failed"<< std::endl;
-    exit(EXIT_FAILURE);
-  }
+// Resets X-HEEP, loads the firmware and runs it until the program finishes or the maximum
+// simulation time (counted from the reset) is reached. Returns true if the program finished.
+// With a checkpoint, the state after the reset and the boot is restored from it instead of being
+// simulated, and it is saved there first if the checkpoint does not exist and save_checkpoint is
+// true. The firmware is then loaded as usual.
+bool runFirmware(const std::string &firmware, unsigned int boot_sel, bool use_openocd,
+                 vluint64_t max_sim_time, bool run_all, const std::string &checkpoint,
+                 bool save_checkpoint, Vtestharness *dut, VerilatedFstC *m_trace){
 
-  dut->clk_i                = 0;
-  dut->rst_ni               = 1;
-  dut->jtag_tck_i           = 0;
-  dut->jtag_tms_i           = 0;
-  dut->jtag_trst_ni         = 0;
-  dut->jtag_tdi_i           = 0;
-  dut->execute_from_flash_i = 0;
+  vluint64_t start_time = sim_time;
+  vluint64_t boot_time = 0;
+  bool restored = false;
 
-  dut->eval();
-  m_trace->dump(sim_time);
+  trace_window.run_start = start_time;
+  trace_window.tracing = !trace_window.enabled;
+  trace_window.done = false;
 
-  dut->rst_ni               = 1;
-  dut->boot_select_i        = boot_sel;
+#ifdef TB_SAVABLE
+  if(!checkpoint.empty()) {
+    restored = restoreCheckpoint(checkpoint, boot_sel, boot_time, dut);
+  }
+#endif
 
-  //this creates the negedge
-  runCycles(20, dut, m_trace);
-  dut->rst_ni               = 0;
-  runCycles(40, dut, m_trace);
+  if(restored) {
+    // The reset and the boot are accounted as if they were simulated, in the cycles and in the
+    // waveform time
+    sim_time += boot_time;
+    std::cout<<"[TESTBENCH]: Restored "<<(boot_time/CLK_PERIOD_ps)<<" clock cycles of boot from the checkpoint"<<std::endl;
+  } else {
+    dut->rst_ni               = 1;
+    dut->boot_select_i        = boot_sel;
+
+    //this creates the negedge
+    runCycles(20, dut, m_trace);
+    dut->rst_ni               = 0;
+    runCycles(40, dut, m_trace);
 
-  dut->rst_ni = 1;
-  runCycles(40, dut, m_trace);
-  std::cout<<"Reset Released"<< std::endl;
+    dut->rst_ni = 1;
+    runCycles(40, dut, m_trace);
+    std::cout<<"Reset Released"<< std::endl;
+
+#ifdef TB_SAVABLE
+    if(!checkpoint.empty() && save_checkpoint) {
+      if(runBoot(boot_sel, dut, m_trace)) {
+        saveCheckpoint(checkpoint, boot_sel, sim_time - start_time, dut);
+      } else {
+        std::cout<<"[TESTBENCH]: Warning: the boot did not reach the point of the checkpoint"<<std::endl;
+      }
+    }
+#endif
+  }
 
   dut->load_flash_hex(firmware.c_str());
 
@@ -108,7 +241,7 @@ int main (int argc, char * argv[])
 
 
   if(run_all==false) {
-    while(dut->exit_valid_o!=1 && sim_time<max_sim_time) {
+    while(dut->exit_valid_o!=1 && sim_time-start_time<max_sim_time) {
       runCycles(100, dut, m_trace);
     }
   } else {
@@ -117,15 +250,123 @@ int main (int argc, char * argv[])
     }
   }
 
-  std::cout<<"Simulation finished after "<<(sim_time/CLK_PERIOD_ps)<<" clock cycles"<<std::endl;
+  std::cout<<"Simulation finished after "<<((sim_time-start_time)/CLK_PERIOD_ps)<<" clock cycles"<<std::endl;
 
-  // This should be the last message printed  so that the scripts like test-all can catch the exit value properly. 
+  // This should be the last message printed  so that the scripts like test-all can catch the exit value properly.
   // The return value should be the last character (in case it is 0)
-  if(dut->exit_valid_o==1) { 
+  if(dut->exit_valid_o==1) {
     std::cout<<"Program Finished with value "<<dut->exit_value_o<<std::endl;
-    exit_val = EXIT_SUCCESS;
+    return true;
   } else {
     std::cout<<"Simulation was terminated before program finished"<<std::endl;
+    return false;
+  }
+}
+
+int main (int argc, char * argv[])
+{
+
+  std::string firmware, checkpoint;
+  vluint64_t max_sim_time;
+  unsigned int boot_sel, exit_val;
+  bool use_openocd, server;
+  bool run_all = false;
+
+  Verilated::commandArgs(argc, argv);
+
+  // Instantiate the model
+  Vtestharness *dut = new Vtestharness;
+
+  XHEEP_CmdLineOptions* cmd_lines_options = new XHEEP_CmdLineOptions(argc,argv);
+
+  // Window and scopes of the waveform
+  trace_window.start      = cmd_lines_options->get_trace_cycles("+trace_start=");
+  trace_window.stop       = cmd_lines_options->get_trace_cycles("+trace_stop=");
+  trace_window.cycles     = cmd_lines_options->get_trace_cycles("+trace_cycles=");
+  trace_window.pc_trigger = cmd_lines_options->get_trace_pc(trace_window.pc);
+  trace_window.enabled    = trace_window.start || trace_window.stop || trace_window.cycles || trace_window.pc_trigger;
+  std::string trace_scope = cmd_lines_options->get_trace_scope();
+
+  // Open VCD
+  Verilated::traceEverOn (true);
+  VerilatedFstC *m_trace = new VerilatedFstC;
+  for(size_t begin = 0; begin < trace_scope.length(); ) {
+    size_t end = trace_scope.find(',', begin);
+    if(end == std::string::npos) end = trace_scope.length();
+    m_trace->dumpvars(99, trace_scope.substr(begin, end - begin));
+    begin = end + 1;
+  }
+  dut->trace (m_trace, 99);
+  m_trace->open ("waveform.fst");
+
+  use_openocd = cmd_lines_options->get_use_openocd();
+  server = cmd_lines_options->get_server();
+  firmware = server ? "" : cmd_lines_options->get_firmware();
+
+  if(firmware.empty() && use_openocd==false && server==false){
+      std::cout<<"You must specify the firmware if you are not using OpenOCD"<<std::endl;
+      exit(EXIT_FAILURE);
+  }
+
+  max_sim_time = cmd_lines_options->get_max_sim_time(run_all);
+
+  boot_sel     = cmd_lines_options->get_boot_sel();
+
+  checkpoint   = cmd_lines_options->get_checkpoint();
+  if(!checkpoint.empty() && use_openocd) {
+    // The state of the OpenOCD connection is not part of the model
+    std::cout<<"[TESTBENCH]: The checkpoint is not used with OpenOCD"<<std::endl;
+    checkpoint.clear();
+  }
+#ifndef TB_SAVABLE
+  if(!checkpoint.empty()) {
+    std::cout<<"[TESTBENCH]: Warning: the checkpoint needs a model built with VERILATOR_SAVABLE=1"<<std::endl;
+    checkpoint.clear();
+  }
+#endif
+
+  svSetScope(svGetScopeFromName("TOP.testharness"));
+  svScope scope = svGetScope();
+  if (!scope) {
+    std::cout<<"Warning: svGetScope failed"<< std::endl;
+    exit(EXIT_FAILURE);
+  }
+
+  dut->clk_i                = 0;
+  dut->rst_ni               = 1;
+  dut->jtag_tck_i           = 0;
+  dut->jtag_tms_i           = 0;
+  dut->jtag_trst_ni         = 0;
+  dut->jtag_tdi_i           = 0;
+  dut->execute_from_flash_i = 0;
+
+  dut->eval();
+  if(!trace_window.enabled) {
+    m_trace->dump(sim_time);
+  }
+
+  if(server) {
+    // The model stays resident: each line of the standard input is the path of a firmware, which
+    // is run after resetting X-HEEP. The output (including the UART output, if it is redirected to
+    // the standard output) is line buffered so that it is streamed to the client as it is printed.
+    setvbuf(stdout, NULL, _IOLBF, 0);
+    // The checkpoint is only saved by the first run: the state that the next ones keep from the
+    // previous firmware (e.g. in the flash) is not reset.
+    bool first_run = true;
+    exit_val = EXIT_SUCCESS;
+    std::cout<<SERVER_READY_MESSAGE<<std::endl;
+    while(std::getline(std::cin, firmware) && firmware.compare("quit") != 0) {
+      if(!firmware.empty()) {
+        std::cout<<"[TESTBENCH]: loading firmware  "<<firmware<<std::endl;
+        runFirmware(firmware, boot_sel, use_openocd, max_sim_time, run_all, checkpoint, first_run, dut, m_trace);
+        first_run = false;
+      }
+      fflush(stdout);
+      std::cout<<SERVER_READY_MESSAGE<<std::endl;
+    }
+  } else if(runFirmware(firmware, boot_sel, use_openocd, max_sim_time, run_all, checkpoint, true, dut, m_trace)) {
+    exit_val = EXIT_SUCCESS;
+  } else {
     exit_val = 2; // exit 2 to indicate successful run but premature termination
   }
 
@@ -4,6 +4,14 @@
 
 <%
     memory_ss = xheep.memory_ss()
+    cpu = xheep.cpu().get_name()
+    # Decode stage of each CPU, as in util/profile/configs/<cpu>.wal
+    cpu_decode = {
+        "cv32e20": ("cv32e20_i.u_cve2_top.u_cve2_core.if_stage_i.pc_id_o", "cv32e20_i.u_cve2_top.u_cve2_core.if_stage_i.instr_valid_id_o"),
+        "cv32e40p": ("cv32e40p_top_i.core_i.if_stage_i.pc_id_o", "cv32e40p_top_i.core_i.if_stage_i.instr_valid_id_o"),
+        "cv32e40px": ("cv32e40px_top_i.core_i.if_stage_i.pc_id_o", "cv32e40px_top_i.core_i.if_stage_i.instr_valid_id_o"),
+        "cv32e40x": ("cv32e40x_core_i.id_stage_i.if_id_pipe_i.pc", "cv32e40x_core_i.id_stage_i.instr_valid"),
+    }
 %>
 
 `ifndef SYNTHESIS
@@ -16,6 +24,12 @@ export "DPI-C" task tb_writetoSram${bank.name()};
 export "DPI-C" task tb_getMemSize;
 export "DPI-C" task tb_set_exit_loop;
 export "DPI-C" task load_flash_hex;
+`ifdef VERILATOR
+export "DPI-C" task tb_get_decode_pc;
+export "DPI-C" task tb_get_uartdpi_ctx;
+export "DPI-C" task tb_set_uartdpi_ctx;
+export "DPI-C" task tb_flash_read_pending;
+`endif
 
 import core_v_mini_mcu_pkg::*;
 
@@ -117,6 +131,43 @@ task tb_set_exit_loop;
   x_heep_system_i.core_v_mini_mcu_i.ao_peripheral_subsystem_i.soc_ctrl_i.testbench_set_exit_loop[0] = 1'b1;
 `endif
 endtask
+
+`ifdef VERILATOR
+// PC of the instruction in the decode stage of the CPU, used to trigger the waveform tracing
+task tb_get_decode_pc;
+  output int unsigned pc;
+  output bit valid;
+% if cpu in cpu_decode:
+  pc = x_heep_system_i.core_v_mini_mcu_i.cpu_subsystem_i.${cpu_decode[cpu][0]};
+  valid = x_heep_system_i.core_v_mini_mcu_i.cpu_subsystem_i.${cpu_decode[cpu][1]};
+% else:
+  pc = 0;
+  valid = 1'b0;
+% endif
+endtask
+
+// The UART DPI context is created by the process running the simulation, so it is not part of the
+// state of a checkpoint: it is kept across the restores of the checkpoints (see tb_top.cpp)
+task tb_get_uartdpi_ctx;
+  output chandle ctx;
+  ctx = i_uart0.ctx;
+endtask
+
+task tb_set_uartdpi_ctx;
+  input chandle ctx;
+  i_uart0.ctx = ctx;
+endtask
+
+// Whether the flash received a read command and has not sent its first byte yet. When booting from
+// the flash, this is the last point before the firmware is read, where the checkpoints are saved.
+task tb_flash_read_pending;
+  output bit pending;
+  pending = !gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.csb &&
+            gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.spi_cmd == 8'h03 &&
+            gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.bytecount == 4 &&
+            gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.bitcount == 0;
+endtask
+`endif
 `endif
 
 task load_flash_hex;
@@ -125,4 +176,14 @@ task load_flash_hex;
     for (i=0;i<=16*1024*1024;i=i+1)
         gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.memory[i] = 8'h00;
     $readmemh(firmware_file, gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.memory);
+    // A pending read command (e.g. restored from a checkpoint, see tb_flash_read_pending) already
+    // fetched its first byte from the previous content: it is fetched again from the new one
+    if (!gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.csb &&
+        gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.spi_cmd == 8'h03 &&
+        gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.bytecount == 4 &&
+        gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.bitcount == 0) begin
+        gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.buffer = gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.memory[gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.spi_addr - 1];
+        if (gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.io1_oe)
+            gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.io1_dout = gen_USE_EXTERNAL_DEVICE_EXAMPLE.flash_boot_i.buffer[7];
+    end
 endtask
@@ -4,6 +4,7 @@
 
 import os
 import subprocess
+import time
 
 from simulator import SimResult
 from bcolors import BColors
@@ -31,6 +32,11 @@ class Application:
         # indicating the result of the simulation.
         self.simulation_results: dict = {}
 
+        # Statistics of each compilation and simulation (wall time, simulated cycles, exit value,
+        # cached or not), recorded in the results database. Key is the compiler or simulator.
+        self.compilation_stats: dict = {}
+        self.simulation_stats: dict = {}
+
     def set_compilation_status(self, compiler: str, success: bool):
         """
         Set if the compilation with the compiler was successful or not.
@@ -43,6 +49,45 @@ class Application:
         """
         self.simulation_results[simulator] = result
 
+    def set_compilation_stats(self, compiler: str, wall_time: float, cached=False):
+        """
+        Set the statistics of the compilation with the compiler.
+
+        :param str compiler: The compiler.
+        :param float wall_time: The duration of the compilation in seconds.
+        :param bool cached: True if the firmware was restored from the cache.
+        """
+        self.compilation_stats[compiler] = {"wall_time": wall_time, "cached": cached}
+
+    def set_simulation_stats(
+        self,
+        simulator: str,
+        wall_time: float = None,
+        cycles=None,
+        exit_value=None,
+        cached=False,
+        counters=None,
+    ):
+        """
+        Set the statistics of the simulation with the simulator.
+
+        :param str simulator: The simulator.
+        :param float wall_time: The duration of the simulation in seconds. For a cached result,
+            the duration of the simulation that was cached, None if unknown.
+        :param int cycles: The number of simulated clock cycles, None if unknown.
+        :param int exit_value: The value returned by the program, None if it did not finish.
+        :param bool cached: True if the result was reused from the cache.
+        :param dict counters: The performance counters dumped by the program (e.g. mcycle and
+            minstret), indexed by name.
+        """
+        self.simulation_stats[simulator] = {
+            "wall_time": wall_time,
+            "cycles": cycles,
+            "exit_value": exit_value,
+            "cached": cached,
+            "counters": counters or {},
+        }
+
     def compilation_succeeded(self):
         """
         Check if the compilation was successful with every compiler.
@@ -58,6 +103,8 @@ class Application:
         extra_parameters: str,
         dry_run: bool = False,
         verbose: bool = True,
+        build_dir: str = None,
+        cache=None,
     ):
         """
         Compile the application with the compiler and linker. Outputs if it finishes with errors or
@@ -70,6 +117,11 @@ class Application:
         :param str extra_parameters: Extra parameters to pass to the "make app" command.
         :param bool dry_run: If True, only print the compilation command without executing it.
         :param bool verbose: If True, print detailed messages about the compilation process.
+        :param str build_dir: The absolute path of the build folder. If None, the default sw/build
+            folder is used. Compilations in different build folders can run in parallel.
+        :param BuildCache cache: If set, the firmware is restored from the cache when the app
+            sources, the shared software, the toolchain and the parameters did not change since
+            it was stored, instead of running "make app". A new firmware is stored in the cache.
 
         :return: True if the compilation succeded and False otherwise.
         """
@@ -82,7 +134,11 @@ class Application:
             )
         try:
             compile_command = ["make", "app", f"PROJECT={self.name}"]
-            os.environ["RISCV_XHEEP"] = compiler_path
+            # The environment is passed to make instead of modified, as several compilations can
+            # run at the same time with different compilers
+            env = dict(os.environ)
+            if compiler_path:
+                env["RISCV_XHEEP"] = compiler_path
             if compiler_prefix:
                 compile_command.append(f"COMPILER_PREFIX={compiler_prefix}")
             if compiler:
@@ -91,6 +147,8 @@ class Application:
                 compile_command.append(f"LINKER={linker}")
             if extra_parameters:
                 compile_command.append(extra_parameters)
+            if build_dir:
+                compile_command.append(f"SW_BUILD_DIR={build_dir}")
 
             if dry_run:
                 if verbose:
@@ -103,8 +161,38 @@ class Application:
                     )
                 return True
 
-            _ = subprocess.run(compile_command, capture_output=True, check=True)
+            start_time = time.monotonic()
+            out_dir = build_dir or os.path.abspath("sw/build")
+            cache_key = None
+            if cache is not None:
+                cache_key = cache.compile_key(
+                    self.name,
+                    compiler_path,
+                    compiler_prefix,
+                    compiler,
+                    linker,
+                    extra_parameters,
+                )
+                if cache.restore_build(cache_key, out_dir):
+                    self.set_compilation_stats(
+                        compiler, time.monotonic() - start_time, cached=True
+                    )
+                    if verbose:
+                        print(
+                            BColors.OKGREEN
+                            + f"Restored {self.name} compiled with {compiler} ({compiler_prefix}) and linker {linker} from the cache."
+                            + BColors.ENDC,
+                            flush=True,
+                        )
+                    return True
+
+            _ = subprocess.run(
+                compile_command, capture_output=True, check=True, env=env
+            )
+            if cache_key is not None:
+                cache.store_build(cache_key, out_dir)
         except subprocess.CalledProcessError as exc:
+            self.set_compilation_stats(compiler, time.monotonic() - start_time)
             print(
                 BColors.FAIL
                 + f"Error compiling {self.name} with {compiler} ({compiler_prefix}) and linker {linker}."
@@ -113,6 +201,7 @@ class Application:
             print(exc.stderr.decode("utf-8"), flush=True)
             return False
         else:
+            self.set_compilation_stats(compiler, time.monotonic() - start_time)
             if verbose:
                 print(
                     BColors.OKGREEN
@@ -0,0 +1,289 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from simulator import SimResult
+
+# Default folder of the cache
+CACHE_DIR = "build/test_apps_cache"
+
+# Default folder of the checkpoints of the simulation models
+CHECKPOINT_DIR = "build/test_apps_checkpoints"
+
+# Folder of the software sources, and folders in it that are not shared by every app
+SW_DIR = "sw"
+SW_APPLICATIONS_DIR = os.path.join(SW_DIR, "applications")
+SW_IGNORED_DIRS = {"applications", "build", "__pycache__"}
+
+# Toolchain used by sw/Makefile when RISCV_XHEEP is not set
+DEFAULT_TOOLCHAIN_DIR = "~/.riscv"
+
+# Files of the build folder restored on a cache hit (main.elf, main.hex, main.ld...)
+ARTIFACT_PREFIX = "main."
+
+# Simulation results that only depend on the firmware and the model, and can be cached (an app
+# skipped by the instruction-set simulator uses a part of X-HEEP that it does not model)
+CACHED_SIM_RESULTS = {SimResult.PASSED, SimResult.FAILED, SimResult.SKIPPED}
+
+
+def hash_file(hasher, path):
+    """
+    Add the content of a file to a hash.
+
+    :param hasher: The hashlib object.
+    :param str path: The path of the file.
+    """
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+
+
+def hash_tree(hasher, root, ignored_dirs=()):
+    """
+    Add the relative path and the content of every file of a folder to a hash, in a deterministic
+    order.
+
+    :param hasher: The hashlib object.
+    :param str root: The folder.
+    :param set ignored_dirs: Names of the sub-folders (at any depth) that are not hashed.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in ignored_dirs)
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            hasher.update(os.path.relpath(path, root).encode() + b"\0")
+            hash_file(hasher, path)
+            hasher.update(b"\0")
+
+
+def checkpoint_path(checkpoint_dir, simulator_name, model, boot_sel):
+    """
+    Get the checkpoint of X-HEEP after the reset and the boot of a simulation model. It is named
+    after the hash of the model, so that a rebuilt model saves a new checkpoint instead of
+    restoring a stale one.
+
+    :param str checkpoint_dir: The folder of the checkpoints, created if needed.
+    :param str simulator_name: The name of the simulator.
+    :param str model: The path of the simulation model executable.
+    :param str boot_sel: The boot mode of the simulations, whose boots differ.
+
+    :return: The absolute path of the checkpoint.
+    """
+    hasher = hashlib.sha256()
+    hash_file(hasher, model)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    return os.path.abspath(
+        os.path.join(
+            checkpoint_dir,
+            f"{simulator_name}-{hasher.hexdigest()[:32]}-boot{boot_sel}.ckpt",
+        )
+    )
+
+
+class BuildCache:
+    """
+    Content-addressed cache of the test_apps results. The firmware of an app is stored under a
+    hash of everything its compilation depends on: the app sources, the shared software (runtime,
+    drivers, generated headers and linker scripts), the Makefiles, the toolchain and the
+    compilation parameters. The result of a simulation is stored under a hash of the firmware and
+    of the simulation model.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, root="."):
+        """
+        Constructor for BuildCache.
+
+        :param str cache_dir: The folder of the cache.
+        :param str root: The root of the X-HEEP repository.
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        self._shared_hash = None
+        self._file_hashes = {}
+
+    def shared_hash(self):
+        """
+        :return: The hash of the software shared by every app, computed once.
+        """
+        with self._lock:
+            if self._shared_hash is None:
+                hasher = hashlib.sha256()
+                hash_tree(hasher, os.path.join(self.root, SW_DIR), SW_IGNORED_DIRS)
+                hash_file(hasher, os.path.join(self.root, "Makefile"))
+                self._shared_hash = hasher.hexdigest()
+            return self._shared_hash
+
+    def file_hash(self, path):
+        """
+        :return: The hash of a large file that does not change during the run (e.g. the
+            simulation model or the compiler), computed once.
+        """
+        key = (path, os.path.getmtime(path), os.path.getsize(path))
+        with self._lock:
+            if key not in self._file_hashes:
+                hasher = hashlib.sha256()
+                hash_file(hasher, path)
+                self._file_hashes[key] = hasher.hexdigest()
+            return self._file_hashes[key]
+
+    def toolchain_hash(self, compiler_path, compiler_prefix, compiler):
+        """
+        :return: The hash of the compiler drivers used by make app, resolved as by the Makefiles
+            (see sw/cmake/riscv.cmake) in RISCV_XHEEP rather than in the PATH, or their paths if
+            they are not found.
+        """
+        toolchain_dir = os.path.expanduser(
+            compiler_path or os.environ.get("RISCV_XHEEP") or DEFAULT_TOOLCHAIN_DIR
+        )
+        bin_dir = os.path.join(toolchain_dir, "bin")
+        if not compiler_prefix:
+            compiler_prefix = os.environ.get("COMPILER_PREFIX")
+        if not compiler_prefix:
+            # Same default as the COMPILER_PREFIX of the Makefile
+            drivers = sorted(glob.glob(os.path.join(bin_dir, "*gcc")))
+            if drivers:
+                driver = os.path.basename(drivers[0])
+                if driver.endswith("elf-gcc"):
+                    driver = driver[: -len("elf-gcc")]
+                compiler_prefix = driver
+        # The clang builds also use the GCC toolchain
+        programs = [f"{compiler_prefix or ''}elf-gcc"]
+        if compiler == "clang":
+            programs.append("clang")
+        hashes = []
+        for program in programs:
+            path = os.path.join(bin_dir, program)
+            hashes.append(self.file_hash(path) if os.path.isfile(path) else path)
+        return ":".join(hashes)
+
+    def compile_key(
+        self,
+        app_name,
+        compiler_path,
+        compiler_prefix,
+        compiler,
+        linker,
+        extra_parameters,
+    ):
+        """
+        :return: The key of the firmware of an app compiled with the given parameters.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(self.shared_hash().encode())
+        hash_tree(hasher, os.path.join(self.root, SW_APPLICATIONS_DIR, app_name))
+        parameters = [
+            app_name,
+            compiler_path or "",
+            compiler_prefix or "",
+            compiler or "",
+            linker or "",
+            extra_parameters or "",
+            self.toolchain_hash(compiler_path, compiler_prefix, compiler),
+        ]
+        hasher.update(json.dumps(parameters).encode())
+        return hasher.hexdigest()
+
+    def restore_build(self, key, build_dir):
+        """
+        Copy the cached firmware to the build folder.
+
+        :param str key: The key returned by compile_key.
+        :param str build_dir: The build folder.
+
+        :return: True on a cache hit, False otherwise.
+        """
+        entry = os.path.join(self.cache_dir, "compile", key)
+        if not os.path.isdir(entry):
+            return False
+        os.makedirs(build_dir, exist_ok=True)
+        for filename in os.listdir(entry):
+            shutil.copy2(os.path.join(entry, filename), build_dir)
+        return True
+
+    def store_build(self, key, build_dir):
+        """
+        Store the firmware of the build folder in the cache.
+
+        :param str key: The key returned by compile_key.
+        :param str build_dir: The build folder.
+        """
+        entry = os.path.join(self.cache_dir, "compile", key)
+        if os.path.isdir(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # The entry is written in a temporary folder and renamed, so that it is never seen
+        # incomplete by another run
+        tmp_entry = tempfile.mkdtemp(dir=os.path.dirname(entry))
+        try:
+            for filename in os.listdir(build_dir):
+                path = os.path.join(build_dir, filename)
+                if filename.startswith(ARTIFACT_PREFIX) and os.path.isfile(path):
+                    shutil.copy2(path, tmp_entry)
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Already stored by another run
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    def simulation_key(self, simulator, firmware):
+        """
+        :return: The key of the simulation of a firmware, None if the model is not found.
+        """
+        models = simulator.model_files()
+        if simulator.model_path() is None or not os.path.isfile(firmware):
+            return None
+        hasher = hashlib.sha256()
+        hash_file(hasher, firmware)
+        parameters = [
+            simulator.name,
+            *(self.file_hash(model) for model in models),
+            simulator.error_pattern,
+            simulator.failure_patterns,
+            simulator.sim_args,
+        ]
+        hasher.update(json.dumps(parameters).encode())
+        return hasher.hexdigest()
+
+    def load_simulation(self, key):
+        """
+        :param str key: The key returned by simulation_key.
+
+        :return: The cached simulation result, the report of its output and the statistics of the
+            simulation (see store_simulation), or None.
+        """
+        try:
+            with open(
+                os.path.join(self.cache_dir, "simulation", key + ".json"), "r"
+            ) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["result"], entry["report"], entry.get("stats", {})
+
+    def store_simulation(self, key, result, report, stats=None):
+        """
+        Store the result of a simulation, if it does not depend on the load of the machine (e.g.
+        a timeout).
+
+        :param str key: The key returned by simulation_key.
+        :param str result: The SimResult of the simulation.
+        :param str report: The output reported with the result.
+        :param dict stats: The statistics of the simulation: its wall time, the number of
+            simulated cycles, the exit value and the performance counters of the program.
+        """
+        if result not in CACHED_SIM_RESULTS:
+            return
+        path = os.path.join(self.cache_dir, "simulation", key + ".json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            json.dump({"result": result, "report": report, "stats": stats or {}}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,1181 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Instruction-set simulator (ISS) of X-HEEP: a functional model of the RV32IMC + Zicsr CPU running
+the ELF of an app (sw/build/main.elf) in the RAM of the X-HEEP configuration, with the part of the
+SoC that the runtime uses, the UART output and the exit register of soc_ctrl. The apps are
+checked in seconds, before their RTL simulation.
+
+The instructions are decoded once and translated to Python functions, one per basic block (or
+one per instruction with --engine step), so that the RAM accesses and the arithmetic of the
+instructions run as compiled Python code instead of being decoded at each execution. The ISS
+counts one cycle per instruction and does not model the interrupts: an access to any other
+peripheral, or a wfi before the exit, stops the simulation as unsupported.
+
+Examples:
+    python3 test/test_apps/iss.py --config configs/general.hjson --pads_cfg configs/pad_cfg.py \\
+        --write-memory-map build/iss/memory_map.json
+    python3 test/test_apps/iss.py --memory-map build/iss/memory_map.json sw/build/main.elf
+
+The exit status is 0 if the app returned 0, 1 if it returned another value or the simulation
+failed, and 2 if the app uses a part of X-HEEP that the ISS does not model.
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import struct
+import sys
+import time
+
+MASK = 0xFFFFFFFF
+SIGN = 0x80000000
+
+# Printed when the app exits, as by the RTL testbench (tb/tb_top.cpp)
+FINISH_MESSAGE = "Program Finished with value {}"
+
+# soc_ctrl registers (hw/ip/soc_ctrl/data/soc_ctrl.hjson.tpl)
+SOC_CTRL_EXIT_VALID = 0x0
+SOC_CTRL_EXIT_VALUE = 0x4
+SOC_CTRL_SYSTEM_FREQUENCY_HZ = 0x1C
+
+# UART registers (sw/device/lib/drivers/uart/uart_regs.h)
+UART_STATUS = 0x10
+UART_RDATA = 0x14
+UART_WDATA = 0x18
+UART_FIFO_STATUS = 0x20
+# STATUS of an idle UART: TX FIFO empty, TX idle, RX idle and RX FIFO empty
+UART_STATUS_IDLE = 0x3C
+
+# Machine CSRs
+CSR_MSTATUS = 0x300
+CSR_MISA = 0x301
+CSR_MTVEC = 0x305
+CSR_MCOUNTINHIBIT = 0x320
+CSR_MEPC = 0x341
+CSR_MCAUSE = 0x342
+CSR_MTVAL = 0x343
+# RV32IMC, MXL = 32 bits
+MISA_RV32IMC = 0x40001104
+MSTATUS_MIE = 0x8
+MSTATUS_MPIE = 0x80
+MSTATUS_MPP = 0x1800
+# mcycle and minstret, indexed by their bit in mcountinhibit: {csr: (index, high half)}
+COUNTER_CSRS = {
+    0xB00: (0, False),
+    0xB80: (0, True),
+    0xC00: (0, False),
+    0xC80: (0, True),
+    0xB02: (2, False),
+    0xB82: (2, True),
+    0xC02: (2, False),
+    0xC82: (2, True),
+}
+# The counters are stopped out of reset, as in the CV32E40* cores, see crt0.S
+MCOUNTINHIBIT_RESET = 0x5
+
+# Exception causes
+CAUSE_BREAKPOINT = 3
+CAUSE_ECALL_M = 11
+
+# Start of the Python line recording the instructions retired by a block that makes the app exit
+EXIT_INSTRUCTIONS = "m.exit_instructions = "
+
+# Maximum number of instructions translated to one function
+MAX_BLOCK_SIZE = 64
+# Maximum number of iterations of an inner loop before returning to the dispatch of the blocks
+LOOP_ITERATIONS = 1024
+
+# ELF constants
+ELF_MAGIC = b"\x7fELF"
+ELFCLASS32 = 1
+ELFDATA2LSB = 1
+PT_LOAD = 1
+
+# Folder of mcu_gen.py, to build the XHeep model of the configuration
+UTIL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "util",
+)
+
+U16 = struct.Struct("<H").unpack_from
+S16 = struct.Struct("<h").unpack_from
+U32 = struct.Struct("<I").unpack_from
+P16 = struct.Struct("<H").pack_into
+P32 = struct.Struct("<I").pack_into
+
+
+class UnsupportedError(RuntimeError):
+    """
+    The app uses a part of X-HEEP that the ISS does not model (e.g. a peripheral or the
+    interrupts), so its result can only be known from the RTL simulation.
+    """
+
+
+def memory_map_from_xheep(xheep):
+    """
+    :param XHeep xheep: The built XHeep model.
+
+    :return: The memory map of the ISS: the RAM and the peripherals with their absolute
+        addresses, as a JSON serializable dictionary.
+    """
+    memory_ss = xheep.memory_ss()
+    peripherals = []
+    for domain in (
+        xheep.get_base_peripheral_domain(),
+        xheep.get_user_peripheral_domain(),
+    ):
+        for peripheral in domain.get_peripherals():
+            peripherals.append(
+                {
+                    "name": peripheral.get_name(),
+                    "start": domain.get_start_address() + peripheral.get_address(),
+                    "length": peripheral.get_length(),
+                }
+            )
+    return {
+        "ram": {
+            "start": memory_ss.ram_start_address(),
+            "size": memory_ss.ram_size_address(),
+        },
+        "peripherals": peripherals,
+    }
+
+
+def load_memory_map(config, python_config="", pads_cfg=""):
+    """
+    Build the XHeep model of a configuration, as mcu-gen does, and get its memory map.
+
+    :param str config: The path of the general HJSON configuration.
+    :param str python_config: The path of the general Python configuration, if empty the HJSON
+        configuration is used.
+    :param str pads_cfg: The path of the pads configuration.
+
+    :return: The memory map, see memory_map_from_xheep.
+    """
+    if UTIL_DIR not in sys.path:
+        sys.path.insert(0, UTIL_DIR)
+    import mcu_gen
+
+    # The configuration of the pads is printed while the model is built
+    with contextlib.redirect_stdout(io.StringIO()):
+        xheep, hjson_config = mcu_gen.load_xheep_config(config, python_config, pads_cfg)
+        mcu_gen.configure_xheep(xheep, hjson_config)
+    return memory_map_from_xheep(xheep)
+
+
+def load_elf(path, ram, ram_base):
+    """
+    Copy the loadable segments of a 32-bit little-endian RISC-V ELF to the RAM, at their load
+    addresses, as the bootrom does with the firmware.
+
+    :param str path: The path of the ELF.
+    :param bytearray ram: The RAM.
+    :param int ram_base: The address of the RAM.
+
+    :return: The entry point of the ELF.
+    :raise ValueError: when the ELF is not valid or a segment is out of the RAM.
+    """
+    with open(path, "rb") as f:
+        elf = f.read()
+
+    if elf[:4] != ELF_MAGIC:
+        raise ValueError(f"{path} is not an ELF file")
+    if elf[4] != ELFCLASS32 or elf[5] != ELFDATA2LSB:
+        raise ValueError(f"{path} is not a 32-bit little-endian ELF file")
+
+    e_entry, e_phoff = struct.unpack_from("<II", elf, 24)
+    e_phentsize, e_phnum = struct.unpack_from("<HH", elf, 42)
+    for i in range(e_phnum):
+        p_type, p_offset, _, p_paddr, p_filesz, p_memsz = struct.unpack_from(
+            "<IIIIII", elf, e_phoff + i * e_phentsize
+        )
+        if p_type != PT_LOAD or p_memsz == 0:
+            continue
+        offset = p_paddr - ram_base
+        if offset < 0 or offset + p_memsz > len(ram):
+            raise ValueError(
+                f"The segment at {p_paddr:#010x} ({p_memsz} bytes) of {path} is out of the RAM"
+            )
+        ram[offset : offset + p_filesz] = elf[p_offset : p_offset + p_filesz]
+        ram[offset + p_filesz : offset + p_memsz] = bytes(p_memsz - p_filesz)
+    return e_entry
+
+
+def sign_extend(value, bits):
+    """
+    :return: The signed value of the lowest bits of value.
+    """
+    value &= (1 << bits) - 1
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def decode(instr):
+    """
+    Decode an RV32IMC + Zicsr instruction. The compressed instructions are expanded to their
+    32-bit equivalent.
+
+    :param int instr: The encoding of the instruction, its lowest 16 bits for a compressed one.
+
+    :return: The tuple (op, rd, rs1, rs2, imm), op being the mnemonic of the instruction, or
+        "illegal". For the CSR instructions, imm is the CSR and rs1 the immediate of the
+        csrr*i forms.
+    """
+    if instr & 0x3 != 0x3:
+        return decode_compressed(instr & 0xFFFF)
+
+    opcode = instr & 0x7F
+    rd = (instr >> 7) & 0x1F
+    funct3 = (instr >> 12) & 0x7
+    rs1 = (instr >> 15) & 0x1F
+    rs2 = (instr >> 20) & 0x1F
+    funct7 = instr >> 25
+    imm_i = sign_extend(instr >> 20, 12)
+
+    if opcode == 0x37:
+        return "lui", rd, 0, 0, instr & 0xFFFFF000
+    if opcode == 0x17:
+        return "auipc", rd, 0, 0, instr & 0xFFFFF000
+    if opcode == 0x6F:
+        imm = (
+            ((instr >> 31) & 0x1) << 20
+            | ((instr >> 21) & 0x3FF) << 1
+            | ((instr >> 20) & 0x1) << 11
+            | ((instr >> 12) & 0xFF) << 12
+        )
+        return "jal", rd, 0, 0, sign_extend(imm, 21)
+    if opcode == 0x67 and funct3 == 0:
+        return "jalr", rd, rs1, 0, imm_i
+    if opcode == 0x63:
+        op = ("beq", "bne", None, None, "blt", "bge", "bltu", "bgeu")[funct3]
+        imm = (
+            ((instr >> 31) & 0x1) << 12
+            | ((instr >> 25) & 0x3F) << 5
+            | ((instr >> 8) & 0xF) << 1
+            | ((instr >> 7) & 0x1) << 11
+        )
+        if op is not None:
+            return op, 0, rs1, rs2, sign_extend(imm, 13)
+    elif opcode == 0x03:
+        op = ("lb", "lh", "lw", None, "lbu", "lhu", None, None)[funct3]
+        if op is not None:
+            return op, rd, rs1, 0, imm_i
+    elif opcode == 0x23:
+        imm = sign_extend((funct7 << 5) | rd, 12)
+        if funct3 < 3:
+            return ("sb", "sh", "sw")[funct3], 0, rs1, rs2, imm
+    elif opcode == 0x13:
+        if funct3 == 1:
+            if funct7 == 0:
+                return "slli", rd, rs1, 0, rs2
+        elif funct3 == 5:
+            if funct7 in (0x00, 0x20):
+                return ("srli" if funct7 == 0 else "srai"), rd, rs1, 0, rs2
+        else:
+            op = ("addi", None, "slti", "sltiu", "xori", None, "ori", "andi")[funct3]
+            return op, rd, rs1, 0, imm_i
+    elif opcode == 0x33:
+        if funct7 == 0x00:
+            op = ("add", "sll", "slt", "sltu", "xor", "srl", "or", "and")[funct3]
+        elif funct7 == 0x01:
+            op = ("mul", "mulh", "mulhsu", "mulhu", "div", "divu", "rem", "remu")[
+                funct3
+            ]
+        elif funct7 == 0x20 and funct3 in (0, 5):
+            op = "sub" if funct3 == 0 else "sra"
+        else:
+            op = None
+        if op is not None:
+            return op, rd, rs1, rs2, 0
+    elif opcode == 0x0F:
+        if funct3 == 0:
+            return "fence", 0, 0, 0, 0
+        if funct3 == 1:
+            return "fence.i", 0, 0, 0, 0
+    elif opcode == 0x73:
+        if funct3 == 0:
+            op = {
+                0x00000073: "ecall",
+                0x00100073: "ebreak",
+                0x30200073: "mret",
+                0x10500073: "wfi",
+            }.get(instr)
+            if op is not None:
+                return op, 0, 0, 0, 0
+        elif funct3 != 4:
+            op = ("csrrw", "csrrs", "csrrc")[(funct3 & 0x3) - 1]
+            return op + ("i" if funct3 & 0x4 else ""), rd, rs1, 0, instr >> 20
+
+    return "illegal", 0, 0, 0, 0
+
+
+def decode_compressed(instr):
+    """
+    Decode a compressed instruction to its 32-bit equivalent, see decode.
+    """
+    quadrant = instr & 0x3
+    funct3 = instr >> 13
+    bit12 = (instr >> 12) & 0x1
+    rd = (instr >> 7) & 0x1F
+    rs2 = (instr >> 2) & 0x1F
+    # Registers x8-x15 of the 3-bit fields
+    rd_c = ((instr >> 2) & 0x7) + 8
+    rs1_c = ((instr >> 7) & 0x7) + 8
+    imm6 = sign_extend(bit12 << 5 | rs2, 6)
+
+    if quadrant == 0:
+        if funct3 == 0:
+            imm = (
+                ((instr >> 11) & 0x3) << 4
+                | ((instr >> 7) & 0xF) << 6
+                | ((instr >> 6) & 0x1) << 2
+                | ((instr >> 5) & 0x1) << 3
+            )
+            if imm:
+                return "addi", rd_c, 2, 0, imm
+        elif funct3 in (2, 6):
+            imm = (
+                ((instr >> 10) & 0x7) << 3
+                | ((instr >> 6) & 0x1) << 2
+                | ((instr >> 5) & 0x1) << 6
+            )
+            if funct3 == 2:
+                return "lw", rd_c, rs1_c, 0, imm
+            return "sw", 0, rs1_c, rd_c, imm
+
+    elif quadrant == 1:
+        if funct3 == 0:
+            return "addi", rd, rd, 0, imm6
+        if funct3 in (1, 5):
+            imm = (
+                bit12 << 11
+                | ((instr >> 11) & 0x1) << 4
+                | ((instr >> 9) & 0x3) << 8
+                | ((instr >> 8) & 0x1) << 10
+                | ((instr >> 7) & 0x1) << 6
+                | ((instr >> 6) & 0x1) << 7
+                | ((instr >> 3) & 0x7) << 1
+                | ((instr >> 2) & 0x1) << 5
+            )
+            return "jal", 1 if funct3 == 1 else 0, 0, 0, sign_extend(imm, 12)
+        if funct3 == 2:
+            return "addi", rd, 0, 0, imm6
+        if funct3 == 3:
+            if rd == 2:
+                imm = (
+                    bit12 << 9
+                    | ((instr >> 6) & 0x1) << 4
+                    | ((instr >> 5) & 0x1) << 6
+                    | ((instr >> 3) & 0x3) << 7
+                    | ((instr >> 2) & 0x1) << 5
+                )
+                if imm:
+                    return "addi", 2, 2, 0, sign_extend(imm, 10)
+            elif imm6:
+                return "lui", rd, 0, 0, (imm6 << 12) & MASK
+        elif funct3 == 4:
+            funct2 = (instr >> 10) & 0x3
+            if funct2 < 2:
+                if not bit12:
+                    return ("srli", "srai")[funct2], rs1_c, rs1_c, 0, rs2
+            elif funct2 == 2:
+                return "andi", rs1_c, rs1_c, 0, imm6
+            elif not bit12:
+                op = ("sub", "xor", "or", "and")[(instr >> 5) & 0x3]
+                return op, rs1_c, rs1_c, rd_c, 0
+        else:
+            imm = (
+                bit12 << 8
+                | ((instr >> 10) & 0x3) << 3
+                | ((instr >> 5) & 0x3) << 6
+                | ((instr >> 3) & 0x3) << 1
+                | ((instr >> 2) & 0x1) << 5
+            )
+            return ("beq" if funct3 == 6 else "bne"), 0, rs1_c, 0, sign_extend(imm, 9)
+
+    elif quadrant == 2:
+        if funct3 == 0:
+            if not bit12:
+                return "slli", rd, rd, 0, rs2
+        elif funct3 == 2:
+            imm = bit12 << 5 | ((instr >> 4) & 0x7) << 2 | ((instr >> 2) & 0x3) << 6
+            if rd:
+                return "lw", rd, 2, 0, imm
+        elif funct3 == 4:
+            if not bit12:
+                if rs2:
+                    return "add", rd, 0, rs2, 0
+                if rd:
+                    return "jalr", 0, rd, 0, 0
+            elif rs2:
+                return "add", rd, rd, rs2, 0
+            elif rd:
+                return "jalr", 1, rd, 0, 0
+            else:
+                return "ebreak", 0, 0, 0, 0
+        elif funct3 == 6:
+            imm = ((instr >> 9) & 0xF) << 2 | ((instr >> 7) & 0x3) << 6
+            return "sw", 0, 2, rs2, imm
+
+    return "illegal", 0, 0, 0, 0
+
+
+def div(a, b):
+    """
+    :return: The signed division of the 32-bit values a and b, as the RISC-V div instruction.
+    """
+    if b == 0:
+        return MASK
+    a, b = (a ^ SIGN) - SIGN, (b ^ SIGN) - SIGN
+    q = abs(a) // abs(b)
+    return (-q if (a < 0) != (b < 0) else q) & MASK
+
+
+def divu(a, b):
+    """
+    :return: The unsigned division of the 32-bit values a and b, as the RISC-V divu instruction.
+    """
+    return a // b if b else MASK
+
+
+def rem(a, b):
+    """
+    :return: The signed remainder of the 32-bit values a and b, as the RISC-V rem instruction.
+    """
+    if b == 0:
+        return a
+    a, b = (a ^ SIGN) - SIGN, (b ^ SIGN) - SIGN
+    r = abs(a) % abs(b)
+    return (-r if a < 0 else r) & MASK
+
+
+def remu(a, b):
+    """
+    :return: The unsigned remainder of the 32-bit values a and b, as the RISC-V remu instruction.
+    """
+    return a % b if b else a
+
+
+# Expressions of the results of the arithmetic instructions, the operands being unsigned 32-bit
+ALU_EXPRESSIONS = {
+    "add": "({a} + {b}) & 0xFFFFFFFF",
+    "sub": "({a} - {b}) & 0xFFFFFFFF",
+    "sll": "({a} << ({b} & 31)) & 0xFFFFFFFF",
+    "slt": "int(({a} ^ 0x80000000) < ({b} ^ 0x80000000))",
+    "sltu": "int({a} < {b})",
+    "xor": "{a} ^ {b}",
+    "srl": "{a} >> ({b} & 31)",
+    "sra": "(((({a} ^ 0x80000000) - 0x80000000) >> ({b} & 31)) & 0xFFFFFFFF)",
+    "or": "{a} | {b}",
+    "and": "{a} & {b}",
+    "mul": "({a} * {b}) & 0xFFFFFFFF",
+    "mulh": "((((({a} ^ 0x80000000) - 0x80000000) * (({b} ^ 0x80000000) - 0x80000000)) >> 32) & 0xFFFFFFFF)",
+    "mulhsu": "((((({a} ^ 0x80000000) - 0x80000000) * {b}) >> 32) & 0xFFFFFFFF)",
+    "mulhu": "({a} * {b}) >> 32",
+    "div": "div({a}, {b})",
+    "divu": "divu({a}, {b})",
+    "rem": "rem({a}, {b})",
+    "remu": "remu({a}, {b})",
+}
+ALU_IMMEDIATE_OPS = {
+    "addi": "add",
+    "slti": "slt",
+    "sltiu": "sltu",
+    "xori": "xor",
+    "ori": "or",
+    "andi": "and",
+    "slli": "sll",
+    "srli": "srl",
+    "srai": "sra",
+}
+BRANCH_CONDITIONS = {
+    "beq": "{a} == {b}",
+    "bne": "{a} != {b}",
+    "blt": "({a} ^ 0x80000000) < ({b} ^ 0x80000000)",
+    "bge": "({a} ^ 0x80000000) >= ({b} ^ 0x80000000)",
+    "bltu": "{a} < {b}",
+    "bgeu": "{a} >= {b}",
+}
+# {op: (size, value read from the RAM at o, value v read from a peripheral)}
+LOADS = {
+    "lb": (
+        1,
+        "((M[o] ^ 0x80) - 0x80) & 0xFFFFFFFF",
+        "((v ^ 0x80) - 0x80) & 0xFFFFFFFF",
+    ),
+    "lh": (2, "S16(M, o)[0] & 0xFFFFFFFF", "((v ^ 0x8000) - 0x8000) & 0xFFFFFFFF"),
+    "lw": (4, "U32(M, o)[0]", "v"),
+    "lbu": (1, "M[o]", "v"),
+    "lhu": (2, "U16(M, o)[0]", "v"),
+}
+# {op: (size, write of the value {v} to the RAM at o)}
+STORES = {
+    "sb": (1, "M[o] = {v} & 0xFF"),
+    "sh": (2, "P16(M, o, {v} & 0xFFFF)"),
+    "sw": (4, "P32(M, o, {v})"),
+}
+
+
+class Peripheral:
+    """
+    A peripheral of the ISS: a set of 32-bit registers keeping the values written to them.
+    """
+
+    def __init__(self, iss, name):
+        """
+        Constructor for Peripheral.
+
+        :param Iss iss: The ISS.
+        :param str name: The name of the peripheral.
+        """
+        self.iss = iss
+        self.name = name
+        self.registers = {}
+
+    def load(self, offset, size):
+        """
+        :return: The value of size bytes at offset.
+        """
+        value = self.read(offset & ~0x3) >> (8 * (offset & 0x3))
+        return value & ((1 << (8 * size)) - 1)
+
+    def store(self, offset, size, value):
+        """
+        Write the lowest size bytes of value at offset.
+        """
+        register = offset & ~0x3
+        shift = 8 * (offset & 0x3)
+        mask = ((1 << (8 * size)) - 1) << shift
+        old = self.registers.get(register, 0)
+        self.write(register, (old & ~mask) | ((value << shift) & mask))
+
+    def read(self, register):
+        return self.registers.get(register, 0)
+
+    def write(self, register, value):
+        self.registers[register] = value
+
+
+class SocCtrl(Peripheral):
+    """
+    soc_ctrl: the app exits by writing its exit value, then 1 to EXIT_VALID.
+    """
+
+    def __init__(self, iss, name):
+        super().__init__(iss, name)
+        self.registers[SOC_CTRL_SYSTEM_FREQUENCY_HZ] = 1
+
+    def write(self, register, value):
+        super().write(register, value)
+        if register == SOC_CTRL_EXIT_VALID and value & 0x1:
+            self.iss.exit_value = self.registers.get(SOC_CTRL_EXIT_VALUE, 0)
+
+
+class Uart(Peripheral):
+    """
+    UART: the transmitted characters are printed immediately, the reception is not modeled.
+    """
+
+    def read(self, register):
+        if register == UART_STATUS:
+            return UART_STATUS_IDLE
+        if register == UART_FIFO_STATUS:
+            return 0
+        if register == UART_RDATA:
+            raise UnsupportedError("The UART reception is not modeled")
+        return super().read(register)
+
+    def write(self, register, value):
+        if register == UART_WDATA:
+            self.iss.write_uart(value & 0xFF)
+        else:
+            super().write(register, value)
+
+
+# Peripherals modeled by the ISS, by name
+PERIPHERALS = {
+    "soc_ctrl": SocCtrl,
+    "uart": Uart,
+}
+
+
+class Iss:
+    """
+    The ISS of an RV32IMC + Zicsr CPU with the RAM and the peripherals of an X-HEEP memory map.
+    The registers hold unsigned 32-bit values. The instructions are translated to Python
+    functions on their first execution, and the functions are kept until a fence.i.
+    """
+
+    def __init__(self, memory_map, engine="block", output=None):
+        """
+        Constructor for Iss.
+
+        :param dict memory_map: The memory map, see memory_map_from_xheep.
+        :param str engine: "block" to translate a basic block to each function, "step" to
+            translate each instruction to its own function.
+        :param output: The text file where the UART output is written (default stdout).
+        """
+        self.ram_base = memory_map["ram"]["start"]
+        self.ram = bytearray(memory_map["ram"]["size"])
+        self.peripherals = []
+        for peripheral in memory_map["peripherals"]:
+            model = PERIPHERALS.get(peripheral["name"])
+            self.peripherals.append(
+                (
+                    peripheral["start"],
+                    peripheral["start"] + peripheral["length"],
+                    peripheral["name"],
+                    model(self, peripheral["name"]) if model else None,
+                )
+            )
+        self.max_block_size = MAX_BLOCK_SIZE if engine == "block" else 1
+        self.output = output or sys.stdout
+        self.uart_line = bytearray()
+
+        self.x = [0] * 32
+        self.pc = 0
+        self.csrs = {CSR_MISA: MISA_RV32IMC, CSR_MCOUNTINHIBIT: MCOUNTINHIBIT_RESET}
+        self.instret = 0
+        # Value of the stopped counters, offset to instret of the running ones
+        self.counter_values = {0: 0, 2: 0}
+        self.counter_offsets = {0: 0, 2: 0}
+        self.exit_value = None
+        # Number of instructions retired by the block that made the app exit, which stops at the
+        # store to soc_ctrl
+        self.exit_instructions = 0
+
+        # {pc: (function, number of instructions, encoding of the first instruction)}
+        self.blocks = {}
+        self.namespace = {
+            "x": self.x,
+            "M": self.ram,
+            "m": self,
+            "U16": U16,
+            "S16": S16,
+            "U32": U32,
+            "P16": P16,
+            "P32": P32,
+            "div": div,
+            "divu": divu,
+            "rem": rem,
+            "remu": remu,
+        }
+
+    def load_elf(self, path):
+        """
+        Load an ELF to the RAM and start at its entry point.
+
+        :param str path: The path of the ELF.
+        """
+        self.pc = load_elf(path, self.ram, self.ram_base)
+
+    def peripheral(self, address, access):
+        """
+        :param int address: The address of an access out of the RAM.
+        :param str access: The kind of access, for the error message.
+
+        :return: The modeled peripheral at the address and the offset of the address in it.
+        :raise UnsupportedError: when the address is not in a modeled peripheral.
+        """
+        for start, end, name, model in self.peripherals:
+            if start <= address < end:
+                if model is None:
+                    raise UnsupportedError(
+                        f"{access} {address:#010x} in the {name} peripheral, which is not modeled"
+                    )
+                return model, address - start
+        raise UnsupportedError(f"{access} the unmapped address {address:#010x}")
+
+    def load(self, address, size):
+        """
+        :return: The value of size bytes at an address out of the RAM.
+        """
+        model, offset = self.peripheral(address, "Load from")
+        return model.load(offset, size)
+
+    def store(self, address, size, value):
+        """
+        Write the lowest size bytes of value at an address out of the RAM.
+        """
+        model, offset = self.peripheral(address, "Store to")
+        model.store(offset, size, value)
+
+    def write_uart(self, byte):
+        """
+        Write a character transmitted by the UART, the lines are printed as soon as they end.
+        """
+        self.uart_line.append(byte)
+        if byte == 0x0A:
+            self.flush_uart()
+
+    def flush_uart(self):
+        """
+        Print the characters of the UART that are not printed yet.
+        """
+        if self.uart_line:
+            self.output.write(self.uart_line.decode(errors="replace"))
+            self.output.flush()
+            self.uart_line.clear()
+
+    def fetch(self, pc):
+        """
+        :return: The encoding of the instruction at pc and its size in bytes.
+        """
+        offset = pc - self.ram_base
+        if offset < 0 or offset + 2 > len(self.ram):
+            self.peripheral(pc, "Execution from")
+            raise UnsupportedError(f"Execution from {pc:#010x}, out of the RAM")
+        instr = U16(self.ram, offset)[0]
+        if instr & 0x3 != 0x3:
+            return instr, 2
+        if offset + 4 > len(self.ram):
+            raise UnsupportedError(f"Execution from {pc:#010x}, out of the RAM")
+        return U32(self.ram, offset)[0], 4
+
+    def translate(self, pc):
+        """
+        Translate the instructions from pc to the end of their basic block to a Python function
+        executing them.
+
+        :param int pc: The address of the first instruction.
+
+        :return: The tuple (function, number of instructions, encoding of the first
+            instruction). The function returns the address of the next instruction.
+        """
+        lines = []
+        count = 0
+        first_instr = None
+        address = pc
+        end = False
+        while not end and count < self.max_block_size:
+            try:
+                instr, size = self.fetch(address)
+            except UnsupportedError:
+                if count == 0:
+                    raise
+                break
+            op, rd, rs1, rs2, imm = decode(instr)
+            if op == "illegal":
+                if count == 0:
+                    raise UnsupportedError(
+                        f"Instruction {instr:#010x} at {address:#010x}, which is not in RV32IMC + Zicsr"
+                    )
+                break
+            system = self.translate_system(op, rd, rs1, imm, address, size)
+            if system is not None:
+                # Executed alone, with the exact number of retired instructions
+                if count == 0:
+                    lines.append(system)
+                    count, first_instr, end = 1, instr, True
+                break
+            if first_instr is None:
+                first_instr = instr
+            count += 1
+            if (
+                op in BRANCH_CONDITIONS
+                and (address + imm) & MASK == pc
+                and self.max_block_size > 1
+            ):
+                lines = self.translate_loop(
+                    lines, op, rs1, rs2, pc, count, address + size
+                )
+                end = True
+                break
+            end = self.translate_instruction(
+                lines, op, rd, rs1, rs2, imm, address, size, count
+            )
+            address += size
+        if not end:
+            lines.append(f"return {address}")
+
+        arguments = ", ".join(f"{name}={name}" for name in self.namespace)
+        source = f"def block({arguments}):\n" + "".join(
+            f"    {line}\n" for line in lines
+        )
+        namespace = dict(self.namespace)
+        exec(compile(source, f"<iss {pc:#010x}>", "exec"), namespace)
+        return namespace["block"], count, first_instr
+
+    def translate_loop(self, lines, op, rs1, rs2, pc, count, next_pc):
+        """
+        Translate a basic block ending with a branch to its own start, i.e. an inner loop, to a
+        Python loop, so that the iterations do not return to the dispatch of the blocks. The loop
+        returns after LOOP_ITERATIONS iterations, to check the end of the simulation.
+
+        :param list lines: The Python lines of the body of the loop, without the branch.
+        :param int count: The number of instructions of the block, with the branch.
+        :param int next_pc: The address of the instruction following the branch.
+
+        :return: The Python lines of the block.
+        """
+        condition = BRANCH_CONDITIONS[op].format(
+            a=f"x[{rs1}]" if rs1 else "0", b=f"x[{rs2}]" if rs2 else "0"
+        )
+        # The instructions of the last iteration are counted by run, and the ones of the
+        # previous iterations are added to the instructions retired before an exit
+        lines = [
+            line.replace(EXIT_INSTRUCTIONS, f"{EXIT_INSTRUCTIONS}i * {count} + ")
+            for line in lines
+        ]
+        return (
+            [f"for i in range({LOOP_ITERATIONS}):"]
+            + [f"    {line}" for line in lines]
+            + [
+                f"    if not ({condition}):",
+                f"        m.instret += i * {count}",
+                f"        return {next_pc}",
+                f"m.instret += {(LOOP_ITERATIONS - 1) * count}",
+                f"return {pc}",
+            ]
+        )
+
+    def translate_system(self, op, rd, rs1, imm, pc, size):
+        """
+        :return: The Python line executing a system instruction, None for the other
+            instructions.
+        """
+        if op.startswith("csr"):
+            return f"return m.csr({pc}, {size}, {op!r}, {rd}, {rs1}, {imm})"
+        if op == "ecall":
+            return f"return m.trap({pc}, {CAUSE_ECALL_M}, 0)"
+        if op == "ebreak":
+            return f"return m.trap({pc}, {CAUSE_BREAKPOINT}, {pc})"
+        if op == "mret":
+            return "return m.mret()"
+        if op == "wfi":
+            return f"return m.wfi({pc + size})"
+        if op == "fence.i":
+            return f"return m.fence_i({pc + size})"
+        return None
+
+    def translate_instruction(self, lines, op, rd, rs1, rs2, imm, pc, size, index=1):
+        """
+        Append the Python lines executing an instruction to lines.
+
+        :param int index: The number of the instruction in its block, from 1. A store that makes
+            the app exit stops the block, and only the instructions up to it are retired.
+
+        :return: True if the instruction ends the basic block.
+        """
+        a = f"x[{rs1}]" if rs1 else "0"
+        b = f"x[{rs2}]" if rs2 else "0"
+        # The writes to x0 are discarded, but not the accesses to the peripherals
+        target = f"x[{rd}]" if rd else "_"
+        next_pc = pc + size
+
+        if op in ALU_EXPRESSIONS or op in ALU_IMMEDIATE_OPS:
+            if rd:
+                if op in ALU_IMMEDIATE_OPS:
+                    op, b = ALU_IMMEDIATE_OPS[op], str(imm & MASK)
+                lines.append(f"{target} = " + ALU_EXPRESSIONS[op].format(a=a, b=b))
+        elif op in LOADS:
+            width, ram_value, peripheral_value = LOADS[op]
+            lines += [
+                f"o = ({a} + {imm - self.ram_base}) & 0xFFFFFFFF",
+                f"if o <= {len(self.ram) - width}:",
+                f"    {target} = {ram_value}",
+                "else:",
+                f"    v = m.load((o + {self.ram_base}) & 0xFFFFFFFF, {width})",
+                f"    {target} = {peripheral_value}",
+            ]
+        elif op in STORES:
+            width, ram_store = STORES[op]
+            lines += [
+                f"o = ({a} + {imm - self.ram_base}) & 0xFFFFFFFF",
+                f"if o <= {len(self.ram) - width}:",
+                f"    {ram_store.format(v=b)}",
+                "else:",
+                f"    m.store((o + {self.ram_base}) & 0xFFFFFFFF, {width}, {b})",
+                "    if m.exit_value is not None:",
+                f"        {EXIT_INSTRUCTIONS}{index}",
+                f"        return {next_pc}",
+            ]
+        elif op == "lui":
+            if rd:
+                lines.append(f"{target} = {imm & MASK}")
+        elif op == "auipc":
+            if rd:
+                lines.append(f"{target} = {(pc + imm) & MASK}")
+        elif op == "jal":
+            if rd:
+                lines.append(f"{target} = {next_pc}")
+            lines.append(f"return {(pc + imm) & MASK}")
+            return True
+        elif op == "jalr":
+            lines.append(f"t = ({a} + {imm}) & 0xFFFFFFFE")
+            if rd:
+                lines.append(f"{target} = {next_pc}")
+            lines.append("return t")
+            return True
+        elif op in BRANCH_CONDITIONS:
+            condition = BRANCH_CONDITIONS[op].format(a=a, b=b)
+            lines += [f"if {condition}:", f"    return {(pc + imm) & MASK}"]
+            lines.append(f"return {next_pc}")
+            return True
+        elif op != "fence":
+            raise ValueError(f"No translation of the instruction {op}")
+        return False
+
+    def csr(self, pc, size, op, rd, rs1, number):
+        """
+        Execute a CSR instruction.
+
+        :return: The address of the next instruction.
+        """
+        source = rs1 if op.endswith("i") else self.x[rs1]
+        if op.startswith("csrrw"):
+            old = self.read_csr(number) if rd else 0
+            self.write_csr(number, source)
+        else:
+            old = self.read_csr(number)
+            # csrrs and csrrc only write the CSR with a non-zero rs1 field
+            if rs1:
+                if op.startswith("csrrs"):
+                    self.write_csr(number, old | source)
+                else:
+                    self.write_csr(number, old & ~source & MASK)
+        if rd:
+            self.x[rd] = old
+        return pc + size
+
+    def counter(self, index):
+        """
+        :return: The 64-bit value of a counter, mcycle (0) or minstret (2). One cycle is counted
+            per instruction.
+        """
+        if self.csrs[CSR_MCOUNTINHIBIT] >> index & 0x1:
+            return self.counter_values[index]
+        return (self.instret - self.counter_offsets[index]) & 0xFFFFFFFFFFFFFFFF
+
+    def set_counter(self, index, value):
+        self.counter_values[index] = value
+        self.counter_offsets[index] = self.instret - value
+
+    def read_csr(self, number):
+        """
+        :return: The value of a CSR, the CSRs that are not modeled read as written.
+        """
+        counter = COUNTER_CSRS.get(number)
+        if counter is not None:
+            index, high = counter
+            value = self.counter(index)
+            return value >> 32 if high else value & MASK
+        return self.csrs.get(number, 0)
+
+    def write_csr(self, number, value):
+        """
+        Write a CSR. The writes to misa are ignored.
+        """
+        counter = COUNTER_CSRS.get(number)
+        if counter is not None:
+            index, high = counter
+            old = self.counter(index)
+            if high:
+                value = (value << 32) | (old & MASK)
+            else:
+                value = (old & ~MASK) | value
+            self.set_counter(index, value)
+        elif number == CSR_MCOUNTINHIBIT:
+            values = {index: self.counter(index) for index in self.counter_values}
+            self.csrs[number] = value
+            for index, counter_value in values.items():
+                self.set_counter(index, counter_value)
+        elif number != CSR_MISA:
+            self.csrs[number] = value
+
+    def trap(self, pc, cause, value):
+        """
+        Take an exception: the exceptions jump to the base address of mtvec, also in vectored
+        mode.
+
+        :return: The address of the trap handler.
+        """
+        mstatus = self.csrs.get(CSR_MSTATUS, 0)
+        mpie = MSTATUS_MPIE if mstatus & MSTATUS_MIE else 0
+        self.csrs[CSR_MSTATUS] = (
+            mstatus & ~(MSTATUS_MIE | MSTATUS_MPIE) | mpie | MSTATUS_MPP
+        )
+        self.csrs[CSR_MEPC] = pc
+        self.csrs[CSR_MCAUSE] = cause
+        self.csrs[CSR_MTVAL] = value
+        return self.csrs.get(CSR_MTVEC, 0) & ~0x3
+
+    def mret(self):
+        """
+        :return: The address where the trap returns.
+        """
+        mstatus = self.csrs.get(CSR_MSTATUS, 0)
+        mie = MSTATUS_MIE if mstatus & MSTATUS_MPIE else 0
+        self.csrs[CSR_MSTATUS] = mstatus & ~MSTATUS_MIE | mie | MSTATUS_MPIE
+        return self.csrs.get(CSR_MEPC, 0) & ~0x1
+
+    def wfi(self, next_pc):
+        """
+        :return: The address of the next instruction, if the app exited.
+        :raise UnsupportedError: otherwise, as the interrupts are not modeled.
+        """
+        if self.exit_value is None:
+            raise UnsupportedError(
+                "The wfi before the exit, the interrupts are not modeled"
+            )
+        return next_pc
+
+    def fence_i(self, next_pc):
+        """
+        :return: The address of the next instruction, the instructions are translated again.
+        """
+        self.blocks.clear()
+        return next_pc
+
+    def run(self, max_instructions=None, pc_trace=None):
+        """
+        Run until the app exits.
+
+        :param int max_instructions: If set, the simulation stops with an error after this number
+            of instructions.
+        :param pc_trace: If set, a text file where each executed instruction is written as a
+            line "<pc> <instr> 1", the format of the PC traces of util/profile/xheep_profile.
+            Only with the step engine.
+
+        :return: The exit value of the app.
+        :raise RuntimeError: when the maximum number of instructions is reached.
+        :raise UnsupportedError: when the app uses a part of X-HEEP that is not modeled.
+        """
+        blocks = self.blocks
+        limit = max_instructions if max_instructions is not None else float("inf")
+        pc = self.pc
+        try:
+            while self.exit_value is None:
+                block = blocks.get(pc)
+                if block is None:
+                    block = blocks[pc] = self.translate(pc)
+                if pc_trace is not None:
+                    pc_trace.write(f"{pc:08x} {block[2]:08x} {block[1]}\n")
+                pc = block[0]()
+                if self.exit_value is not None:
+                    # The block stopped after the store that made the app exit
+                    self.instret += self.exit_instructions
+                    break
+                self.instret += block[1]
+                if self.instret >= limit:
+                    raise RuntimeError(
+                        f"The app did not exit after {self.instret} instructions"
+                    )
+        finally:
+            self.pc = pc
+            self.flush_uart()
+        return self.exit_value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run an app on the instruction-set simulator of X-HEEP"
+    )
+    parser.add_argument("elf", nargs="?", help="ELF of the app (sw/build/main.elf).")
+    parser.add_argument(
+        "--memory-map",
+        help="Memory map written by --write-memory-map, instead of building the XHeep model of the configuration.",
+    )
+    parser.add_argument(
+        "--config",
+        default="configs/general.hjson",
+        help="General HJSON configuration of X-HEEP (default configs/general.hjson).",
+    )
+    parser.add_argument(
+        "--python_config",
+        default="",
+        help="General Python configuration of X-HEEP, replaces the HJSON configuration.",
+    )
+    parser.add_argument(
+        "--pads_cfg",
+        default="configs/pad_cfg.py",
+        help="Pads configuration of X-HEEP (default configs/pad_cfg.py).",
+    )
+    parser.add_argument(
+        "--write-memory-map",
+        help="Write the memory map of the configuration, to be given to --memory-map.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["block", "step"],
+        default="block",
+        help="Translate the basic blocks (default) or each instruction to Python functions.",
+    )
+    parser.add_argument(
+        "--max-instructions",
+        type=int,
+        help="Fail if the app did not exit after this number of instructions.",
+    )
+    parser.add_argument(
+        "--pc-trace",
+        help="Write the executed instructions as a PC trace (.txt or .txt.gz), to be profiled by util/profile/xheep_profile. Implies --engine step.",
+    )
+    args = parser.parse_args()
+
+    if args.elf is None and args.write_memory_map is None:
+        parser.error("the ELF of the app or --write-memory-map is needed")
+
+    try:
+        if args.memory_map:
+            with open(args.memory_map) as f:
+                memory_map = json.load(f)
+        else:
+            memory_map = load_memory_map(args.config, args.python_config, args.pads_cfg)
+    except (OSError, ValueError) as exc:
+        print(f"[ISS] Error: Cannot get the memory map: {exc}", flush=True)
+        return 1
+
+    if args.write_memory_map:
+        os.makedirs(os.path.dirname(args.write_memory_map) or ".", exist_ok=True)
+        with open(args.write_memory_map, "w") as f:
+            json.dump(memory_map, f, indent=2)
+        if args.elf is None:
+            return 0
+
+    iss = Iss(memory_map, "step" if args.pc_trace else args.engine)
+    try:
+        iss.load_elf(args.elf)
+    except (OSError, ValueError) as exc:
+        print(f"[ISS] Error: {exc}", flush=True)
+        return 1
+
+    pc_trace = None
+    if args.pc_trace:
+        if args.pc_trace.endswith(".gz"):
+            pc_trace = gzip.open(args.pc_trace, "wt")
+        else:
+            pc_trace = open(args.pc_trace, "w")
+        pc_trace.write("# pc instr cycles\n")
+
+    start = time.monotonic()
+    status = 1
+    try:
+        exit_value = iss.run(args.max_instructions, pc_trace)
+    except UnsupportedError as exc:
+        print(f"[ISS] Unsupported: {exc} (block at {iss.pc:#010x})", flush=True)
+        status = 2
+    except RuntimeError as exc:
+        print(f"[ISS] Error: {exc} (block at {iss.pc:#010x})", flush=True)
+    else:
+        print(FINISH_MESSAGE.format(exit_value))
+        status = 0 if exit_value == 0 else 1
+    finally:
+        if pc_trace is not None:
+            pc_trace.close()
+
+    elapsed = time.monotonic() - start
+    print(
+        f"[ISS] Executed {iss.instret} instructions in {elapsed:.2f} s "
+        f"({iss.instret / max(elapsed, 1e-9) / 1e6:.2f} MIPS)",
+        flush=True,
+    )
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+This script queries the results database written by test_apps.py. It lists the runs, shows the
+results of a run, and compares a run with a baseline run to find the apps whose simulated cycles
+or wall time grew. It also merges the results of the shards of a regression (test_apps.py
+--shard i/N), possibly imported from the databases of other machines, into the summary of
+test_apps.py.
+
+Examples:
+    python3 test/test_apps/query_results.py runs
+    python3 test/test_apps/query_results.py show -1
+    python3 test/test_apps/query_results.py compare --baseline main --run -1
+    python3 test/test_apps/query_results.py perf -1 --baseline cv32e40p
+    python3 test/test_apps/query_results.py import shard1.db shard2.db
+    python3 test/test_apps/query_results.py merge -2 -1
+"""
+
+import argparse
+import os
+import sys
+
+from bcolors import BColors
+from results_db import ResultsDB, RESULTS_DB
+from utils import (
+    filter_results,
+    print_performance,
+    print_results,
+    print_table,
+    print_table_summary,
+)
+
+
+def list_runs(db, args):
+    print_table(
+        ["id", "started", "label", "revision", "host", "wall time (s)"],
+        [
+            [
+                run["id"],
+                run["started"],
+                run["label"],
+                run["git_revision"],
+                run["host"],
+                run["wall_time"],
+            ]
+            for run in db.runs(args.limit)
+        ],
+    )
+    return 0
+
+
+def show_run(db, args):
+    run_id = db.find_run(args.run)
+    print(BColors.OKCYAN + f"Run {run_id}" + BColors.ENDC)
+    print_table(
+        ["app", "compiler", "result", "wall time (s)", "cached"],
+        [
+            [app, compiler, row["result"], row["wall_time"], bool(row["cached"])]
+            for (app, compiler), row in db.compilations(run_id).items()
+        ],
+    )
+    print()
+    print_table(
+        [
+            "app",
+            "simulator",
+            "result",
+            "cycles",
+            "exit value",
+            "wall time (s)",
+            "cached",
+        ],
+        [
+            [
+                app,
+                simulator,
+                row["result"],
+                row["cycles"],
+                row["exit_value"],
+                row["wall_time"],
+                bool(row["cached"]),
+            ]
+            for (app, simulator), row in db.simulations(run_id).items()
+        ],
+    )
+    return 0
+
+
+def compare_runs(db, args):
+    run_id = db.find_run(args.run)
+    baseline_id = db.find_run(args.baseline)
+    regressions = db.compare(
+        baseline_id,
+        run_id,
+        args.cycles_threshold / 100,
+        args.time_threshold / 100,
+        args.min_time,
+    )
+    if not regressions:
+        print(
+            BColors.OKGREEN
+            + f"No regression in run {run_id} with respect to run {baseline_id}."
+            + BColors.ENDC
+        )
+        return 0
+
+    print(
+        BColors.FAIL
+        + f"{len(regressions)} regression(s) in run {run_id} with respect to run {baseline_id}:"
+        + BColors.ENDC
+    )
+    rows = []
+    for app, tool, metric, baseline, value in regressions:
+        if metric == "result":
+            change = ""
+        else:
+            change = f"+{100 * (value - baseline) / baseline:.1f}%" if baseline else ""
+        rows.append([app, tool, metric, baseline, value, change])
+    print_table(["app", "tool", "metric", "baseline", "value", "change"], rows)
+    return 1
+
+
+def show_performance(db, args):
+    run_id = db.find_run(args.run)
+    baseline_id = db.find_run(args.baseline) if args.baseline else None
+    print(
+        BColors.OKCYAN
+        + f"Performance of run {run_id}"
+        + (f" with respect to run {baseline_id}" if baseline_id is not None else "")
+        + BColors.ENDC
+    )
+    print_performance(
+        db.performance(run_id),
+        db.performance(baseline_id) if baseline_id is not None else None,
+    )
+    return 0
+
+
+def import_runs(db, args):
+    for path in args.databases:
+        if not os.path.isfile(path):
+            raise ValueError(f"No results database {path}")
+        run_ids = db.import_runs(path)
+        print(
+            BColors.OKGREEN
+            + f"Imported {len(run_ids)} run(s) from {path}: {', '.join(map(str, run_ids))}."
+            + BColors.ENDC
+        )
+    return 0
+
+
+def merge_runs(db, args):
+    run_ids = [db.find_run(run) for run in args.runs]
+    app_list, skipped_apps = db.load_apps(run_ids)
+    (
+        skipped_apps,
+        ok_apps,
+        compilation_failed_apps,
+        simulation_failed_apps,
+        simulation_timed_out_apps,
+    ) = filter_results(app_list, [an_app.name for an_app in skipped_apps])
+
+    print_summary = print_table_summary if args.table else print_results
+    print_summary(
+        app_list,
+        skipped_apps,
+        ok_apps,
+        compilation_failed_apps,
+        simulation_failed_apps,
+        simulation_timed_out_apps,
+    )
+
+    # Exit with error if any app failed to compile or run, as test_apps.py
+    return int(len(compilation_failed_apps) > 0 or len(simulation_failed_apps) > 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the results of test_apps.py")
+    parser.add_argument(
+        "--db",
+        default=RESULTS_DB,
+        help=f"Path of the results database (default {RESULTS_DB}).",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    runs_parser = subparsers.add_parser("runs", help="List the recorded runs")
+    runs_parser.add_argument(
+        "--limit", type=int, default=20, help="Only list the last runs (default 20)."
+    )
+    runs_parser.set_defaults(func=list_runs)
+
+    run_help = "Run id, negative index (-1 is the last run) or label (last run with this label)."
+    show_parser = subparsers.add_parser("show", help="Show the results of a run")
+    show_parser.add_argument("run", nargs="?", default="-1", help=run_help)
+    show_parser.set_defaults(func=show_run)
+
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="Compare a run with a baseline run, exit with error if it regressed",
+    )
+    compare_parser.add_argument(
+        "--run", default="-1", help=run_help + " Default: the last run."
+    )
+    compare_parser.add_argument(
+        "--baseline", default="-2", help=run_help + " Default: the run before the last."
+    )
+    compare_parser.add_argument(
+        "--cycles-threshold",
+        type=float,
+        default=1.0,
+        help="Increase of the simulated cycles, in percent, above which a simulation regressed (default 1).",
+    )
+    compare_parser.add_argument(
+        "--time-threshold",
+        type=float,
+        default=20.0,
+        help="Increase of the wall time, in percent, above which a compilation or simulation regressed (default 20).",
+    )
+    compare_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        help="Minimum increase of the wall time, in seconds, for a regression (default 1).",
+    )
+    compare_parser.set_defaults(func=compare_runs)
+
+    perf_parser = subparsers.add_parser(
+        "perf",
+        help="Show the simulated cycles, performance counters and CPI of the apps of a run",
+    )
+    perf_parser.add_argument("run", nargs="?", default="-1", help=run_help)
+    perf_parser.add_argument(
+        "--baseline", help=run_help + " If set, the changes are also shown."
+    )
+    perf_parser.set_defaults(func=show_performance)
+
+    import_parser = subparsers.add_parser(
+        "import", help="Copy the runs of other databases, e.g. of the shards"
+    )
+    import_parser.add_argument("databases", nargs="+", help="Databases to import.")
+    import_parser.set_defaults(func=import_runs)
+
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Print the summary of test_apps.py for the apps of several runs, e.g. the shards of a regression, exit with error if any app failed",
+    )
+    merge_parser.add_argument("runs", nargs="+", help=run_help)
+    merge_parser.add_argument(
+        "--table", action="store_true", help="Print the summary of the table format"
+    )
+    merge_parser.set_defaults(func=merge_runs)
+
+    args = parser.parse_args()
+
+    # Runs can be imported in a new database
+    if args.func is not import_runs and not os.path.isfile(args.db):
+        print(BColors.FAIL + f"Error: No results database {args.db}." + BColors.ENDC)
+        return 1
+
+    with ResultsDB(args.db) as db:
+        try:
+            return args.func(db, args)
+        except ValueError as exc:
+            print(BColors.FAIL + f"Error: {exc}" + BColors.ENDC)
+            return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
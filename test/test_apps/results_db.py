@@ -0,0 +1,445 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import collections
+import datetime
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+
+from application import Application
+from simulator import SimResult
+
+# Default database of the results of test_apps
+RESULTS_DB = "build/test_apps_results.db"
+
+# Tables holding the results of the runs, copied by ResultsDB.import_runs
+RESULT_TABLES = ["apps", "compilations", "simulations", "counters"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started TEXT NOT NULL,
+    label TEXT,
+    git_revision TEXT,
+    host TEXT,
+    command TEXT,
+    wall_time REAL
+);
+CREATE TABLE IF NOT EXISTS apps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    app TEXT NOT NULL,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, app)
+);
+CREATE TABLE IF NOT EXISTS compilations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    app TEXT NOT NULL,
+    compiler TEXT NOT NULL,
+    result TEXT NOT NULL,
+    wall_time REAL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, app, compiler)
+);
+CREATE TABLE IF NOT EXISTS simulations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    app TEXT NOT NULL,
+    simulator TEXT NOT NULL,
+    result TEXT NOT NULL,
+    wall_time REAL,
+    cycles INTEGER,
+    exit_value INTEGER,
+    cached INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, app, simulator)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    app TEXT NOT NULL,
+    simulator TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (run_id, app, simulator, name)
+);
+"""
+
+
+def git_revision(root="."):
+    """
+    :return: The git revision of the repository, with a "-dirty" suffix if it has uncommitted
+        changes, or None if it cannot be found.
+    """
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=root,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compilation_result(success):
+    """
+    :return: The result of a compilation as stored in the database.
+    """
+    if success is None:
+        return SimResult.SKIPPED
+    return SimResult.PASSED if success else SimResult.FAILED
+
+
+def grew(baseline, value, threshold, min_increase=0):
+    """
+    :return: True if value is larger than baseline by more than threshold (a fraction of
+        baseline) and by more than min_increase.
+    """
+    if baseline is None or value is None:
+        return False
+    return value - baseline > max(baseline * threshold, min_increase)
+
+
+class ResultsDB:
+    """
+    SQLite database of the results of test_apps. Each run of test_apps is stored with the result,
+    the wall time and, for the simulations, the number of simulated cycles and the exit value of
+    every (app, compiler) and (app, simulator), so that two runs can be compared.
+    """
+
+    def __init__(self, path=RESULTS_DB):
+        """
+        Constructor for ResultsDB. The database is created if it does not exist.
+
+        :param str path: The path of the database.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # Several test_apps runs may share the database, wait for each other's transactions
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_run(
+        self, app_list, wall_time, label=None, command=None, skipped_apps=()
+    ):
+        """
+        Store the results of a run of test_apps.
+
+        :param list app_list: The tested applications.
+        :param float wall_time: The duration of the whole run in seconds.
+        :param str label: A name for the run, e.g. the branch or the configuration tested.
+        :param str command: The command of the run.
+        :param list skipped_apps: The applications of app_list that were skipped.
+
+        :return: The id of the run.
+        """
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (started, label, git_revision, host, command, wall_time)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                    label,
+                    git_revision(),
+                    socket.gethostname(),
+                    command,
+                    wall_time,
+                ),
+            ).lastrowid
+            for an_app in app_list:
+                self.connection.execute(
+                    "INSERT INTO apps VALUES (?, ?, ?)",
+                    (run_id, an_app.name, int(an_app in skipped_apps)),
+                )
+                for compiler, success in an_app.compilation_success.items():
+                    stats = an_app.compilation_stats.get(compiler, {})
+                    self.connection.execute(
+                        "INSERT INTO compilations VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            run_id,
+                            an_app.name,
+                            compiler,
+                            compilation_result(success),
+                            stats.get("wall_time"),
+                            int(stats.get("cached", False)),
+                        ),
+                    )
+                for simulator, result in an_app.simulation_results.items():
+                    stats = an_app.simulation_stats.get(simulator, {})
+                    self.connection.execute(
+                        "INSERT INTO simulations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            run_id,
+                            an_app.name,
+                            simulator,
+                            result,
+                            stats.get("wall_time"),
+                            stats.get("cycles"),
+                            stats.get("exit_value"),
+                            int(stats.get("cached", False)),
+                        ),
+                    )
+                    for name, value in stats.get("counters", {}).items():
+                        self.connection.execute(
+                            "INSERT INTO counters VALUES (?, ?, ?, ?, ?)",
+                            (run_id, an_app.name, simulator, name, value),
+                        )
+        return run_id
+
+    def runs(self, limit=None):
+        """
+        :param int limit: If set, only the last limit runs are returned.
+
+        :return: The runs, from the oldest to the newest.
+        """
+        rows = self.connection.execute(
+            "SELECT * FROM runs ORDER BY id DESC LIMIT ?",
+            (limit if limit else -1,),
+        ).fetchall()
+        return rows[::-1]
+
+    def find_run(self, ref=None):
+        """
+        Find a run from a reference given on the command line.
+
+        :param str ref: The id of the run, a negative index (-1 is the last run, -2 the one
+            before...), or a label (the last run with this label). None is the last run.
+
+        :return: The id of the run.
+        :raise ValueError: when no run matches the reference.
+        """
+        if ref is None:
+            ref = "-1"
+        try:
+            index = int(ref)
+        except ValueError:
+            row = self.connection.execute(
+                "SELECT id FROM runs WHERE label = ? ORDER BY id DESC LIMIT 1", (ref,)
+            ).fetchone()
+        else:
+            if index < 0:
+                row = self.connection.execute(
+                    "SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?",
+                    (-index - 1,),
+                ).fetchone()
+            else:
+                row = self.connection.execute(
+                    "SELECT id FROM runs WHERE id = ?", (index,)
+                ).fetchone()
+        if row is None:
+            raise ValueError(f"No run {ref} in {self.path}")
+        return row["id"]
+
+    def import_runs(self, path):
+        """
+        Copy all the runs of another database, e.g. the database of a shard run on another
+        machine. The runs get new ids.
+
+        :param str path: The path of the other database.
+
+        :return: The ids of the imported runs, in the order of the other database.
+        """
+        self.connection.execute("ATTACH DATABASE ? AS other", (path,))
+        try:
+            run_ids = []
+            with self.connection:
+                for run in self.connection.execute(
+                    "SELECT * FROM other.runs ORDER BY id"
+                ).fetchall():
+                    run_id = self.connection.execute(
+                        "INSERT INTO runs (started, label, git_revision, host, command, wall_time)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            run["started"],
+                            run["label"],
+                            run["git_revision"],
+                            run["host"],
+                            run["command"],
+                            run["wall_time"],
+                        ),
+                    ).lastrowid
+                    for table in RESULT_TABLES:
+                        columns = [
+                            row["name"]
+                            for row in self.connection.execute(
+                                f"PRAGMA main.table_info({table})"
+                            )
+                            if row["name"] != "run_id"
+                        ]
+                        self.connection.execute(
+                            f"INSERT INTO main.{table} (run_id, {', '.join(columns)})"
+                            f" SELECT ?, {', '.join(columns)} FROM other.{table}"
+                            " WHERE run_id = ?",
+                            (run_id, run["id"]),
+                        )
+                    run_ids.append(run_id)
+        finally:
+            self.connection.execute("DETACH DATABASE other")
+        return run_ids
+
+    def load_apps(self, run_ids):
+        """
+        Rebuild the applications tested by one or several runs, e.g. the shards of a regression,
+        with their compilation and simulation results.
+
+        :param list run_ids: The ids of the runs.
+
+        :return: The applications sorted by name, and the skipped ones.
+        :raise ValueError: when an application was tested by several of the runs.
+        """
+        apps = {}
+        skipped_apps = []
+        for run_id in run_ids:
+            for row in self.connection.execute(
+                "SELECT * FROM apps WHERE run_id = ?", (run_id,)
+            ):
+                if row["app"] in apps:
+                    raise ValueError(f"{row['app']} was tested by several of the runs")
+                an_app = Application(row["app"])
+                apps[an_app.name] = an_app
+                if row["skipped"]:
+                    skipped_apps.append(an_app)
+            for (app, compiler), row in self.compilations(run_id).items():
+                apps[app].set_compilation_status(
+                    compiler,
+                    (
+                        None
+                        if row["result"] == SimResult.SKIPPED
+                        else row["result"] == SimResult.PASSED
+                    ),
+                )
+            for (app, simulator), row in self.simulations(run_id).items():
+                apps[app].add_simulation_result(simulator, row["result"])
+        return [apps[name] for name in sorted(apps)], skipped_apps
+
+    def durations(self, history=5):
+        """
+        :param int history: The number of last runs of each compilation or simulation considered.
+
+        :return: The median wall time of the last compilations or simulations of each (app,
+            compiler or simulator), leaving out the results reused from the cache.
+        """
+        samples = collections.defaultdict(list)
+        for table, tool in (("compilations", "compiler"), ("simulations", "simulator")):
+            for row in self.connection.execute(
+                f"SELECT app, {tool} AS tool, wall_time FROM {table}"
+                " WHERE NOT cached AND wall_time IS NOT NULL ORDER BY run_id DESC"
+            ):
+                key = (row["app"], row["tool"])
+                if len(samples[key]) < history:
+                    samples[key].append(row["wall_time"])
+        return {key: statistics.median(values) for key, values in samples.items()}
+
+    def compilations(self, run_id):
+        """
+        :return: The compilations of a run, indexed by (app, compiler).
+        """
+        rows = self.connection.execute(
+            "SELECT * FROM compilations WHERE run_id = ? ORDER BY app, compiler",
+            (run_id,),
+        )
+        return {(row["app"], row["compiler"]): row for row in rows}
+
+    def simulations(self, run_id):
+        """
+        :return: The simulations of a run, indexed by (app, simulator).
+        """
+        rows = self.connection.execute(
+            "SELECT * FROM simulations WHERE run_id = ? ORDER BY app, simulator",
+            (run_id,),
+        )
+        return {(row["app"], row["simulator"]): row for row in rows}
+
+    def performance(self, run_id):
+        """
+        :return: The performance of the simulations of a run that passed, indexed by (app,
+            simulator): a dict with the number of simulated cycles ("cycles") and the performance
+            counters dumped by the program (e.g. "mcycle" and "minstret"), as
+            Application.simulation_stats.
+        """
+        performance = {
+            key: {"cycles": row["cycles"], "counters": {}}
+            for key, row in self.simulations(run_id).items()
+            if row["result"] == SimResult.PASSED
+        }
+        for row in self.connection.execute(
+            "SELECT * FROM counters WHERE run_id = ?", (run_id,)
+        ):
+            key = (row["app"], row["simulator"])
+            if key in performance:
+                performance[key]["counters"][row["name"]] = row["value"]
+        return performance
+
+    def compare(
+        self, baseline_id, run_id, cycles_threshold, time_threshold, min_time=0
+    ):
+        """
+        Find the regressions of a run with respect to a baseline run: the compilations and
+        simulations that passed in the baseline and no longer pass, the simulations whose number
+        of cycles or performance counters (e.g. mcycle) grew, and the compilations and
+        simulations whose wall time grew. The wall times of the results reused from the cache are
+        not compared.
+
+        :param int baseline_id: The id of the baseline run.
+        :param int run_id: The id of the compared run.
+        :param float cycles_threshold: The relative increase of the number of cycles or of a
+            performance counter above which a simulation regressed (e.g. 0.01 for 1%).
+        :param float time_threshold: The relative increase of the wall time above which a
+            compilation or a simulation regressed.
+        :param float min_time: The minimum increase of the wall time, in seconds, for a
+            regression, so that the noise on short compilations and simulations is ignored.
+
+        :return: The list of regressions, as (app, compiler or simulator, metric, baseline
+            value, value) tuples.
+        """
+        regressions = []
+        # Metrics of each table compared with cycles_threshold
+        for table, metrics in (
+            (self.compilations, ()),
+            (self.simulations, ("cycles",)),
+        ):
+            baseline = table(baseline_id)
+            for key, row in table(run_id).items():
+                base = baseline.get(key)
+                if base is None or base["result"] == SimResult.SKIPPED:
+                    continue
+                if base["result"] == SimResult.PASSED and row["result"] not in (
+                    SimResult.PASSED,
+                    SimResult.SKIPPED,
+                ):
+                    regressions.append((*key, "result", base["result"], row["result"]))
+                    continue
+                for metric in metrics:
+                    if grew(base[metric], row[metric], cycles_threshold):
+                        regressions.append((*key, metric, base[metric], row[metric]))
+                if (
+                    not base["cached"]
+                    and not row["cached"]
+                    and grew(
+                        base["wall_time"], row["wall_time"], time_threshold, min_time
+                    )
+                ):
+                    regressions.append(
+                        (*key, "wall_time", base["wall_time"], row["wall_time"])
+                    )
+
+        baseline = self.performance(baseline_id)
+        for key, performance in self.performance(run_id).items():
+            base_counters = baseline.get(key, {}).get("counters", {})
+            for name, value in sorted(performance["counters"].items()):
+                if grew(base_counters.get(name), value, cycles_threshold):
+                    regressions.append((*key, name, base_counters[name], value))
+        return regressions
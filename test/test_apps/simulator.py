@@ -2,11 +2,52 @@
 # Licensed under the Apache License, Version 2.0, see LICENSE for details.
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
+import codecs
+import collections
+import contextlib
+import glob
+import os
+import queue
+import signal
 import subprocess
 import re
+import shlex
+import sys
+import threading
+import time
 
 from bcolors import BColors
 
+# Line printed by the runtime when the app is compiled with -DPERF_COUNTERS, see _exit in
+# sw/device/lib/runtime/syscalls.c, e.g. "[PERF] mcycle=1234 minstret=1000"
+PERF_COUNTERS_PATTERN = re.compile(r"\[PERF\]((?: \w+=\d+)+)")
+
+# Instruction-set simulator, and the memory map of the X-HEEP configuration written by
+# "make iss-build"
+ISS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iss.py")
+ISS_MEMORY_MAP = "build/iss/memory_map.json"
+
+
+def make_sim_args(environ=None):
+    """
+    Get the simulation parameters that "make <simulator>-run" passes to the model, so that the
+    simulations running the model directly (in parallel or in simulation workers) get the same
+    ones as the serial simulations.
+
+    :param dict environ: The environment, os.environ if None.
+
+    :return: The parameters of the SIM_ARGS variable, and +max_sim_time if MAX_SIM_TIME is set,
+        as composed by the Makefile.
+    """
+    environ = os.environ if environ is None else environ
+    sim_args = shlex.split(environ.get("SIM_ARGS", ""))
+    max_sim_time = environ.get("MAX_SIM_TIME")
+    # Already in SIM_ARGS when the tests are run through make, which exports it
+    if max_sim_time and not any(arg.startswith("+max_sim_time=") for arg in sim_args):
+        sim_args.append(f"+max_sim_time={max_sim_time}")
+    return sim_args
+
 
 class SimResult:
     """
@@ -19,12 +60,396 @@ class SimResult:
     SKIPPED = "Skipped"
 
 
+class OutputMonitor:
+    """
+    Watches the output of a simulation line by line, as it is printed. The simulation is over as
+    soon as the finish pattern or one of the failure patterns is found. Only the last lines are
+    kept, to report a failure, so the memory used does not depend on the length of the output.
+    """
+
+    def __init__(
+        self,
+        finish_pattern,
+        failure_patterns=(),
+        cycles_pattern=None,
+        history=200,
+        max_line_length=4096,
+        unsupported_pattern=None,
+    ):
+        """
+        Constructor for OutputMonitor.
+
+        :param str finish_pattern: The pattern printed when the program finishes, with a group
+            capturing the return value of the program.
+        :param list failure_patterns: Patterns indicating that the simulation failed.
+        :param str cycles_pattern: If set, the pattern printed with the number of simulated clock
+            cycles, captured by its first group.
+        :param int history: The number of last lines kept.
+        :param int max_line_length: Lines longer than this are truncated.
+        :param str unsupported_pattern: If set, the pattern printed when the simulator cannot run
+            the program (e.g. the instruction-set simulator when the program uses a peripheral
+            that it does not model).
+        """
+        self.finish_pattern = re.compile(finish_pattern)
+        self.failure_patterns = [re.compile(pattern) for pattern in failure_patterns]
+        self.cycles_pattern = re.compile(cycles_pattern) if cycles_pattern else None
+        self.unsupported_pattern = (
+            re.compile(unsupported_pattern) if unsupported_pattern else None
+        )
+        self.unsupported_match = None
+        self.cycles = None
+        self.counters = {}
+        self.lines = collections.deque(maxlen=history)
+        self.max_line_length = max_line_length
+        self.partial_line = ""
+        self.finish_match = None
+        self.failure_match = None
+
+    def feed(self, text):
+        """
+        Process a chunk of the output, which may end in the middle of a line.
+
+        :param str text: The chunk of output.
+
+        :return: True if the simulation is over.
+        """
+        lines = (self.partial_line + text).split("\n")
+        self.partial_line = lines.pop()[: self.max_line_length]
+        for line in lines:
+            self.feed_line(line)
+        return self.done()
+
+    def flush(self):
+        """
+        Process the last line of the output if it does not end with a newline.
+        """
+        if self.partial_line:
+            self.feed_line(self.partial_line)
+            self.partial_line = ""
+
+    def feed_line(self, line):
+        """
+        Process a line of the output.
+
+        :param str line: The line.
+
+        :return: True if the simulation failed.
+        """
+        line = line.rstrip("\r\n")[: self.max_line_length]
+        self.lines.append(line)
+        if self.failure_match is None:
+            for pattern in self.failure_patterns:
+                self.failure_match = pattern.search(line)
+                if self.failure_match is not None:
+                    break
+        if self.finish_match is None:
+            self.finish_match = self.finish_pattern.search(line)
+        if self.unsupported_match is None and self.unsupported_pattern is not None:
+            self.unsupported_match = self.unsupported_pattern.search(line)
+        if self.cycles_pattern is not None:
+            cycles_match = self.cycles_pattern.search(line)
+            if cycles_match is not None:
+                self.cycles = int(cycles_match.group(1))
+        if "[PERF]" in line:
+            counters_match = PERF_COUNTERS_PATTERN.search(line)
+            if counters_match is not None:
+                for counter in counters_match.group(1).split():
+                    name, value = counter.split("=")
+                    self.counters[name] = int(value)
+        return self.failure_match is not None
+
+    def done(self):
+        """
+        :return: True if the program finished, the simulation failed or the simulator cannot run
+            the program.
+        """
+        return (
+            self.finish_match is not None
+            or self.failure_match is not None
+            or self.unsupported_match is not None
+        )
+
+    def passed(self):
+        """
+        :return: True if the program finished with the return value 0 and no failure pattern
+            was found.
+        """
+        return (
+            self.failure_match is None
+            and self.finish_match is not None
+            and self.finish_match.group(1) == "0"
+        )
+
+    def exit_value(self):
+        """
+        :return: The value returned by the program, None if it did not finish.
+        """
+        if self.finish_match is None:
+            return None
+        try:
+            return int(self.finish_match.group(1))
+        except ValueError:
+            return None
+
+    def report(self):
+        """
+        :return: The last lines of the output.
+        """
+        return "\n".join(self.lines)
+
+
+async def monitor_process(command, monitor, timeout, cwd=None, exit_timeout=10):
+    """
+    Run a command and feed its output (stdout and stderr) to a monitor as it is printed. The
+    command and all its children (e.g. the model started by make) are killed as soon as the
+    monitor finds a failure, or if they do not exit within exit_timeout seconds after the monitor
+    finds the finish pattern.
+
+    :param list command: The command.
+    :param OutputMonitor monitor: The monitor of the output.
+    :param int timeout: The timeout for the command in seconds.
+    :param str cwd: The folder where the command is run.
+    :param int exit_timeout: The time left to the command to exit once the program finished.
+
+    :raise asyncio.TimeoutError: when the command times out before the program finishes.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        cwd=cwd,
+        start_new_session=True,
+    )
+    try:
+        while monitor.failure_match is None:
+            if monitor.finish_match is not None:
+                deadline = min(deadline, loop.time() + exit_timeout)
+            try:
+                chunk = await asyncio.wait_for(
+                    process.stdout.read(65536), max(deadline - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                if monitor.finish_match is not None:
+                    break
+                raise
+            if not chunk:
+                break
+            monitor.feed(decoder.decode(chunk))
+        monitor.feed(decoder.decode(b"", final=True))
+        monitor.flush()
+    finally:
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        await process.wait()
+
+
+class SimulationWorker:
+    """
+    A simulation model kept running in server mode (+server=1), so that several firmwares are
+    simulated without starting the model again. Each firmware path is sent to the model through
+    its standard input; the model resets X-HEEP, runs the firmware, and streams back its output,
+    including the UART output, until it is ready for the next firmware.
+    """
+
+    # Printed by the model when it waits for the next firmware, see tb/tb_top.cpp
+    READY_MESSAGE = "[TESTBENCH]: Waiting for firmware"
+
+    def __init__(self, model, work_dir, sim_args=()):
+        """
+        Constructor for SimulationWorker. The model is only started by the first run.
+
+        :param str model: The path of the simulation model executable.
+        :param str work_dir: The folder where the model is run. The model writes its outputs
+            (e.g. the waveform) there, so each worker needs its own folder.
+        :param list sim_args: Additional plusargs passed to the model.
+        """
+        self.model = model
+        self.work_dir = work_dir
+        self.sim_args = list(sim_args)
+        self.process = None
+        self.lines = None
+
+    def start(self, timeout):
+        """
+        Start the model and wait until it is ready to receive a firmware.
+
+        :param int timeout: The timeout for the start of the model in seconds.
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.process = subprocess.Popen(
+            [self.model, "+server=1", "+UARTDPI_LOG_uart0=-", *self.sim_args],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.work_dir,
+            text=True,
+            bufsize=1,
+        )
+        # The output is read by a thread so that waiting for it can time out
+        self.lines = queue.Queue()
+        threading.Thread(
+            target=SimulationWorker._read_lines,
+            args=(self.process, self.lines),
+            daemon=True,
+        ).start()
+        self._read_until_ready(timeout)
+
+    @staticmethod
+    def _read_lines(process, lines):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def _read_until_ready(self, timeout, on_line=None):
+        deadline = time.monotonic() + timeout
+        # The output is only kept when it is not monitored line by line
+        output = []
+        while True:
+            try:
+                line = self.lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise subprocess.TimeoutExpired(self.model, timeout, "".join(output))
+            if line is None:
+                raise RuntimeError(
+                    f"The simulation model {self.model} exited unexpectedly.\n"
+                    + "".join(output)
+                )
+            if line.rstrip("\n") == SimulationWorker.READY_MESSAGE:
+                return "".join(output)
+            if on_line is None:
+                output.append(line)
+            elif on_line(line):
+                # Stopped early, the state of the model is unknown
+                self.stop(kill=True)
+                return ""
+
+    def run(self, firmware, timeout, on_line=None):
+        """
+        Simulate a firmware, starting the model first if it is not running. If the simulation
+        times out or the model exits, the model is stopped and will be started again by the next
+        run.
+
+        :param str firmware: The absolute path of the firmware hex file.
+        :param int timeout: The timeout for the simulation in seconds.
+        :param on_line: If set, called with each line of the output as soon as it is printed,
+            instead of returning the output. If it returns True, the simulation is stopped early
+            and the model is stopped.
+
+        :return: The output of the simulation, empty if on_line is set.
+        :raise subprocess.TimeoutExpired: when the simulation times out.
+        :raise RuntimeError: when the model exits during the simulation.
+        """
+        try:
+            if self.process is None:
+                self.start(timeout)
+            self.process.stdin.write(firmware + "\n")
+            self.process.stdin.flush()
+            return self._read_until_ready(timeout, on_line)
+        except (subprocess.TimeoutExpired, RuntimeError, OSError):
+            self.stop(kill=True)
+            raise
+
+    def stop(self, kill=False):
+        """
+        Stop the model.
+
+        :param bool kill: If True, the model is killed instead of being asked to quit.
+        """
+        if self.process is None:
+            return
+        try:
+            if not kill:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=60)
+        except (OSError, subprocess.TimeoutExpired):
+            kill = True
+        if kill:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+class SimulationWorkerPool:
+    """
+    A fixed set of simulation workers sharing the same model. Each simulation takes an idle
+    worker, and waits for one if they are all busy.
+    """
+
+    def __init__(self, model, work_dir, size, sim_args=()):
+        """
+        Constructor for SimulationWorkerPool.
+
+        :param str model: The path of the simulation model executable.
+        :param str work_dir: The folder of the workers, each one runs in work_dir/<index>.
+        :param int size: The number of workers.
+        :param list sim_args: Additional plusargs passed to the model.
+        """
+        self.workers = [
+            SimulationWorker(model, os.path.join(work_dir, str(index)), sim_args)
+            for index in range(size)
+        ]
+        self.idle = queue.Queue()
+        for worker in self.workers:
+            self.idle.put(worker)
+
+    @contextlib.contextmanager
+    def worker(self):
+        """
+        Take an idle worker, and give it back at the end of the with block.
+        """
+        worker = self.idle.get()
+        try:
+            yield worker
+        finally:
+            self.idle.put(worker)
+
+    def close(self):
+        """
+        Stop all the workers.
+        """
+        for worker in self.workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 class Simulator:
     """
     Represents a simulator.
     """
 
-    def __init__(self, name: str, error_pattern: str):
+    # Path of the simulation model executable built by FuseSoC, relative to the FuseSoC build
+    # folder. Only needed to run several simulations in parallel.
+    MODEL_BINARIES = {
+        "verilator": "sim-verilator/Vtestharness",
+    }
+
+    # Simulators whose model can save and restore the state of X-HEEP after the boot in a
+    # checkpoint (see the +checkpoint simulation parameter), with the make parameters building
+    # such a model
+    CHECKPOINT_BUILD_PARAMS = {
+        "verilator": ["VERILATOR_SAVABLE=1"],
+    }
+
+    def __init__(
+        self,
+        name: str,
+        error_pattern: str,
+        failure_patterns=(),
+        cycles_pattern: str = None,
+        unsupported_pattern: str = None,
+    ):
         """
         Constructor for Simulator.
 
@@ -32,9 +457,22 @@ class Simulator:
         :param str error_pattern: The pattern to look for in the output of the simulator. This
             pattern should contain a group that captures the return value of the program. For
             example, "Program Finished with value (\d+)".
+        :param list failure_patterns: Patterns that make a simulation fail as soon as they are
+            found in its output. For example, "%Error".
+        :param str cycles_pattern: The pattern printed with the number of simulated clock cycles,
+            captured by its first group. For example, "finished after (\d+) clock cycles".
+        :param str unsupported_pattern: The pattern printed when the simulator cannot run an app,
+            whose simulation is then skipped. For example, "^\[ISS\] Unsupported: ".
         """
         self.name = name
         self.error_pattern = error_pattern
+        self.failure_patterns = list(failure_patterns)
+        self.cycles_pattern = cycles_pattern
+        self.unsupported_pattern = unsupported_pattern
+        # Additional plusargs passed to the model, as by make <simulator>-run
+        self.sim_args = make_sim_args()
+        # Additional parameters of make <simulator>-build
+        self.build_params = []
 
     def build(self, dry_run=False, verbose=True):
         """
@@ -49,15 +487,15 @@ class Simulator:
         if dry_run:
             if verbose:
                 print(
-                    BColors.OKCYAN + f"[DRY RUN] make {self.name}-build" + BColors.ENDC,
+                    BColors.OKCYAN
+                    + f"[DRY RUN] {' '.join(self.build_command())}"
+                    + BColors.ENDC,
                     flush=True,
                 )
             return
 
         try:
-            _ = subprocess.run(
-                ["make", f"{self.name}-build"], capture_output=True, check=True
-            )
+            _ = subprocess.run(self.build_command(), capture_output=True, check=True)
         except subprocess.CalledProcessError as exc:
             print(BColors.FAIL + f"Error building {self.name} model." + BColors.ENDC)
             print(str(exc.stderr.decode("utf-8")), flush=True)
@@ -70,7 +508,109 @@ class Simulator:
                 flush=True,
             )
 
-    def run_app(self, an_app, simulation_timeout, dry_run=False, verbose=True):
+    def build_command(self):
+        """
+        :return: The command building the simulator model.
+        """
+        return ["make", f"{self.name}-build", *self.build_params]
+
+    def model_path(self):
+        """
+        Get the simulation model executable built by FuseSoC.
+
+        :return: The absolute path of the model, or None if it is not built or not supported.
+        """
+        binary = Simulator.MODEL_BINARIES.get(self.name)
+        if binary is None:
+            return None
+        models = sorted(
+            glob.glob(
+                os.path.join(
+                    "build", "openhwgroup.org_systems_core-v-mini-mcu_*", binary
+                )
+            )
+        )
+        return os.path.abspath(models[0]) if models else None
+
+    def model_files(self):
+        """
+        :return: The files of the model on which the results of the simulations depend, e.g. to
+            invalidate the cached results.
+        """
+        model = self.model_path()
+        return [model] if model is not None else []
+
+    def enable_checkpoints(self):
+        """
+        Build a model that can save and restore checkpoints, to be used with use_checkpoint once
+        it is built.
+
+        :return: False if the simulator does not support the checkpoints.
+        """
+        if self.name not in Simulator.CHECKPOINT_BUILD_PARAMS:
+            return False
+        self.build_params += Simulator.CHECKPOINT_BUILD_PARAMS[self.name]
+        return True
+
+    def boot_sel(self):
+        """
+        :return: The boot mode of the simulations, given by the last +boot_sel of the simulation
+            parameters ("0" by default).
+        """
+        for arg in reversed(self.sim_args):
+            if arg.startswith("+boot_sel="):
+                return arg[len("+boot_sel=") :]
+        return "0"
+
+    def use_checkpoint(self, checkpoint):
+        """
+        Restore X-HEEP after the reset and the boot from a checkpoint in every simulation, instead
+        of simulating them. The first simulation saves the checkpoint if it does not exist.
+
+        :param str checkpoint: The absolute path of the checkpoint, which must only be used with
+            the current model.
+        """
+        self.sim_args.append(f"+checkpoint={checkpoint}")
+
+    def firmware_command(self, firmware):
+        """
+        :param str firmware: The absolute path of the firmware hex file.
+
+        :return: The command running the model directly on the firmware.
+        """
+        return [
+            self.model_path() or Simulator.MODEL_BINARIES[self.name],
+            f"+firmware={firmware}",
+            *self.sim_args,
+        ]
+
+    def create_worker_pool(self, size, work_dir):
+        """
+        Create a pool of simulation workers keeping the model running between simulations.
+
+        :param int size: The number of workers.
+        :param str work_dir: The folder where the workers are run.
+
+        :return: The SimulationWorkerPool.
+        """
+        return SimulationWorkerPool(
+            self.model_path() or Simulator.MODEL_BINARIES[self.name],
+            os.path.abspath(work_dir),
+            size,
+            self.sim_args,
+        )
+
+    def run_app(
+        self,
+        an_app,
+        simulation_timeout,
+        dry_run=False,
+        verbose=True,
+        firmware=None,
+        work_dir=None,
+        worker_pool=None,
+        cache=None,
+    ):
         """
         Runs an_app with the simulator. Checks if it times out. Outputs if it finishes with errors or
         without.
@@ -79,6 +619,16 @@ class Simulator:
         :param int simulation_timeout: The timeout for the simulation in seconds.
         :param bool dry_run: If True, only print the simulation command without executing it.
         :param bool verbose: If True, print detailed messages about the simulation process.
+        :param str firmware: The absolute path of the firmware hex file. If None, the simulation is
+            launched with "make <simulator>-run" on sw/build/main.hex. Otherwise, the shared model
+            is run directly on this firmware.
+        :param str work_dir: The folder where the model is run when firmware is set. The model
+            writes its outputs (waveform, UART log) there, so each simulation running in parallel
+            needs its own folder.
+        :param SimulationWorkerPool worker_pool: If set with firmware, the firmware is simulated by
+            a worker of the pool, which keeps the model running, instead of starting the model.
+        :param BuildCache cache: If set, the result of a previous simulation of the same firmware
+            with the same model is reused, and the result of this simulation is stored.
 
         :return: SimResult for the simulation of an_app.
         """
@@ -90,49 +640,156 @@ class Simulator:
                 flush=True,
             )
 
+        if firmware is None:
+            run_command = ["make", f"{self.name}-run"]
+            if self.sim_args:
+                run_command.append(f"SIM_ARGS={' '.join(self.sim_args)}")
+        elif worker_pool is None:
+            run_command = self.firmware_command(firmware)
+        else:
+            run_command = None
+
         if dry_run:
             if verbose:
                 print(
-                    BColors.OKCYAN + f"[DRY RUN] make {self.name}-run" + BColors.ENDC,
+                    BColors.OKCYAN
+                    + (
+                        f"[DRY RUN] {' '.join(run_command)}"
+                        if run_command is not None
+                        else f"[DRY RUN] send {firmware} to a {self.name} simulation worker"
+                    )
+                    + BColors.ENDC,
                     flush=True,
                 )
             return SimResult.PASSED
 
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.simulation_key(
+                self, firmware or os.path.abspath("sw/build/main.hex")
+            )
+            cached = cache.load_simulation(cache_key) if cache_key else None
+            if cached is not None:
+                result, report, stats = cached
+                an_app.set_simulation_stats(self.name, cached=True, **stats)
+                self._report(an_app, result, report, verbose, " (cached)")
+                return result
+
+        if work_dir is not None and run_command is not None:
+            os.makedirs(work_dir, exist_ok=True)
+
+        monitor = OutputMonitor(
+            self.error_pattern,
+            self.failure_patterns,
+            self.cycles_pattern,
+            unsupported_pattern=self.unsupported_pattern,
+        )
+        start_time = time.monotonic()
         try:
-            run_output = subprocess.run(
-                ["make", f"{self.name}-run"],
-                capture_output=True,
-                timeout=simulation_timeout,
-                check=False,
+            if run_command is None:
+                with worker_pool.worker() as worker:
+                    worker.run(firmware, simulation_timeout, monitor.feed_line)
+            else:
+                asyncio.run(
+                    monitor_process(run_command, monitor, simulation_timeout, work_dir)
+                )
+        except RuntimeError as exc:
+            # The simulation worker exited, the simulation failed
+            monitor.feed_line(str(exc))
+        except (subprocess.TimeoutExpired, asyncio.TimeoutError):
+            an_app.set_simulation_stats(
+                self.name,
+                time.monotonic() - start_time,
+                monitor.cycles,
+                counters=monitor.counters,
             )
-        except subprocess.TimeoutExpired:
+            self._report(an_app, SimResult.TIMED_OUT, "", verbose)
+            return SimResult.TIMED_OUT
+
+        stats = {
+            "wall_time": time.monotonic() - start_time,
+            "cycles": monitor.cycles,
+            "exit_value": monitor.exit_value(),
+            "counters": monitor.counters,
+        }
+        an_app.set_simulation_stats(self.name, **stats)
+        if monitor.failure_match is None and monitor.unsupported_match is not None:
+            result = SimResult.SKIPPED
+            report = monitor.unsupported_match.string
+        else:
+            result = SimResult.PASSED if monitor.passed() else SimResult.FAILED
+            report = monitor.report() if result == SimResult.FAILED else ""
+        if cache_key is not None:
+            cache.store_simulation(cache_key, result, report, stats)
+        self._report(an_app, result, report, verbose)
+        return result
+
+    def _report(self, an_app, result, report, verbose, suffix=""):
+        """
+        Print the result of the simulation of an_app.
+        """
+        if result == SimResult.TIMED_OUT:
             print(
                 BColors.FAIL
                 + f"Simulation of {an_app.name} with {self.name} timed out."
                 + BColors.ENDC,
                 flush=True,
             )
-            return SimResult.TIMED_OUT
-        else:
-            match = re.search(
-                self.error_pattern, str(run_output.stdout.decode("utf-8"))
-            )
-            if match and match.group(1) == "0":
-                if verbose:
-                    print(
-                        BColors.OKGREEN
-                        + f"Ran {an_app.name} with {self.name} successfully."
-                        + BColors.ENDC,
-                        flush=True,
-                    )
-                return SimResult.PASSED
-            else:
+        elif result == SimResult.SKIPPED:
+            if verbose:
                 print(
-                    BColors.FAIL
-                    + f"Simulation of {an_app.name} with {self.name} failed."
-                    + BColors.ENDC
+                    BColors.WARNING
+                    + f"Skipped running {an_app.name} with {self.name}{suffix}: {report}"
+                    + BColors.ENDC,
+                    flush=True,
                 )
+        elif result == SimResult.PASSED:
+            if verbose:
                 print(
-                    BColors.FAIL + str(run_output.stdout.decode("utf-8")) + BColors.ENDC
+                    BColors.OKGREEN
+                    + f"Ran {an_app.name} with {self.name} successfully{suffix}."
+                    + BColors.ENDC,
+                    flush=True,
                 )
-                return SimResult.FAILED
+        else:
+            print(
+                BColors.FAIL
+                + f"Simulation of {an_app.name} with {self.name} failed{suffix}."
+                + BColors.ENDC
+            )
+            print(BColors.FAIL + report + BColors.ENDC)
+
+
+class IssSimulator(Simulator):
+    """
+    The instruction-set simulator of test/test_apps/iss.py. It runs the ELF of an app in seconds,
+    with the memory map of the X-HEEP configuration written by "make iss-build", and skips the
+    apps that use a part of X-HEEP that it does not model.
+    """
+
+    def model_path(self):
+        """
+        :return: The absolute path of the memory map written by "make iss-build", or None if it
+            is not written.
+        """
+        if not os.path.isfile(ISS_MEMORY_MAP):
+            return None
+        return os.path.abspath(ISS_MEMORY_MAP)
+
+    def model_files(self):
+        return [ISS_SCRIPT] + super().model_files()
+
+    def firmware_command(self, firmware):
+        """
+        :param str firmware: The absolute path of the firmware hex file, the ELF next to it is
+            simulated.
+
+        :return: The command running the instruction-set simulator on the firmware.
+        """
+        return [
+            sys.executable,
+            ISS_SCRIPT,
+            "--memory-map",
+            self.model_path() or ISS_MEMORY_MAP,
+            os.path.splitext(firmware)[0] + ".elf",
+        ]
@@ -10,18 +10,28 @@ FUTURE WORK:
 """
 
 import argparse
+import heapq
+import itertools
 import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from simulator import Simulator, SimResult
+from simulator import IssSimulator, Simulator, SimResult
+from build_cache import BuildCache, CACHE_DIR, CHECKPOINT_DIR, checkpoint_path
+from results_db import ResultsDB, RESULTS_DB
 from bcolors import BColors
 from utils import (
     in_list,
+    parse_shard,
     get_apps,
     filter_results,
     print_results,
     print_table_header,
     print_table_row,
     print_table_summary,
+    print_performance,
 )
 
 # Default available compilers
@@ -29,18 +39,53 @@ COMPILERS = ["gcc", "clang"]
 COMPILER_PATH = [os.environ.get("RISCV_XHEEP") for _ in COMPILERS]
 COMPILER_PREFIXES = ["riscv32-unknown-" for _ in COMPILERS]
 
-# Available simulators
+# Default simulators, the available ones are "iss" (the instruction-set simulator of iss.py)
+# and "verilator"
 SIMULATORS = ["verilator"]
 
+# Simulators screening the apps, run before the others: an app that fails with one of them is
+# not run with the others (e.g. with --simulators iss,verilator, only the apps that pass on the
+# instruction-set simulator are simulated with verilator)
+SCREENING_SIMULATORS = ["iss"]
+
+# Simulators that are not run by the Simulator class
+SIMULATOR_CLASSES = {
+    "iss": IssSimulator,
+}
+
 # Pattern to look for when simulating an app to see if the app finished
 # correctly or not
 ERROR_PATTERN_DICT = {
+    "iss": r"Program Finished with value (\d+)",
     "verilator": r"Program Finished with value (\d+)",
 }
 
+# Patterns that make a simulation fail as soon as they appear in its output,
+# e.g. the errors and failed assertions reported by verilator
+FAILURE_PATTERN_DICT = {
+    "iss": [r"^\[ISS\] Error: "],
+    "verilator": [r"^%(Error|Fatal)"],
+}
+
+# Pattern printed with the number of simulated clock cycles, recorded in the results database.
+# The instruction-set simulator counts one cycle per instruction.
+CYCLES_PATTERN_DICT = {
+    "iss": r"\[ISS\] Executed (\d+) instructions",
+    "verilator": r"Simulation finished after (\d+) clock cycles",
+}
+
+# Pattern printed when the simulator cannot run an app, which is then skipped, e.g. when the
+# instruction-set simulator does not model a peripheral used by the app
+UNSUPPORTED_PATTERN_DICT = {
+    "iss": r"^\[ISS\] Unsupported: ",
+}
+
 # Timeout for the simulation in seconds
 SIM_TIMEOUT_S = 180
 
+# Folder where each (app, compiler) is built when the apps are tested in parallel
+PARALLEL_BUILD_DIR = "build/test_apps"
+
 # Whitelist of apps. Has priority over the blacklist.
 # Useful if you only want to test certain apps
 WHITELIST = []
@@ -66,6 +111,231 @@ CLANG_BLACKLIST = []
 VERILATOR_BLACKLIST = []
 
 
+def skip_simulation(an_app, simulator, verbose):
+    """
+    Check if an_app must not be run with simulator, because it is in the verilator blacklist or
+    it failed with a screening simulator. The skipped simulation is recorded.
+
+    :param Application an_app: The app.
+    :param Simulator simulator: The simulator.
+    :param bool verbose: If True, print a message when the simulation is skipped.
+
+    :return: True if the simulation is skipped.
+    """
+    # Only run the app with verilator if it is not in the verilator_blacklist
+    if simulator.name == "verilator" and in_list(an_app.name, VERILATOR_BLACKLIST):
+        reason = ""
+    else:
+        failed = [
+            name
+            for name in SCREENING_SIMULATORS
+            if name != simulator.name
+            and an_app.simulation_results.get(name) == SimResult.FAILED
+        ]
+        if not failed:
+            return False
+        reason = f", it failed with {failed[0]}"
+    an_app.add_simulation_result(simulator.name, SimResult.SKIPPED)
+    if verbose:
+        print(
+            BColors.WARNING
+            + f"Skipping running {an_app.name} with {simulator.name}{reason}..."
+            + BColors.ENDC,
+            flush=True,
+        )
+    return True
+
+
+def run_apps_parallel(
+    app_list,
+    compilers,
+    compiler_paths,
+    compiler_prefixes,
+    simulators,
+    jobs,
+    build_dir,
+    compile_only,
+    dry_run,
+    verbose,
+    print_row=None,
+    worker_pools=None,
+    cache=None,
+    durations=None,
+    extra_parameters=None,
+):
+    """
+    Compiles and runs the apps on a pool of workers. Each (app, compiler) is built in its own
+    folder, build_dir/<app>/<compiler>, and each simulation runs the shared simulation model in
+    build_dir/<app>/<simulator>. As in the sequential mode, the app is simulated with the firmware
+    of the last compiler, once every compilation of the app succeeded, and with the screening
+    simulators before the others.
+
+    The ready compilations and simulations are started longest first, according to their
+    expected durations: a compilation is expected to last its own duration plus the duration of
+    the longest simulation of the app that follows it. Without durations, the jobs are started
+    in the order of app_list.
+
+    :param list app_list: The list of all the apps.
+    :param list compilers: The compilers to test.
+    :param list compiler_paths: The path of each compiler.
+    :param list compiler_prefixes: The prefix of each compiler.
+    :param list simulators: The simulators used to run the apps.
+    :param int jobs: The number of workers, 0 to use one per available CPU.
+    :param str build_dir: The folder where the apps are built and run.
+    :param bool compile_only: If True, the apps are only compiled.
+    :param bool dry_run: If True, only print the commands without executing them.
+    :param bool verbose: If True, print detailed messages about the compilations and simulations.
+    :param print_row: If set, called with each app once its results are complete, in the order of
+        app_list.
+    :param dict worker_pools: If set, maps the name of a simulator to the SimulationWorkerPool that
+        runs its simulations, instead of starting the model for each simulation.
+    :param BuildCache cache: If set, the firmwares and the simulation results are reused from
+        this cache when nothing they depend on changed.
+    :param dict durations: The expected duration in seconds of the jobs, indexed by (app,
+        compiler) and (app, simulator), e.g. from the results database. A job without a known
+        duration is expected to last the average known duration.
+    :param str extra_parameters: Extra parameters passed to "make app".
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    build_dir = os.path.abspath(build_dir)
+
+    apps = []
+    for an_app in app_list:
+        if in_list(an_app.name, BLACKLIST):
+            if verbose:
+                print(
+                    BColors.WARNING + f"Skipping {an_app.name}..." + BColors.ENDC,
+                    flush=True,
+                )
+        else:
+            apps.append(an_app)
+
+    durations = durations or {}
+    default_duration = sum(durations.values()) / len(durations) if durations else 0.0
+
+    def expected_duration(an_app, tool):
+        return durations.get((an_app.name, tool), default_duration)
+
+    # Number of compilations or simulations not finished yet for each app
+    pending = {an_app.name: 0 for an_app in apps}
+    # Maps each running future to its app and the compiler or simulator it runs
+    futures = {}
+    # Simulators of each app waiting for the screening simulations of the app
+    deferred = {}
+    # Jobs ready to run, as a heap of (-expected duration, order, function, arguments, job)
+    ready = []
+    order = itertools.count()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+
+        def schedule(duration, function, args, job):
+            heapq.heappush(ready, (-duration, next(order), function, args, job))
+            pending[job[0].name] += 1
+
+        def start_ready_jobs():
+            # At most one job per worker is given to the executor, so that the longest ready job
+            # is always the next one to start
+            while ready and len(futures) < jobs:
+                _, _, function, args, job = heapq.heappop(ready)
+                futures[executor.submit(function, *args)] = job
+
+        def submit_simulations(an_app, app_simulators):
+            if compile_only or not an_app.compilation_succeeded():
+                return
+            firmware = os.path.join(build_dir, an_app.name, compilers[-1], "main.hex")
+            screening = [
+                sim for sim in app_simulators if sim.name in SCREENING_SIMULATORS
+            ]
+            if screening and len(screening) < len(app_simulators):
+                deferred[an_app.name] = [
+                    sim for sim in app_simulators if sim not in screening
+                ]
+                app_simulators = screening
+            for simulator in app_simulators:
+                if not skip_simulation(an_app, simulator, verbose):
+                    schedule(
+                        expected_duration(an_app, simulator.name),
+                        simulator.run_app,
+                        (
+                            an_app,
+                            SIM_TIMEOUT_S,
+                            dry_run,
+                            verbose,
+                            firmware,
+                            os.path.join(build_dir, an_app.name, simulator.name),
+                            (worker_pools or {}).get(simulator.name),
+                            cache,
+                        ),
+                        (an_app, None, simulator.name),
+                    )
+
+        for an_app in apps:
+            simulation_duration = (
+                0.0
+                if compile_only
+                else max(
+                    (expected_duration(an_app, sim.name) for sim in simulators),
+                    default=0.0,
+                )
+            )
+            for compiler_path, compiler_prefix, compiler in zip(
+                compiler_paths, compiler_prefixes, compilers
+            ):
+                if in_list(an_app.name, CLANG_BLACKLIST) and compiler == "clang":
+                    if verbose:
+                        print(
+                            BColors.WARNING
+                            + f"Skipping compiling {an_app.name} with {compiler}..."
+                            + BColors.ENDC,
+                            flush=True,
+                        )
+                    an_app.set_compilation_status(compiler, None)  # Mark as skipped
+                else:
+                    schedule(
+                        expected_duration(an_app, compiler) + simulation_duration,
+                        an_app.compile,
+                        (
+                            compiler_path,
+                            compiler_prefix,
+                            compiler,
+                            "on_chip",
+                            extra_parameters,
+                            dry_run,
+                            verbose,
+                            os.path.join(build_dir, an_app.name, compiler),
+                            cache,
+                        ),
+                        (an_app, compiler, None),
+                    )
+            if pending[an_app.name] == 0:
+                submit_simulations(an_app, simulators)
+
+        # The results are recorded by this thread only, as the jobs complete
+        next_row = 0
+        while True:
+            while next_row < len(apps) and pending[apps[next_row].name] == 0:
+                if print_row is not None:
+                    print_row(apps[next_row])
+                next_row += 1
+            start_ready_jobs()
+            if not futures:
+                break
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                an_app, compiler, simulator_name = futures.pop(future)
+                pending[an_app.name] -= 1
+                if compiler is not None:
+                    an_app.set_compilation_status(compiler, future.result())
+                    if pending[an_app.name] == 0:
+                        submit_simulations(an_app, simulators)
+                else:
+                    an_app.add_simulation_result(simulator_name, future.result())
+                    if pending[an_app.name] == 0 and an_app.name in deferred:
+                        submit_simulations(an_app, deferred.pop(an_app.name))
+
+
 def main():
     """
     Compiles and runs all the apps in X-HEEP.
@@ -73,7 +343,9 @@ def main():
     If the --compile-only flag is set, it only compiles the apps.
     The script outputs the results of the tests.
     It exits with error if any app failed to compile or run.
+    The results are recorded in a database, see query_results.py.
     """
+    start_time = time.monotonic()
     parser = argparse.ArgumentParser(description="Test script")
     parser.add_argument(
         "--compile-only", action="store_true", help="Only compile the applications"
@@ -90,6 +362,11 @@ def main():
         "--compilers",
         help="Override default list of compilers to test.",
     )
+    parser.add_argument(
+        "--simulators",
+        "--simulator",
+        help=f"Override default list of simulators ({','.join(SIMULATORS)}), comma-separated. The instruction-set simulator (iss) runs the apps in seconds, and the apps that fail with it are not simulated with the other simulators, e.g. --simulators iss,verilator. It skips the apps using the peripherals that it does not model.",
+    )
     parser.add_argument(
         "--compiler-paths",
         help="Override default compiler paths. Can be a single path (shared among all the compilers) or a comma-separated list (a different path for each compiler).",
@@ -98,8 +375,94 @@ def main():
         "--compiler-prefixes",
         help="Override default compiler prefixes. Can be a single prefix (shared among all the compilers) or a comma-separated list (a different prefix for each compiler).",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of apps compiled or simulated in parallel, 0 to use all available CPUs (default 1). With more than one job, each (app, compiler) is built in its own folder and the simulation model is shared.",
+    )
+    parser.add_argument(
+        "--build-dir",
+        default=PARALLEL_BUILD_DIR,
+        help=f"Folder where the apps are built and run when testing in parallel (default {PARALLEL_BUILD_DIR}).",
+    )
+    parser.add_argument(
+        "--sim-workers",
+        type=int,
+        default=0,
+        help="Number of simulation models kept running in server mode, to which the apps are dispatched instead of starting the model for each app (default 0: one model process per app). With --jobs, at most --jobs simulations run at once.",
+    )
+    parser.add_argument(
+        "--failure-pattern",
+        action="append",
+        default=[],
+        help="Regular expression that makes a simulation fail, and stop, as soon as a line of its output matches it. Can be given multiple times.",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse the firmwares and the simulation results of previous runs when the app sources, the shared software, the toolchain, the parameters and the simulation model did not change (see --cache-dir).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help=f"Folder of the cache used with --cache (default {CACHE_DIR}).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Build the verilator model with VERILATOR_SAVABLE=1 and restore X-HEEP after the reset and the boot from a checkpoint of the model in each simulation, instead of simulating them (see --checkpoint-dir). The first simulation saves the checkpoint.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=CHECKPOINT_DIR,
+        help=f"Folder of the checkpoints used with --checkpoint, named after the hash of the model (default {CHECKPOINT_DIR}).",
+    )
+    parser.add_argument(
+        "--results-db",
+        default=RESULTS_DB,
+        help=f"SQLite database where the results, wall times and simulated cycles of the run are recorded, to be compared with other runs by query_results.py (default {RESULTS_DB}). An empty string disables it.",
+    )
+    parser.add_argument(
+        "--run-label",
+        help="Label of the run in the results database, e.g. the branch or the configuration tested.",
+    )
+    parser.add_argument(
+        "--perf-counters",
+        action="store_true",
+        help="Compile the apps with -DPERF_COUNTERS, so that the runtime counts the cycles (mcycle) and retired instructions (minstret) of each app and prints them at exit, and print the performance of the apps. The counters are recorded in the results database.",
+    )
+    parser.add_argument(
+        "--perf-baseline",
+        help="Run of the results database (id, negative index or label) to which the performance of the apps is compared with --perf-counters, e.g. the same apps on another CPU.",
+    )
+    parser.add_argument(
+        "--shard",
+        help="Only test the i-th of N disjoint shards of the apps, given as i/N (1 <= i <= N), e.g. to split the regression across machines. The shards only depend on the names of the apps. The results of the shards can be merged with query_results.py merge.",
+    )
     args = parser.parse_args()
 
+    if args.jobs < 0:
+        parser.error(
+            "--jobs must be a positive integer, or 0 to use all available CPUs"
+        )
+    if args.sim_workers < 0:
+        parser.error("--sim-workers must be a positive integer")
+    if args.perf_baseline and not args.results_db:
+        parser.error("--perf-baseline needs the results database, see --results-db")
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
+    for pattern in args.failure_pattern:
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            parser.error(f"Invalid --failure-pattern {pattern!r}: {exc}")
+
     # Override the default list of compilers if specified
     compilers = COMPILERS
     if args.compilers:
@@ -141,11 +504,31 @@ def main():
             )
             exit(1)
 
+    # Extra parameters of make app
+    extra_parameters = "COMPILER_FLAGS=-DPERF_COUNTERS" if args.perf_counters else None
+
     # Get a list with all the applications we want to test
-    app_list = get_apps("sw/applications", WHITELIST, BLACKLIST)
+    app_list = get_apps("sw/applications", WHITELIST, BLACKLIST, shard)
+    if not any(not in_list(an_app.name, BLACKLIST) for an_app in app_list):
+        print(
+            BColors.WARNING
+            + "No apps to test"
+            + (" in this shard" if shard is not None else "")
+            + "."
+            + BColors.ENDC,
+            flush=True,
+        )
+
+    # Override the default list of simulators if specified, the screening simulators run first
+    simulator_names = SIMULATORS
+    if args.simulators:
+        simulator_names = args.simulators.split(",")
+    simulator_names = sorted(
+        simulator_names, key=lambda name: name not in SCREENING_SIMULATORS
+    )
 
     simulators = []
-    for simulator_name in SIMULATORS:
+    for simulator_name in simulator_names:
         error_pattern = ERROR_PATTERN_DICT.get(simulator_name)
         if error_pattern is None:
             print(
@@ -154,11 +537,76 @@ def main():
                 + BColors.ENDC
             )
             exit(1)
-        simulators.append(Simulator(simulator_name, error_pattern))
+        simulators.append(
+            SIMULATOR_CLASSES.get(simulator_name, Simulator)(
+                simulator_name,
+                error_pattern,
+                FAILURE_PATTERN_DICT.get(simulator_name, []) + args.failure_pattern,
+                CYCLES_PATTERN_DICT.get(simulator_name),
+                UNSUPPORTED_PATTERN_DICT.get(simulator_name),
+            )
+        )
 
+    # The models run directly (in parallel or as simulation workers) get the parameters of
+    # SIM_ARGS, but the FuseSoC parameters are only applied by make <simulator>-run
+    if (
+        (args.jobs != 1 or args.sim_workers)
+        and not args.compile_only
+        and os.environ.get("FUSESOC_PARAM", "").strip()
+        and any(simulator.name in Simulator.MODEL_BINARIES for simulator in simulators)
+    ):
+        print(
+            BColors.FAIL
+            + "Error: FUSESOC_PARAM is not applied to the models run in parallel or as simulation workers, run the tests with --jobs 1 and without --sim-workers to use it."
+            + BColors.ENDC
+        )
+        exit(1)
+
+    checkpoint_simulators = []
     if not args.compile_only:
         for simulator in simulators:
+            if args.checkpoint and simulator.enable_checkpoints():
+                checkpoint_simulators.append(simulator)
             simulator.build(args.dry_run, verbose=not args.table)
+            if (
+                (args.jobs != 1 or args.sim_workers)
+                and not args.dry_run
+                and simulator.model_path() is None
+            ):
+                print(
+                    BColors.FAIL
+                    + f"Error: The {simulator.name} model cannot be run in parallel or as a simulation worker, its executable was not found."
+                    + BColors.ENDC
+                )
+                exit(1)
+
+    # The checkpoints only depend on the model and the boot mode, they are reused by the next runs
+    if not args.dry_run:
+        for simulator in checkpoint_simulators:
+            model = simulator.model_path()
+            if model is not None:
+                simulator.use_checkpoint(
+                    checkpoint_path(
+                        args.checkpoint_dir,
+                        simulator.name,
+                        model,
+                        simulator.boot_sel(),
+                    )
+                )
+
+    cache = BuildCache(args.cache_dir) if args.cache else None
+
+    # Simulation workers keeping each model running between the apps
+    worker_pools = {}
+    if args.sim_workers and not args.compile_only:
+        # The instruction-set simulator is started for each app, it has no server mode
+        for simulator in simulators:
+            if simulator.name not in Simulator.MODEL_BINARIES:
+                continue
+            worker_pools[simulator.name] = simulator.create_worker_pool(
+                args.sim_workers,
+                os.path.join(args.build_dir, "sim_workers", simulator.name),
+            )
 
     if args.table:
         max_app_name_len, max_col_width = print_table_header(
@@ -170,74 +618,116 @@ def main():
             simulators,
         )
 
-    # Compile every app and run with the simulators
-    for an_app in app_list:
-        # If the app is in the blacklist, print a message and skip it
-        if in_list(an_app.name, BLACKLIST):
-            if not args.table:
-                print(
-                    BColors.WARNING + f"Skipping {an_app.name}..." + BColors.ENDC,
-                    flush=True,
-                )
-        else:
-            # Compile the app with every compiler, leaving gcc for last
-            #   so the simulation is done with gcc
-            for compiler_path, compiler_prefix, compiler in zip(
-                compiler_paths, compiler_prefixes, compilers
-            ):
-                if in_list(an_app.name, CLANG_BLACKLIST) and compiler == "clang":
-                    if not args.table:
-                        print(
-                            BColors.WARNING
-                            + f"Skipping compiling {an_app.name} with {compiler}..."
-                            + BColors.ENDC,
-                            flush=True,
-                        )
-                    an_app.set_compilation_status(compiler, None)  # Mark as skipped
-                else:
-                    compilation_result = an_app.compile(
-                        compiler_path,
-                        compiler_prefix,
-                        compiler,
-                        "on_chip",
-                        None,
-                        args.dry_run,
-                        verbose=not args.table,
+    if args.jobs != 1:
+        # The durations of the previous runs are used to start the longest jobs first
+        durations = {}
+        if args.results_db and os.path.isfile(args.results_db):
+            with ResultsDB(args.results_db) as results_db:
+                durations = results_db.durations()
+
+        # Compile and run the apps in parallel, the table rows are printed in the order of app_list
+        def print_row(an_app):
+            print_table_row(
+                an_app,
+                max_app_name_len,
+                max_col_width,
+                compilers,
+                args.dry_run,
+                args.compile_only,
+                simulators,
+            )
+
+        run_apps_parallel(
+            app_list,
+            compilers,
+            compiler_paths,
+            compiler_prefixes,
+            simulators,
+            args.jobs,
+            args.build_dir,
+            args.compile_only,
+            args.dry_run,
+            not args.table,
+            print_row if args.table else None,
+            worker_pools,
+            cache,
+            durations,
+            extra_parameters,
+        )
+    else:
+        # Compile every app and run with the simulators
+        for an_app in app_list:
+            # If the app is in the blacklist, print a message and skip it
+            if in_list(an_app.name, BLACKLIST):
+                if not args.table:
+                    print(
+                        BColors.WARNING + f"Skipping {an_app.name}..." + BColors.ENDC,
+                        flush=True,
                     )
-                    an_app.set_compilation_status(compiler, compilation_result)
-
-            # Run the app with every simulator if the compilation was successful
-            if not args.compile_only and an_app.compilation_succeeded():
-                for simulator in simulators:
-                    # Only run the app with verilator if it is not in the verilator_blacklist
-                    if simulator.name == "verilator" and in_list(
-                        an_app.name, VERILATOR_BLACKLIST
-                    ):
-                        an_app.add_simulation_result(simulator.name, SimResult.SKIPPED)
+            else:
+                # Compile the app with every compiler, leaving gcc for last
+                #   so the simulation is done with gcc
+                for compiler_path, compiler_prefix, compiler in zip(
+                    compiler_paths, compiler_prefixes, compilers
+                ):
+                    if in_list(an_app.name, CLANG_BLACKLIST) and compiler == "clang":
                         if not args.table:
                             print(
                                 BColors.WARNING
-                                + f"Skipping running {an_app.name} with verilator..."
+                                + f"Skipping compiling {an_app.name} with {compiler}..."
                                 + BColors.ENDC,
                                 flush=True,
                             )
+                        an_app.set_compilation_status(compiler, None)  # Mark as skipped
                     else:
-                        simulation_result = simulator.run_app(
-                            an_app, SIM_TIMEOUT_S, args.dry_run, verbose=not args.table
+                        compilation_result = an_app.compile(
+                            compiler_path,
+                            compiler_prefix,
+                            compiler,
+                            "on_chip",
+                            extra_parameters,
+                            args.dry_run,
+                            verbose=not args.table,
+                            cache=cache,
                         )
-                        an_app.add_simulation_result(simulator.name, simulation_result)
-
-            # Print table row if table mode is enabled
-            if args.table:
-                print_table_row(
-                    an_app,
-                    max_app_name_len,
-                    max_col_width,
-                    compilers,
-                    args.dry_run,
-                    args.compile_only,
-                    simulators,
-                )
+                        an_app.set_compilation_status(compiler, compilation_result)
+
+                # Run the app with every simulator if the compilation was successful
+                if not args.compile_only and an_app.compilation_succeeded():
+                    for simulator in simulators:
+                        if not skip_simulation(an_app, simulator, not args.table):
+                            worker_pool = worker_pools.get(simulator.name)
+                            simulation_result = simulator.run_app(
+                                an_app,
+                                SIM_TIMEOUT_S,
+                                args.dry_run,
+                                verbose=not args.table,
+                                firmware=(
+                                    os.path.abspath("sw/build/main.hex")
+                                    if worker_pool is not None
+                                    else None
+                                ),
+                                worker_pool=worker_pool,
+                                cache=cache,
+                            )
+                            an_app.add_simulation_result(
+                                simulator.name, simulation_result
+                            )
+
+                # Print table row if table mode is enabled
+                if args.table:
+                    print_table_row(
+                        an_app,
+                        max_app_name_len,
+                        max_col_width,
+                        compilers,
+                        args.dry_run,
+                        args.compile_only,
+                        simulators,
+                    )
+
+    for worker_pool in worker_pools.values():
+        worker_pool.close()
 
     # Filter and print the results
     (
@@ -267,6 +757,41 @@ def main():
             simulation_timed_out_apps,
         )
 
+    baseline_performance = None
+    if args.results_db and not args.dry_run:
+        with ResultsDB(args.results_db) as results_db:
+            # The baseline is found before this run is recorded, so -1 is the previous run
+            if args.perf_baseline:
+                try:
+                    baseline_performance = results_db.performance(
+                        results_db.find_run(args.perf_baseline)
+                    )
+                except ValueError as exc:
+                    print(BColors.WARNING + f"Warning: {exc}" + BColors.ENDC)
+            run_id = results_db.record_run(
+                app_list,
+                time.monotonic() - start_time,
+                args.run_label,
+                " ".join(sys.argv),
+                skipped_apps,
+            )
+        print(
+            BColors.OKCYAN
+            + f"Results recorded as run {run_id} in {args.results_db}."
+            + BColors.ENDC
+        )
+
+    if args.perf_counters and not args.compile_only and not args.dry_run:
+        print(BColors.BOLD + "Performance:" + BColors.ENDC)
+        print_performance(
+            {
+                (an_app.name, simulator): stats
+                for an_app in ok_apps
+                for simulator, stats in an_app.simulation_stats.items()
+            },
+            baseline_performance,
+        )
+
     # Exit with error if any app failed to compile or run
     if len(compilation_failed_apps) > 0 or len(simulation_failed_apps) > 0:
         exit(1)
@@ -18,25 +18,55 @@ def in_list(name, item_list):
     return any(word in name for word in item_list)
 
 
-def get_apps(apps_dir: str, whitelist: list, blacklist: list):
+def parse_shard(shard: str):
     """
-    Get all apps from apps_dir. If the whitelist contains any elements,
+    Parse a shard given as "i/N" on the command line.
+
+    :param str shard: The shard, i being between 1 and N.
+
+    :return: The tuple (i, N).
+    :raise ValueError: when the shard is not valid.
+    """
+    try:
+        index, count = (int(value) for value in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {shard!r}, expected i/N")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {shard!r}, expected 1 <= i <= N")
+    return index, count
+
+
+def get_apps(apps_dir: str, whitelist: list, blacklist: list, shard: tuple = None):
+    """
+    Get all apps from apps_dir, sorted by name. If the whitelist contains any elements,
     it only obtains those apps. Skips the blacklist apps.
 
     :param str apps_dir: The directory where the apps are located.
     :param list whitelist: The list of apps to test. If empty, all apps are tested.
     :param list blacklist: The list of apps to skip. Has lower priority than the whitelist.
+    :param tuple shard: If set, (i, N) to only get the i-th of N disjoint shards of the apps.
+        The apps are dealt to the shards in the order of their names, so the shards only depend
+        on the names of the apps and every machine computes the same ones.
 
     :return: A list of Application objects corresponding to the apps to test.
     """
-    if not whitelist:
-        app_list = [Application(app) for app in os.listdir(apps_dir)]
-    else:
-        app_list = [
-            Application(app) for app in os.listdir(apps_dir) if in_list(app, whitelist)
-        ]
-
-    print(BColors.OKCYAN + "Apps to test from " + apps_dir + ":" + BColors.ENDC)
+    app_names = sorted(os.listdir(apps_dir))
+    if whitelist:
+        app_names = [app for app in app_names if in_list(app, whitelist)]
+    if shard is not None:
+        index, count = shard
+        app_names = app_names[index - 1 :: count]
+    app_list = [Application(app) for app in app_names]
+
+    shard_str = f" (shard {shard[0]}/{shard[1]})" if shard is not None else ""
+    print(
+        BColors.OKCYAN
+        + "Apps to test from "
+        + apps_dir
+        + shard_str
+        + ":"
+        + BColors.ENDC
+    )
     for app in app_list:
         if not in_list(app.name, blacklist):
             print(BColors.OKCYAN + f"    - {app.name}" + BColors.ENDC)
@@ -194,8 +224,10 @@ def print_table_header(
         the compiler/simulator result columns.
     """
     # Calculate column widths
+    # The list is empty when every app of the shard is blacklisted, or the shard has no app
     max_app_name_len = max(
-        len(app.name) for app in app_list if not in_list(app.name, app_blacklist)
+        (len(app.name) for app in app_list if not in_list(app.name, app_blacklist)),
+        default=0,
     )
     max_app_name_len = max(max_app_name_len, len("Application"))
 
@@ -325,3 +357,78 @@ def print_table_summary(
         print(
             BColors.FAIL + f"Timed out: {len(simulation_timed_out_apps)}" + BColors.ENDC
         )
+
+
+def format_value(value):
+    """
+    :return: The value as printed in the tables.
+    """
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def print_table(header, rows):
+    """
+    Print rows in aligned columns.
+    """
+    rows = [[format_value(value) for value in row] for row in rows]
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header, *rows]:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def cycles_per_instruction(counters):
+    """
+    :return: The cycles per instruction of the program, from its mcycle and minstret counters,
+        or None if they were not dumped.
+    """
+    if not counters.get("minstret") or "mcycle" not in counters:
+        return None
+    return counters["mcycle"] / counters["minstret"]
+
+
+def print_performance(performance: dict, baseline: dict = None):
+    """
+    Print the performance of the simulations: the number of simulated cycles, the mcycle and
+    minstret counters dumped by the program (compiled with -DPERF_COUNTERS) and its CPI, and
+    their changes with respect to a baseline.
+
+    :param dict performance: The simulations, indexed by (app, simulator), with the number of
+        simulated cycles ("cycles") and the performance counters ("counters") of each one, as in
+        Application.simulation_stats.
+    :param dict baseline: The simulations of the baseline, in the same format.
+    """
+
+    def change(value, base):
+        if value is None or not base:
+            return None
+        return f"{100 * (value - base) / base:+.1f}%"
+
+    header = ["app", "simulator", "cycles", "mcycle", "minstret", "CPI"]
+    if baseline is not None:
+        header += ["cycles change", "mcycle change", "CPI change"]
+    rows = []
+    for (app, simulator), stats in sorted(performance.items()):
+        counters = stats.get("counters", {})
+        cpi = cycles_per_instruction(counters)
+        row = [
+            app,
+            simulator,
+            stats.get("cycles"),
+            counters.get("mcycle"),
+            counters.get("minstret"),
+            None if cpi is None else f"{cpi:.3f}",
+        ]
+        if baseline is not None:
+            base = baseline.get((app, simulator), {})
+            base_counters = base.get("counters", {})
+            row += [
+                change(stats.get("cycles"), base.get("cycles")),
+                change(counters.get("mcycle"), base_counters.get("mcycle")),
+                change(cpi, cycles_per_instruction(base_counters)),
+            ]
+        rows.append(row)
+    print_table(header, rows)
@@ -0,0 +1,103 @@
+import sys
+import pathlib
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+from unittest import mock
+
+# Adds "x-heep/util" to the python path (to import mcu_gen, and also x_heep_gen (needed by mcu_gen))
+directory = pathlib.Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(directory.joinpath("util")))
+
+import mcu_gen
+from x_heep_gen.peripherals.abstractions import PeripheralDomain
+from x_heep_gen.peripherals.user_peripherals import GPIO
+from x_heep_gen.peripherals.user_peripherals_domain import UserPeripheralDomain
+
+x_heep_cfg = "configs/general.hjson"
+pads_cfg = "configs/pad_cfg.py"
+templates = [
+    "hw/core-v-mini-mcu/include/core_v_mini_mcu_pkg.sv.tpl",
+    "sw/device/lib/runtime/core_v_mini_mcu.h.tpl",
+]
+
+
+def build_kwargs(peripherals, freeze):
+    """
+    Build the template arguments of an X-HEEP model with a large user peripheral domain.
+
+    :param int peripherals: number of user peripherals
+    :param bool freeze: if False, the domains are not frozen after build, so that the domain accessors deep-copy them as they did before
+    :return: the template arguments
+    :rtype: dict
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        xheep, config = mcu_gen.load_xheep_config(x_heep_cfg, pads_cfg=pads_cfg)
+    domain = UserPeripheralDomain(length=peripherals * 0x10000)
+    for _ in range(peripherals):
+        domain.add_peripheral(GPIO())
+    xheep.add_peripheral_domain(domain)
+
+    if freeze:
+        return mcu_gen.configure_xheep(xheep, config)
+    with mock.patch.object(PeripheralDomain, "freeze", lambda self: None):
+        return mcu_gen.configure_xheep(xheep, config)
+
+
+def measure(tpls, kwargs, repeat):
+    """
+    :return: the best render time of the templates (in seconds) and the peak memory allocated during one render (in bytes)
+    :rtype: tuple[float, int]
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tpl in tpls:
+            mcu_gen.render_template(tpl, **kwargs)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for tpl in tpls:
+        mcu_gen.render_template(tpl, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares the render time of the peripheral templates with copied and frozen peripheral domains."
+    )
+    parser.add_argument(
+        "--peripherals",
+        type=int,
+        nargs="+",
+        default=[16, 64, 256],
+        help="Numbers of user peripherals to benchmark",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Number of renders per measure"
+    )
+    args = parser.parse_args()
+
+    tpls = [mcu_gen.load_template(tpl) for tpl in templates]
+
+    print(
+        f"{'peripherals':>12} {'copy (ms)':>10} {'frozen (ms)':>12} {'speedup':>8} {'copy peak (KiB)':>16} {'frozen peak (KiB)':>18}"
+    )
+    for peripherals in args.peripherals:
+        copy_time, copy_peak = measure(
+            tpls, build_kwargs(peripherals, freeze=False), args.repeat
+        )
+        frozen_time, frozen_peak = measure(
+            tpls, build_kwargs(peripherals, freeze=True), args.repeat
+        )
+        print(
+            f"{peripherals:>12} {copy_time * 1e3:>10.1f} {frozen_time * 1e3:>12.1f} {copy_time / frozen_time:>7.1f}x {copy_peak / 1024:>16.0f} {frozen_peak / 1024:>18.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -159,9 +159,10 @@ def main(stdscr):
   progress_bar = tqdm(total=total_iterations, desc="Overall Progress", ncols=100, unit=" iter",
                    bar_format='{desc}: {percentage:.2f}%|{bar}| {n_fmt}/{total_fmt}')
 
-  iteration = 1
-  started = False
-  counter = 10
+  # Results of each batch size, in the order of the batch sizes
+  im2col_cpu_batches = {}
+  im2col_dma_2d_C_batches = {}
+  im2col_spc_batches = {}
 
   # Set CH0 to be the SPC channel
   mask = "0001"
@@ -169,127 +170,117 @@ def main(stdscr):
   
   # Set the correct output format by setting the TEST_EN define
   im2colVer.modifyFile("../../../sw/applications/example_im2col/im2col_lib.h", test_en_pattern, f'#define TEST_EN 1')
-                                                  
+
+  # Generates the tests: each one prepares the input dataset and the golden result of its parameters, which 
+  # VerifHeep does while the previous test runs on the board
+  def genTests():
+      for j in range(batch_min, batch_max):
+          for k in range(channels_min, channels_max):
+              for l in range(im_h_min, im_h_max):
+                  for m in range(im_w_min, im_w_max):
+                      for n in range(ker_h_min, ker_h_max):
+                          for o in range(ker_w_min, ker_w_max):
+                              for p in range(pad_top_min, pad_top_max):
+                                  for q in range(pad_bottom_min, pad_bottom_max):
+                                      for r in range(pad_left_min, pad_left_max):
+                                          for s in range(pad_right_min, pad_right_max):
+                                              for t in range(stride_d1_min, stride_d1_max):
+                                                  for u in range(stride_d2_min, stride_d2_max):
+
+                                                      parameters = {
+                                                          'IH': l,
+                                                          'IW': m,
+                                                          'CH': k,
+                                                          'BATCH': j,
+                                                          'FH': n,
+                                                          'FW': o,
+                                                          'TOP_PAD': p,
+                                                          'BOTTOM_PAD': q,
+                                                          'LEFT_PAD': r,
+                                                          'RIGHT_PAD': s,
+                                                          'STRIDE_D1': t,
+                                                          'STRIDE_D2': u
+                                                      }
+
+                                                      yield {"prepare": lambda parameters=parameters: prepareTest(parameters),
+                                                             "input_size": j*k*l*m,
+                                                             "info": parameters}
+
+  # Generate the input dataset and the golden result
+  def prepareTest(parameters):
+      n_patches_h = (parameters['IH'] + parameters['TOP_PAD'] + parameters['BOTTOM_PAD'] - parameters['FH']) // parameters['STRIDE_D2'] + 1
+      n_patches_w = (parameters['IW'] + parameters['RIGHT_PAD'] + parameters['LEFT_PAD'] - parameters['FW']) // parameters['STRIDE_D1'] + 1
+      OH = parameters['FW'] * parameters['FH'] * parameters['CH'] * parameters['BATCH'] # Number of rows in a column -> size of a column
+      OW = n_patches_h * n_patches_w # Numver of columns in a row -> size of a row
+      input_size = parameters['CH'] * parameters['IH'] * parameters['IW'] * parameters['BATCH']
+      golden_size = OH * OW
+
+      im2colVer.genInputDataset(input_size, row_size=parameters['IW'], range_max=range_max, dataset_dir_c="../../../sw/applications/example_im2col/im2col_input.c", 
+                                dataset_dir="../../../sw/applications/example_im2col/im2col_input.h", parameters=parameters, dataset_name="input_image_nchw",
+                                datatype=datatype)
+      
+      im2colVer.genGoldenResult(im2col_function, golden_size, parameters, row_size=OW, golden_dir="../../../sw/applications/example_im2col/im2col_golden.h", 
+                                golden_dir_c="../../../sw/applications/example_im2col/im2col_golden.c", input_dataset_dir="../../../sw/applications/example_im2col/im2col_input.c",
+                                golden_name="golden_im2col_nchw",
+                                output_datatype=datatype)
+                                                      
+      im2colVer.modifyFile("../../../sw/applications/example_im2col/im2col_lib.h", start_id_pattern, f'#define START_ID 0')
+
+  # Called when a test finished, in the order of the tests
+  def onResult(test, results):
+      prm = test["info"]
+
+      # Format the parameters of the current run and store them for plots
+      for result in results:
+          string = (f'CH_SPC: 1, B: {prm["BATCH"]}, C: {prm["CH"]}, H: {prm["IH"]}, W: {prm["IW"]}, FH: {prm["FH"]}, FW: {prm["FW"]}, '
+                    f'PT: {prm["TOP_PAD"]}, PB: {prm["BOTTOM_PAD"]}, PL: {prm["LEFT_PAD"]}, PR: {prm["RIGHT_PAD"]}, '
+                    f'S1: {prm["STRIDE_D1"]}, S2: {prm["STRIDE_D2"]}, cycles: {result["Cycles"]}')
+          
+          if int(result["ID"]) == 0:
+              im2col_cpu_batches.setdefault(prm["BATCH"], []).append(string)
+          elif int(result["ID"]) == 1:
+              im2col_dma_2d_C_batches.setdefault(prm["BATCH"], []).append(string)
+          elif int(result["ID"]) == 2:
+              im2col_spc_batches.setdefault(prm["BATCH"], []).append(string)
+      
+      # Stop the chrono and calculate the remaining time of the verification
+      im2colVer.clearResults()
+      im2colVer.chronoStop()
+      time_rem = im2colVer.chronoExecutionEst(total_iterations)
+      im2colVer.chronoStart()
+      
+      # Update the progress bar
+      message = (
+          f"Batch size:    {prm['BATCH']:>5}\n"
+          f"Input channels:{prm['CH']:>5}\n"
+          f"Image height:  {prm['IH']:>5}\n"
+          f"Image width:   {prm['IW']:>5}\n"
+          f"Kernel height: {prm['FH']:>5}\n"
+          f"Kernel width:  {prm['FW']:>5}\n"
+          f"Pad top:       {prm['TOP_PAD']:>5}\n"
+          f"Pad bottom:    {prm['BOTTOM_PAD']:>5}\n"
+          f"Pad left:      {prm['LEFT_PAD']:>5}\n"
+          f"Pad right:     {prm['RIGHT_PAD']:>5}\n"
+          f"Stride d1:     {prm['STRIDE_D1']:>5}\n"
+          f"Stride d2:     {prm['STRIDE_D2']:>5}\n"
+          f"Remaining time:{time_rem['hours']:>2}h:{time_rem['minutes']:>2}m:{time_rem['seconds']:.2f}s\n"
+      )
+
+      progress_bar.update(1)
+      
+      stdscr.addstr(1, 0, message)
+      stdscr.refresh()
+
   curses.curs_set(0)
+
+  # Run the tests, restarting the debug interface every 10 tests
+  im2colVer.chronoStart()
+  im2colVer.runTests("example_im2col", genTests(), on_result=onResult, deb_restart_period=10)
+
   for j in range(batch_min, batch_max):
-      im2col_cpu = []
-      im2col_dma_2d_C = []
-      im2col_spc = []
-      for k in range(channels_min, channels_max):
-          
-          for l in range(im_h_min, im_h_max):
-
-              for m in range(im_w_min, im_w_max):
-
-                  for n in range(ker_h_min, ker_h_max):
-
-                      for o in range(ker_w_min, ker_w_max):
-                          
-                          for p in range(pad_top_min, pad_top_max):
-
-                              for q in range(pad_bottom_min, pad_bottom_max):
-
-                                  for r in range(pad_left_min, pad_left_max):
-
-                                      for s in range(pad_right_min, pad_right_max):
-
-                                          for t in range(stride_d1_min, stride_d1_max):
-
-                                              for u in range(stride_d2_min, stride_d2_max):
-                                                  
-                                                  # Start the chrono
-                                                  if started and counter == 0:
-                                                    im2colVer.stopDeb()
-                                                    im2colVer.setUpDeb()
-                                                    counter = 10
-                                                  elif not started:
-                                                    im2colVer.setUpDeb()
-                                                    started = True
-                                                    counter -= 1
-                                                  else:                                                      
-                                                    counter -= 1
-                                                  
-                                                  im2colVer.chronoStart()
-
-                                                  # Generate the input dataset and the golden result
-                                                  n_patches_h = (l + p + q - n) // u + 1
-                                                  n_patches_w = (m + s + r - o) // t + 1
-                                                  OH = o * n * k * j # Number of rows in a column -> size of a column
-                                                  OW = n_patches_h * n_patches_w # Numver of columns in a row -> size of a row
-                                                  input_size = k * l * m * j
-                                                  golden_size = OH * OW
-
-                                                  parameters = {
-                                                      'IH': l,
-                                                      'IW': m,
-                                                      'CH': k,
-                                                      'BATCH': j,
-                                                      'FH': n,
-                                                      'FW': o,
-                                                      'TOP_PAD': p,
-                                                      'BOTTOM_PAD': q,
-                                                      'LEFT_PAD': r,
-                                                      'RIGHT_PAD': s,
-                                                      'STRIDE_D1': t,
-                                                      'STRIDE_D2': u
-                                                  }
-                                                  
-                                                  im2colVer.genInputDataset(input_size, row_size=m, range_max=range_max, dataset_dir_c="../../../sw/applications/example_im2col/im2col_input.c", 
-                                                                            dataset_dir="../../../sw/applications/example_im2col/im2col_input.h", parameters=parameters, dataset_name="input_image_nchw",
-                                                                            datatype=datatype)
-                                                  
-                                                  im2colVer.genGoldenResult(im2col_function, golden_size, parameters, row_size=OW, golden_dir="../../../sw/applications/example_im2col/im2col_golden.h", 
-                                                                            golden_dir_c="../../../sw/applications/example_im2col/im2col_golden.c", input_dataset_dir="../../../sw/applications/example_im2col/im2col_input.c",
-                                                                            golden_name="golden_im2col_nchw",
-                                                                            output_datatype=datatype)
-                                                                                                  
-                                                  im2colVer.modifyFile("../../../sw/applications/example_im2col/im2col_lib.h", start_id_pattern, f'#define START_ID 0')
-                                                  
-                                                  # Launch the test
-                                                  im2colVer.launchTest("example_im2col", input_size=j*k*l*m)
-
-                                                  # Format the parameters of the current run and store them for plots
-                                                  for test in im2colVer.results:
-                                                      string = f'CH_SPC: 1, B: {j}, C: {k}, H: {l}, W: {m}, FH: {n}, FW: {o}, PT: {p}, PB: {q}, PL: {r}, PR: {s}, S1: {t}, S2: {u}, cycles: {test["Cycles"]}'
-                                                      
-                                                      if int(test["ID"]) == 0:
-                                                          im2col_cpu.append(string)
-                                                      elif int(test["ID"]) == 1:
-                                                          im2col_dma_2d_C.append(string)
-                                                      elif int(test["ID"]) == 2:
-                                                          im2col_spc.append(string)
-                                                  
-                                                  # Stop the chrono and calculate the remaining time of the verification
-                                                  im2colVer.clearResults()
-                                                  im2colVer.chronoStop()
-                                                  time_rem = im2colVer.chronoExecutionEst(((stride_d2_max - stride_d2_min) * (stride_d1_max - stride_d1_min) * (pad_right_max - pad_right_min) * (pad_left_max - pad_left_min) * (pad_bottom_max - pad_bottom_min) * (pad_top_max - pad_top_min) * (ker_w_max - ker_w_min) * (ker_h_max - ker_h_min) * (im_w_max - im_w_min) * (im_h_max - im_h_min) * (channels_max - channels_min) * (batch_max - batch_min)))
-                                                  
-                                                  # Update the progress bar
-                                                  message = (
-                                                      f"Batch size:    {j:>5}\n"
-                                                      f"Input channels:{k:>5}\n"
-                                                      f"Image height:  {l:>5}\n"
-                                                      f"Image width:   {m:>5}\n"
-                                                      f"Kernel height: {n:>5}\n"
-                                                      f"Kernel width:  {o:>5}\n"
-                                                      f"Pad top:       {p:>5}\n"
-                                                      f"Pad bottom:    {q:>5}\n"
-                                                      f"Pad left:      {r:>5}\n"
-                                                      f"Pad right:     {s:>5}\n"
-                                                      f"Stride d1:     {t:>5}\n"
-                                                      f"Stride d2:     {u:>5}\n"
-                                                      f"Remaining time:{time_rem['hours']:>2}h:{time_rem['minutes']:>2}m:{time_rem['seconds']:.2f}s\n"
-                                                  )
-
-                                                  iteration += 1
-                                                  progress_bar.update(1)
-                                                  
-                                                  stdscr.addstr(1, 0, message)
-                                                  stdscr.refresh()
-
-      im2col_cpu_array.append(im2col_cpu)
-      im2col_dma_2d_C_array.append(im2col_dma_2d_C)
-      im2col_spc_array.append(im2col_spc)
+      im2col_cpu_array.append(im2col_cpu_batches.get(j, []))
+      im2col_dma_2d_C_array.append(im2col_dma_2d_C_batches.get(j, []))
+      im2col_spc_array.append(im2col_spc_batches.get(j, []))
 
   # Stop the debug interface and close the progress bar
   im2colVer.stopDeb()
@@ -27,13 +27,20 @@
 #              and to compare it against a golden output, also defined in a header. 
 #              Both the name and directories of these datasets can be provided as arguments.
 #              It is also possible to generate a golden result starting from a custom input dataset, provided that it was produced
-#              using the same structure.#              
+#              using the same structure.
+#              The datasets are generated and written with NumPy, and the golden function receives the input dataset as a NumPy
+#              array, taken from memory if it was generated by genInputDataset.
 #
 #           3) The library provides methods to estimate the remaining time of the execution of a loop, based on the average duration
 #              of the iterations that have already been executed. 
 #              This is useful to estimate the remaining time of the execution of a multi-iteration test.
+#
+#           4) Multi-iteration tests should be run with runTests, which pipelines them: while a test runs on the
+#              target, the next one is prepared and compiled in another build folder (SW_BUILD_DIR). The serial
+#              port is read by a single thread for the whole session, and the results are parsed as they arrive.
 #           
 
+import asyncio
 import subprocess
 import re
 import time
@@ -41,16 +48,39 @@ import serial
 import pexpect
 import threading
 import queue
-import random
 import os
+import numpy as np
 
 # Set this to True to enable debugging prints
 DEBUG_MODE = False
 
+# Number of build folders used by runTests: while a test runs, the next one is compiled
+PIPELINE_DEPTH = 2
+
+# Number of values formatted at once when writing a dataset
+DATASET_CHUNK_SIZE = 1 << 16
+
 def PRINT_DEB(*args, **kwargs):
     if DEBUG_MODE:
         print(*args, **kwargs)
 
+def writeArray(f, values, row_size=0):
+    """
+    Writes the values of a C array initializer, " v0, v1, ...", with a new line every row_size values. The values
+    are formatted in chunks of whole rows with a single format operation each.
+    """
+    values = np.asarray(values).ravel()
+    row = row_size if row_size > 0 else DATASET_CHUNK_SIZE
+    chunk_size = max(DATASET_CHUNK_SIZE // row, 1) * row
+    for start in range(0, values.size, chunk_size):
+        chunk = values[start:start + chunk_size].tolist()
+        full_rows, rest = divmod(len(chunk), row)
+        text = ((" %s," * row + ("\n" if row_size > 0 else "")) * full_rows + " %s," * rest) % tuple(chunk)
+        # No comma after the last value
+        if start + chunk_size >= values.size:
+            text = text[:-2] + "\n" if text.endswith(",\n") else text[:-1]
+        f.write(text)
+
 class VerifHeep:
     def __init__(self, target, xheep_dir, opt_en=False):
         self.target = target
@@ -63,15 +93,21 @@ class VerifHeep:
         self.xheep_dir = xheep_dir
         self.results = []
         self.it_times = []
+        self.datasets = {}
+        self.rng = np.random.default_rng()
+        self.ser = None
+        self.serial_reader = None
+        self.gdb = None
 
     def resetAll(self):
         self.results = []
         self.it_times = []
+        if self.serial_reader is not None:
+          self.serial_reader.stop()
         if self.ser.is_open:
           self.ser.close()
         self.ser = None
-        self.serial_queue = None
-        self.serial_thread = None
+        self.serial_reader = None
         self.gdb = None
         self.xheep_dir = None
 
@@ -106,7 +142,7 @@ class VerifHeep:
     def serialBegin(self, port, baudrate):
         try:
             self.ser = serial.Serial(port, baudrate, timeout=1)
-            self.serial_queue = queue.Queue()
+            self.serial_reader = SerialReader(self.ser)
             
             if self.ser.is_open:
                 print("Connection successful")
@@ -127,6 +163,10 @@ class VerifHeep:
         $RISCV_XHEEP/bin/riscv32-unknown-elf-gdb ./sw/build/main.elf
         """
         self.gdb = pexpect.spawn(f"/bin/bash -c '{gdb_cmd}'")
+        # gdb does not need the default 50 ms delay before each command sent by pexpect
+        self.gdb.delaybeforesend = None
+        self.gdb.expect('(gdb)')
+        self.gdb.sendline('set confirm off')
         self.gdb.expect('(gdb)')
         self.gdb.sendline('set remotetimeout 2000')
         self.gdb.expect('(gdb)')
@@ -149,73 +189,165 @@ class VerifHeep:
 
     def launchTest(self, example_name, input_size=0, pattern=r'(\d+):(\d+):(\d+)', en_timeout_term=False):
         PRINT_DEB(f"Running test {example_name} with input size {input_size}...")
+        self.runTests(example_name, [{"input_size": input_size}], pattern=pattern, en_timeout_term=en_timeout_term)
+
+    def runTests(self, example_name, tests, pattern=r'(\d+):(\d+):(\d+)', en_timeout_term=False, timeout=600,
+                 on_result=None, deb_restart_period=0):
+        """
+        Runs a sequence of tests as a pipeline: while a test runs on the target, the next one is prepared
+        (e.g. its dataset is generated) and compiled in another build folder. The serial output is read by
+        a single reader, started by serialBegin, and the "<ID>:<cycles>:<outcome>" lines are parsed as they
+        are received.
+
+        :param str example_name: The application of the tests.
+        :param tests: Iterable of tests, each one a dict with the optional keys:
+            - "prepare": function called without arguments before compiling the test, e.g. to generate
+              its dataset and modify its sources.
+            - "input_size": stored with the results of the test.
+            - "info": any information about the test, passed back to on_result.
+        :param str pattern: The pattern of the result lines, capturing the ID, the cycles and the outcome.
+        :param bool en_timeout_term: If True, exits when a test times out.
+        :param int timeout: The timeout of each test in seconds.
+        :param on_result: If set, called with each test and the list of its results once it finished, in
+            the order of tests.
+        :param int deb_restart_period: If not 0, the debug interface is restarted every deb_restart_period
+            tests.
+        """
+        asyncio.run(self._runTestsAsync(example_name, tests, re.compile(pattern), en_timeout_term, timeout,
+                                        on_result, deb_restart_period))
 
+    async def _runTestsAsync(self, example_name, tests, pattern, en_timeout_term, timeout, on_result,
+                             deb_restart_period):
         # Check that the serial connection is still open
         if not self.ser.is_open:
             print("Error: Serial port is not open!")
-            exit(1) 
-
-        # Set up the serial communication thread and attach it the serial queue
-        self.serial_thread = threading.Thread(target=SerialReceiver, args=(self.ser, self.serial_queue,))
-
-        # Start the serial thread
-        self.serial_thread.start()
+            exit(1)
 
+        loop = asyncio.get_running_loop()
+
+        # Two build folders are used in turn: one holds the test that runs, the next test is compiled in the other
+        free_build_dirs = asyncio.Queue()
+        for i in range(PIPELINE_DEPTH):
+            free_build_dirs.put_nowait(os.path.join(os.path.abspath(self.xheep_dir), "build", "verifheep", str(i)))
+        compiled = asyncio.Queue(maxsize=1)
+
+        async def compileTests():
+            try:
+                for test in tests:
+                    build_dir = await free_build_dirs.get()
+                    # The sources of a test are only modified once the previous test is compiled
+                    if test.get("prepare") is not None:
+                        await loop.run_in_executor(None, test["prepare"])
+                    success = await self._compileAsync(example_name, build_dir)
+                    await compiled.put((test, build_dir, success))
+            finally:
+                # Also sent when a test cannot be prepared or compiled, so that the runner stops waiting
+                await compiled.put(None)
+
+        compiler = asyncio.ensure_future(compileTests())
+        try:
+            run_count = 0
+            while True:
+                item = await compiled.get()
+                if item is None:
+                    # Raises the error of the preparation or the compilation, if any
+                    await compiler
+                    break
+                test, build_dir, success = item
+
+                results = []
+                if success:
+                    if deb_restart_period and run_count and run_count % deb_restart_period == 0:
+                        self.stopDeb()
+                        self.setUpDeb()
+                    run_count += 1
+                    results = await self._runAsync(os.path.join(build_dir, "main.elf"), pattern, timeout,
+                                                   test.get("input_size", 0), en_timeout_term)
+                free_build_dirs.put_nowait(build_dir)
+
+                self.results.extend(results)
+                if on_result is not None:
+                    on_result(test, results)
+        finally:
+            compiler.cancel()
+
+    async def _compileAsync(self, example_name, build_dir):
         # Compile the application
         if self.target == 'verilator' or self.target == 'questasim':
-          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name}"
+          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name} SW_BUILD_DIR={build_dir}"
         else:
-          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name} TARGET={self.target}"
+          app_compile_run_com = f"cd {self.xheep_dir} ; make app PROJECT={example_name} TARGET={self.target} SW_BUILD_DIR={build_dir}"
 
-        result_compilation = subprocess.run(app_compile_run_com, shell=True, capture_output=True, text=True)
+        process = await asyncio.create_subprocess_shell(app_compile_run_com, stdout=asyncio.subprocess.DEVNULL,
+                                                        stderr=asyncio.subprocess.PIPE)
+        _, stderr = await process.communicate()
+        stderr = stderr.decode("utf-8", errors="replace")
+
+        if process.returncode != 0 or ("Error" in stderr) or ("error" in stderr):
+            print(stderr)
+            return False
+        PRINT_DEB("Compilation successful!")
+        return True
+
+    async def _gdbExpect(self, pattern, timeout=30):
+        # pexpect is blocking, the output of gdb is waited for in another thread
+        return await asyncio.get_running_loop().run_in_executor(None, self.gdb.expect, pattern, timeout)
+
+    async def _runAsync(self, elf, pattern, timeout, input_size, en_timeout_term):
+        # Discard what was received since the last test
+        self.serial_reader.clear()
 
-        if ("Error" in result_compilation.stderr) or ("error" in result_compilation.stderr):
-            print(result_compilation.stderr)
-            return
-        else:
-            PRINT_DEB("Compilation successful!")
-        
         # Run the testbench with gdb
+        self.gdb.sendline(f'file {elf}')
+        await self._gdbExpect('(gdb)')
         self.gdb.sendline('load')
-        self.gdb.expect('(gdb)')
-
-        try:
-          output = self.gdb.read_nonblocking(size=100, timeout=1)
-          PRINT_DEB("Current gdb output:", output)
-        except pexpect.TIMEOUT:
-          PRINT_DEB("No new output from GDB.")
+        await self._gdbExpect('(gdb)')
 
         # Set a breakpoint at the exit and wait for it
+        self.gdb.sendline('delete')
+        await self._gdbExpect('(gdb)')
         self.gdb.sendline('b _exit')
-        self.gdb.expect('(gdb)')
+        await self._gdbExpect('(gdb)')
         self.gdb.sendline('continue')
+
+        # The results are parsed as they are received, until the end word or the breakpoint
+        results = []
+        breakpoint = asyncio.ensure_future(self._gdbExpect('Breakpoint', timeout))
+        deadline = time.monotonic() + timeout
         try:
-          self.gdb.expect('Breakpoint', timeout=600)
+            while True:
+                line = await self.serial_reader.readLine(min(1, max(deadline - time.monotonic(), 0)))
+                if line is None:
+                    # Nothing received: the program may have finished without the end word
+                    if breakpoint.done() or time.monotonic() > deadline:
+                        break
+                    continue
+                if "ERROR" in line:
+                    print("FAILED VERIFICATION!")
+                    exit(1)
+                match = pattern.search(line)
+                if match:
+                    results.append({ "ID" : match.group(1), "Cycles": match.group(2), "Outcome": match.group(3), "Input size": input_size })
+                if self.serial_reader.endword in line:
+                    break
+            await breakpoint
         except pexpect.TIMEOUT:
-          print("Timeout! Program didn't answer in time, exiting...")
-          self.gdb.terminate()
-          if en_timeout_term:
-            exit(1)
-          return
-        
-        # Wait for serial to finish
-        self.serial_thread.join()
-
-        # Recover the lines
-        lines = []
-        while not self.serial_queue.empty():
-            lines.append(self.serial_queue.get())
-
-        # Analyse the results
-        pattern = re.compile(pattern)  
-        test_id = None
-        for line in lines:
-            match = pattern.search(line)
-            if match:
-                test_id = match.group(1)
-                cycle_count = match.group(2)
-                outcome = match.group(3)
-                self.results.append({ "ID" : test_id, "Cycles": cycle_count, "Outcome": outcome, "Input size": input_size })
+            print("Timeout! Program didn't answer in time, exiting...")
+            self.gdb.terminate()
+            if en_timeout_term:
+                exit(1)
+            self.setUpDeb()
+        finally:
+            if not breakpoint.done():
+                # Cancelling the future does not stop the thread waiting for the breakpoint, which would keep
+                # reading the output of gdb: the gdb session is interrupted and closed to stop it
+                self.stopDeb()
+                try:
+                    await breakpoint
+                except Exception:
+                    pass
+
+        return results
 
     def dumpResults(self, filename="results.txt"):
         with open(filename, 'w') as f:
@@ -244,7 +376,22 @@ class VerifHeep:
     # Data generation methods
 
     def genInputDataset(self, dataset_size, parameters="", row_size=0, range_min=0, range_max=1, dataset_dir="input_dataset.h", dataset_dir_c="", dataset_name="input_dataset", datatype="uint32_t"):
+        """
+        Generates a random input dataset and writes it as a C array. The dataset is also kept in memory,
+        so that genGoldenResult passes it to the golden function without parsing the C file again.
+
+        :return: The dataset, as a NumPy array.
+        """
         
+        # Generate the random vector in one call
+        if 'float' in datatype:
+            dataset = self.rng.uniform(range_min, range_max, dataset_size)
+        elif ('int8' in datatype or 'int16' in datatype or 'int32' in datatype) and ('uint' not in datatype or (range_min >= 0 and range_max > 0)):
+            dataset = self.rng.integers(range_min, range_max, dataset_size, dtype=np.int64, endpoint=True)
+        else:
+            print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
+            exit(1)
+
         if dataset_dir_c == "":
           with open(dataset_dir, 'w') as f:
             # Add license
@@ -262,33 +409,8 @@ class VerifHeep:
             # Vector declaration
             f.write(f"const {datatype} {dataset_name}[{dataset_size}] = " + "{\n")
             
-            # Generate the random vector
-            for i in range(dataset_size):
-                if 'float' in datatype:
-                    value = random.uniform(range_min, range_max)  # float
-                elif 'uint' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype) and range_min >= 0 and range_max > 0:
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                elif 'int' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype):
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                else:
-                  print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                  exit(1)
-
-                if i < dataset_size - 1:
-                    f.write(f" {value},")
-                else:
-                    f.write(f" {value}")
-              
-                if row_size > 0 and (i + 1) % row_size == 0:
-                  f.write("\n")
+            # Write the random vector
+            writeArray(f, dataset, row_size)
             
             # Close the file
             f.write("};\n\n")
@@ -303,33 +425,8 @@ class VerifHeep:
             # Vector declaration
             f.write(f"const {datatype} {dataset_name}[{dataset_size}] = " + "{\n")
             
-            # Generate the random vector
-            for i in range(dataset_size):
-                if 'float' in datatype:
-                    value = random.uniform(range_min, range_max)  # float
-                elif 'uint' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype) and range_min >= 0 and range_max > 0:
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                elif 'int' in datatype:
-                    if ('8' in datatype or '16' in datatype or '32' in datatype):
-                        value = random.randint(range_min, range_max)
-                    else:
-                        print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                        exit(1)
-                else:
-                  print("Error: invalid datatype. Choose one among:\n- float\n- u/int8_t\n- u/int16_t\n- u/int32_t\n")
-                  exit(1)
-
-                if i < dataset_size - 1:
-                    f.write(f" {value},")
-                else:
-                    f.write(f" {value}")
-              
-                if row_size > 0 and (i + 1) % row_size == 0:
-                  f.write("\n")
+            # Write the random vector
+            writeArray(f, dataset, row_size)
               
             # Close the file
             f.write("};\n\n")
@@ -355,34 +452,30 @@ class VerifHeep:
             # Close the file
             f.write(f"#endif // {dataset_name.upper()}_H\n")
 
-    def genGoldenResult(self, function, golden_size, parameters, row_size=0, output_datatype="uint32_t",  input_dataset_dir="input_dataset.h", golden_dir_c="", golden_dir="golden_output.h", golden_name = "golden_output"):
-        
-        # Recover the input dataset
-        with open(input_dataset_dir, 'r') as f:
-            content = f.read()
-
-        # Use regular expressions to find the array data
-        pattern = re.compile(r"{(.*?)}", re.DOTALL)
-        match = pattern.search(content)
+        # Keep the dataset for genGoldenResult, with the state of the files it was written to
+        for path in (dataset_dir, dataset_dir_c):
+            if path:
+                stat = os.stat(path)
+                self.datasets[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size, dataset)
 
-        if not match:
-            raise ValueError("No array data found in the file.")
+        return dataset
 
-        array_data = match.group(1)
-        # Remove extra whitespace and split the string into individual values
-        array_data = array_data.replace('\n', '').replace(' ', '')
-        values = array_data.split(',')
+    def genGoldenResult(self, function, golden_size, parameters, row_size=0, output_datatype="uint32_t",  input_dataset_dir="input_dataset.h", golden_dir_c="", golden_dir="golden_output.h", golden_name = "golden_output", input_dataset=None):
+        """
+        Generates the golden result of an input dataset with function(values, parameters) and writes it as a C array.
+        The values are a NumPy array: input_dataset if set, else the dataset written by genInputDataset to
+        input_dataset_dir, else the dataset parsed from input_dataset_dir (e.g. a custom dataset).
+        """
 
-        # Convert values to the appropriate type
-        if "float" in content:
-            values = [float(value) for value in values]
-        elif "uint8_t" in content or "uint16_t" in content or "uint32_t" in content:
-            values = [int(value) for value in values]
-        elif "int8_t" in content or "int16_t" in content or "int32_t" in content:
-            values = [int(value) for value in values]
+        # Recover the input dataset
+        if input_dataset is not None:
+            values = np.asarray(input_dataset)
+        else:
+            values = self.loadDataset(input_dataset_dir)
 
         # Generate the golden result
         (golden_values, output_parameters) = function(values, parameters)
+        golden_values = np.asarray(golden_values).ravel()[:golden_size]
 
         if golden_dir_c == "":
           with open(golden_dir, 'w') as f:
@@ -403,14 +496,7 @@ class VerifHeep:
             # Vector declaration
             f.write(f"const {output_datatype} {golden_name}[{golden_size}] = " + "{\n")
 
-            for i in range(golden_size):
-              if i < golden_size - 1:
-                f.write(f" {golden_values[i]},")
-              else:
-                f.write(f" {golden_values[i]}")
-              
-              if row_size > 0 and (i + 1) % row_size == 0:
-                f.write("\n")
+            writeArray(f, golden_values, row_size)
 
             # Close the file
             f.write("};\n\n")
@@ -425,14 +511,7 @@ class VerifHeep:
             # Vector declaration
             f.write(f"const {output_datatype} {golden_name}[{golden_size}] = " + "{\n")
 
-            for i in range(golden_size):
-              if i < golden_size - 1:
-                f.write(f" {golden_values[i]},")
-              else:
-                f.write(f" {golden_values[i]}")
-                
-              if row_size > 0 and (i + 1) % row_size == 0:
-                f.write("\n")
+            writeArray(f, golden_values, row_size)
 
             # Close the file
             f.write("};\n\n")
@@ -456,6 +535,29 @@ class VerifHeep:
             # Close the file
             f.write(f"#endif // {golden_name.upper()}_H\n")
 
+    def loadDataset(self, dataset_dir):
+        """
+        :return: The dataset of a C file as a NumPy array, from memory if it was written by genInputDataset and not
+            modified since.
+        """
+        stat = os.stat(dataset_dir)
+        cached = self.datasets.get(os.path.abspath(dataset_dir))
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        with open(dataset_dir, 'r') as f:
+            content = f.read()
+
+        # Use regular expressions to find the array data
+        pattern = re.compile(r"{(.*?)}", re.DOTALL)
+        match = pattern.search(content)
+
+        if not match:
+            raise ValueError("No array data found in the file.")
+
+        # Convert values to the appropriate type
+        return np.fromstring(match.group(1), dtype=np.float64 if "float" in content else np.int64, sep=',')
+
     def modifyFile(self, file_dir, pattern, replacement):
         
         with open(file_dir, 'r') as f:
@@ -469,30 +571,45 @@ class VerifHeep:
 
 # Serial communication thread
 
-def SerialReceiver(ser, serial_queue, endword="&"):
-    try:
-        if not ser.is_open:
-            raise serial.SerialException("Serial port not open")
-        
-        received = False
-        while not received:
-            # Read the data from the serial port
-            line = ser.readline().decode('utf-8').rstrip()
-            serial_queue.put(line)
-            PRINT_DEB(f">: {line}")
-            if line:
-                if endword in line:
-                    received = True
-                    PRINT_DEB(f"Received {endword}: end of serial transmission thread")
-                    return
-                elif "ERROR" in line:
-                    print("FAILED VERIFICATION!")
-                    exit(1)
-    except serial.SerialException as e:
-        print(f"Serial exception: {e}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-    except KeyboardInterrupt:
-        print("Keyboard interruption")
-    finally:
-        pass
\ No newline at end of file
+class SerialReader:
+    """
+    Reads the serial port in a thread for the whole session, so that no output is lost between the tests.
+    """
+
+    def __init__(self, ser, endword="&"):
+        self.ser = ser
+        self.endword = endword
+        self.lines = queue.Queue()
+        self.running = True
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        try:
+            while self.running:
+                # Read the data from the serial port
+                line = self.ser.readline()
+                if line:
+                    line = line.decode('utf-8', errors='replace').rstrip()
+                    PRINT_DEB(f">: {line}")
+                    self.lines.put(line)
+        except serial.SerialException as e:
+            if self.running:
+                print(f"Serial exception: {e}")
+
+    def clear(self):
+        while not self.lines.empty():
+            self.lines.get_nowait()
+
+    async def readLine(self, timeout):
+        """
+        :return: The next line received, or None if nothing was received before the timeout.
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.lines.get, True, timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
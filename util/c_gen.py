@@ -1,10 +1,18 @@
 # Write a C header file with array definitions for the input matrix, the output
 # matrix, and the instruction stream.
 
+import io
 import os
 import sys
 import numpy as np
 
+# Approximate size of the text written at once when streaming arrays
+CHUNK_BYTES = 1 << 20
+
+# ASCII codes of the hexadecimal digits, indexed by their value
+HEX_UPPER = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+HEX_LOWER = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
 
 class CFileGen:
     """
@@ -93,6 +101,9 @@ class CFileGen:
             "int8": np.uint8,
             "int16": np.uint16,
             "int32": np.uint32,
+            "uint8": np.uint8,
+            "uint16": np.uint16,
+            "uint32": np.uint32,
         }[str(dtype)]
 
     # Convert numpy dtype to C type
@@ -110,31 +121,28 @@ class CFileGen:
     def format_binary(
         self, name: str, file: str, prefix_pad: int = 0, suffix_pad: int = 0
     ) -> str:
+        out = io.StringIO()
+        self.write_binary(out, name, file, prefix_pad, suffix_pad)
+        return out.getvalue()
+
+    # Write binary file content as C array, streaming the elements in chunks
+    def write_binary(
+        self, out, name: str, file: str, prefix_pad: int = 0, suffix_pad: int = 0
+    ) -> None:
         # Read binary file
         with open(file, "rb") as f:
             content = f.read()
 
-        if prefix_pad > 0:
-            content = (b"\x00" * prefix_pad) + content
-        if suffix_pad > 0:
-            content += b"\x00" * suffix_pad
-
         # Pad data to 4-byte alignment (possibly zero padding)
-        data_len = len(content) // 4
-        if len(content) % 4 != 0:
-            data_len += 1
-            content += b"\x00" * (4 - (len(content) % 4))
+        size = prefix_pad + len(content) + suffix_pad
+        data = np.zeros((size + 3) // 4, dtype="<u4")
+        memoryview(data).cast("B")[prefix_pad : prefix_pad + len(content)] = content
 
-        # Write C data content
+        # Write C data content: one "    0xXXXXXXXX" element per line
         declaration = self.format_array_decl("uint32_t", f"{name}[]")
-        array_contents = f"{declaration} = {{\n"
-        for i in range(data_len):
-            element = int.from_bytes(content[i * 4 : (i + 1) * 4], byteorder="little")
-            array_contents += f"    0x{element:08X}"
-            if i != data_len - 1:
-                array_contents += ",\n"
-        array_contents += "\n};\n"
-        return array_contents
+        out.write(f"{declaration} = {{\n")
+        self._write_lines(out, data, 8, HEX_UPPER, "    0x", ", ", 1)
+        out.write("\n};\n")
 
     # Format matrix size macros
     def format_matrix_size(self, matrix: np.ndarray, name: str) -> str:
@@ -150,139 +158,195 @@ class CFileGen:
 
     # Format matrix for C
     def format_matrix(self, matrix: np.ndarray, name: str) -> str:
-        # Determine the number of bits based on the dtype
+        out = io.StringIO()
+        self.write_matrix(out, matrix, name)
+        return out.getvalue()
+
+    # Write matrix for C, streaming the rows in chunks
+    def write_matrix(self, out, matrix: np.ndarray, name: str) -> None:
+        # Determine the number of hexadecimal digits based on the dtype
         dtype: np.dtype = matrix.dtype
-        num_bits = dtype.itemsize * 8
+        num_digits = dtype.itemsize * 2
 
         array_ctype = self.dtype_to_ctype(dtype)
         utype = self.signed2unsigned(dtype)
-        matrix = matrix.astype(utype)
-
-        # Convert the signed array to 2's complement hexadecimal values
-        rows = []
-        for row in matrix:
-            hex_values = [f"{element:#0{2+num_bits//4}x}" for element in row]
-            rows.append(hex_values)
+        # Reinterpret the signed array as 2's complement unsigned values
+        matrix = np.ascontiguousarray(matrix).view(utype)
+        if matrix.ndim != 2:
+            raise ValueError(f"Matrix {name} should have 2 dimensions")
 
-        # Format the matrix
+        # Format the matrix: one row per line, elements separated by ", "
         declaration = self.format_array_decl(array_ctype, f"{name} []")
-        matrix_contents = f"{declaration} = {{\n"
-        if len(rows) > 1:
-            matrix_contents += ",\n".join([f"    {', '.join(row)}" for row in rows])
+        out.write(f"{declaration} = {{\n")
+        if matrix.shape[1] == 0:
+            out.write(",\n".join(["    "] * matrix.shape[0]))
         else:
-            matrix_contents += f"    {', '.join(rows[0])}"
-        matrix_contents += "\n};\n\n"
-
-        return matrix_contents
+            self._write_lines(
+                out, matrix, num_digits, HEX_LOWER, "0x", ", ", matrix.shape[1], "    "
+            )
+        out.write("\n};\n\n")
+
+    # Write fixed width hexadecimal values as "<indent><prefix><hex>, <prefix><hex>, ...", with
+    # line_length values per line and lines separated by ",\n". The characters of whole chunks of
+    # lines are computed with NumPy and written at once, no Python object is created per element.
+    def _write_lines(
+        self,
+        out,
+        values: np.ndarray,
+        num_digits: int,
+        digits: np.ndarray,
+        prefix: str,
+        separator: str,
+        line_length: int,
+        indent: str = "",
+    ) -> None:
+        values = values.reshape(-1)
+        if values.size == 0:
+            return
+        lines = values.size // line_length
+        # Every element is followed by a 2 characters separator, the last one of each line is
+        # replaced by ",\n" and the very last one is dropped
+        elem_width = len(prefix) + num_digits + len(separator)
+        line_width = len(indent) + line_length * elem_width
+        template = np.frombuffer(
+            (indent + (prefix + "0" * num_digits + separator) * line_length).encode(),
+            dtype=np.uint8,
+        ).copy()
+        template[-2:] = np.frombuffer(b",\n", dtype=np.uint8)
+        shifts = np.arange(4 * (num_digits - 1), -1, -4, dtype=values.dtype)
+        columns = (
+            len(indent)
+            + np.arange(line_length)[:, None] * elem_width
+            + len(prefix)
+            + np.arange(num_digits)[None, :]
+        ).reshape(-1)
+
+        chunk_lines = max(1, CHUNK_BYTES // line_width)
+        for start in range(0, lines, chunk_lines):
+            chunk = values[start * line_length : (start + chunk_lines) * line_length]
+            chunk_len = chunk.size // line_length
+            buffer = np.tile(template, (chunk_len, 1))
+            buffer[:, columns] = digits[(chunk[:, None] >> shifts) & 0xF].reshape(
+                chunk_len, -1
+            )
+            text = buffer.tobytes()
+            if start + chunk_len >= lines:
+                text = text[:-2]
+            out.write(text.decode("ascii"))
 
     def format_code(self, code: str, name: str) -> str:
+        out = io.StringIO()
+        self.write_code(out, code, name)
+        return out.getvalue()
+
+    # Write code for C, 8 instructions per line
+    def write_code(self, out, code: str, name: str) -> None:
         # Format the array
         declaration = self.format_array_decl("uint32_t", f"{name}[]")
-        code_contents = f"{declaration} = {{"
-        for i, insn in enumerate(code):
-            if i % 8 == 0:
-                code_contents += "\n    "
-            code_contents += f"{insn:>10}"
-            if i < len(code) - 1:
-                code_contents += ", "
-        code_contents += "\n};\n"
-        return code_contents
+        out.write(f"{declaration} = {{")
+        for i in range(0, len(code), 8):
+            out.write("\n    ")
+            out.write(", ".join(f"{insn:>10}" for insn in code[i : i + 8]))
+            if i + 8 < len(code):
+                out.write(", ")
+        out.write("\n};\n")
 
     # Write the header file
     def gen_header(self, header_macro: str = None) -> str:
+        out = io.StringIO()
+        self.write_contents(out, header_macro)
+        return out.getvalue()
+
+    # Write the header contents to a text file, without building them in memory
+    def write_contents(self, out, header_macro: str = None) -> None:
         if header_macro is not None:
             # Header guard
-            header_contents = f"#ifndef {header_macro}\n#define {header_macro}\n\n"
+            out.write(f"#ifndef {header_macro}\n#define {header_macro}\n\n")
             # Include stdint.h
-            header_contents += "#include <stdint.h>\n\n"
+            out.write("#include <stdint.h>\n\n")
 
         # Macros
         if len(self.macros) > 0 or len(self.macros_hex) > 0 or len(self.macros_raw) > 0:
-            header_contents += "// Macros\n"
-            header_contents += "// ------\n"
+            out.write("// Macros\n")
+            out.write("// ------\n")
         for name, value, comment in self.macros:
-            header_contents += f"#define {name.upper()} {value}"
+            out.write(f"#define {name.upper()} {value}")
             if comment is not None:
-                header_contents += f" // {comment}\n"
+                out.write(f" // {comment}\n")
             else:
-                header_contents += "\n"
+                out.write("\n")
         for name, value, comment in self.macros_hex:
-            header_contents += f"#define {name.upper()} 0x{value:08X}"
+            out.write(f"#define {name.upper()} 0x{value:08X}")
             if comment is not None:
-                header_contents += f" // {comment}\n"
+                out.write(f" // {comment}\n")
             else:
-                header_contents += "\n"
+                out.write("\n")
         for name in self.macros_raw:
-            header_contents += name
+            out.write(name)
         if len(self.macros) > 0 or len(self.macros_hex) > 0 or len(self.macros_raw) > 0:
-            header_contents += "\n"
+            out.write("\n")
 
         # Macros with array sizes
         if len(self.binaries) > 0:
-            header_contents += "// Binary size\n"
-            header_contents += "// -----------\n"
+            out.write("// Binary size\n")
+            out.write("// -----------\n")
             for name, file, prefix_pad, suffix_pad in self.binaries:
                 file_size = os.path.getsize(file) + prefix_pad + suffix_pad
                 if file_size % 4 != 0:
                     file_size += 4 - (file_size % 4)
-                header_contents += f"#define {name.upper()}_SIZE {file_size}\n"
-            header_contents += "\n"
+                out.write(f"#define {name.upper()}_SIZE {file_size}\n")
+            out.write("\n")
 
         if len(self.input_matrices) > 0:
-            header_contents += "// Input matrix size\n"
+            out.write("// Input matrix size\n")
             for name, matrix in self.input_matrices:
-                header_contents += self.format_matrix_size(matrix, name)
-            header_contents += "\n"
+                out.write(self.format_matrix_size(matrix, name))
+            out.write("\n")
 
         if len(self.output_matrices) > 0:
-            header_contents += "// Output matrix size\n"
+            out.write("// Output matrix size\n")
             for name, matrix in self.output_matrices:
-                header_contents += self.format_matrix_size(matrix, name)
-            header_contents += "\n"
+                out.write(self.format_matrix_size(matrix, name))
+            out.write("\n")
 
         if len(self.codes) > 0:
-            header_contents += "// Code size\n"
+            out.write("// Code size\n")
             for name, code in self.codes:
-                header_contents += self.format_code_size(code, name)
-            header_contents += "\n"
+                out.write(self.format_code_size(code, name))
+            out.write("\n")
 
         # Write binary files
         if len(self.binaries) > 0:
-            header_contents += "// Binary files\n"
-            header_contents += "// ------------\n"
+            out.write("// Binary files\n")
+            out.write("// ------------\n")
             for name, file, prefix_pad, suffix_pad in self.binaries:
-                header_contents += self.format_binary(
-                    name, file, prefix_pad, suffix_pad
-                )
-            header_contents += "\n"
+                self.write_binary(out, name, file, prefix_pad, suffix_pad)
+            out.write("\n")
 
         # Write code arrays
         if len(self.codes) > 0:
-            header_contents += "// Code\n"
-            header_contents += "// ----\n"
+            out.write("// Code\n")
+            out.write("// ----\n")
             for name, code in self.codes:
-                header_contents += self.format_code(code, name)
-            header_contents += "\n"
+                self.write_code(out, code, name)
+            out.write("\n")
 
         # Write input matrices
         if len(self.input_matrices) > 0:
-            header_contents += "// Input matrices\n"
-            header_contents += "// --------------\n"
+            out.write("// Input matrices\n")
+            out.write("// --------------\n")
             for name, matrix in self.input_matrices:
-                header_contents += self.format_matrix(matrix, name)
+                self.write_matrix(out, matrix, name)
 
         # Write output matrices
         if len(self.output_matrices) > 0:
-            header_contents += "// Output matrices\n"
-            header_contents += "// ---------------\n"
+            out.write("// Output matrices\n")
+            out.write("// ---------------\n")
             for name, matrix in self.output_matrices:
-                header_contents += self.format_matrix(matrix, name)
+                self.write_matrix(out, matrix, name)
 
         if header_macro is not None:
-            header_contents += f"#endif // {header_macro}\n"
-
-        # Return the header contents
-        return header_contents
+            out.write(f"#endif // {header_macro}\n")
 
     def write_header(self, directory: str, file_name: str) -> None:
         # Header file path
@@ -290,19 +354,13 @@ class CFileGen:
         header_base = os.path.basename(header_path)
         header_macro = header_base.upper().replace(".", "_") + "_"
 
-        # Generate header
-        header_contents = self.gen_header(header_macro)
-
-        # Write header file
+        # Generate header directly into the file
         with open(header_path, "w") as header_file:
-            header_file.write(header_contents)
+            self.write_contents(header_file, header_macro)
 
     def append_header(self, file, header_macro: str = None):
-        # Generate header
-        header_contents = self.gen_header(header_macro)
-
-        # Write header file
-        file.write(header_contents)
+        # Generate header directly into the file
+        self.write_contents(file, header_macro)
 
 
 # When launched as a standalone script, convert a binary file (e.g., compiled firmware) into a C header
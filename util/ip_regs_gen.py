@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Description: Generates the registers of the X-HEEP IPs (RTL, C defines, C structs and
+#   documentation) in a single Python process. Equivalent to running the <ip>_gen.sh scripts, which
+#   start regtool.py three times and periph_structs_gen.py once per IP, but reggen is only imported
+#   once and the HJSON description of each IP is only parsed once.
+
+import argparse
+import logging
+import multiprocessing
+import os
+import pathlib
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import hjson
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+REGTOOL_DIR = ROOT.joinpath(
+    "hw/vendor/pulp_platform/register_interface/vendor/lowrisc_opentitan/util"
+)
+PERIPH_STRUCTS_GEN_DIR = ROOT.joinpath("util/periph_structs_gen")
+TEMPLATE_FILE = PERIPH_STRUCTS_GEN_DIR.joinpath("periph_structs.tpl")
+
+sys.path.append(str(REGTOOL_DIR))
+sys.path.append(str(PERIPH_STRUCTS_GEN_DIR))
+
+from reggen import gen_cheader, gen_md, gen_rtl
+from reggen.ip_block import IpBlock
+import periph_structs_gen
+
+
+class IpRegs:
+    """
+    Describes the register generation of an IP, as done by its <ip>_gen.sh script.
+
+    :param str name: The name of the IP, also used to name the generated files.
+    :param pathlib.Path ip_dir: The directory of the IP, containing data/<name>.hjson.
+    :param bool structs: If True, the C structs header is also generated.
+    :param pathlib.Path sw_dir: The directory of the generated software files. Defaults to the driver directory of the IP.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ip_dir: pathlib.Path,
+        structs: bool = True,
+        sw_dir: Optional[pathlib.Path] = None,
+    ):
+        self.name = name
+        self.ip_dir = pathlib.Path(ip_dir)
+        self.structs = structs
+        self.sw_dir = (
+            pathlib.Path(sw_dir)
+            if sw_dir is not None
+            else ROOT.joinpath("sw/device/lib/drivers", name)
+        )
+
+    def hjson_file(self) -> pathlib.Path:
+        """
+        :return: The HJSON description of the registers.
+        :rtype: pathlib.Path
+        """
+        return self.ip_dir.joinpath("data", f"{self.name}.hjson")
+
+    def rtl_dir(self) -> pathlib.Path:
+        """
+        :return: The directory of the generated RTL.
+        :rtype: pathlib.Path
+        """
+        return self.ip_dir.joinpath("rtl")
+
+
+# IPs whose registers are generated by make mcu-gen
+XHEEP_IP_REGS = [
+    IpRegs("soc_ctrl", ROOT.joinpath("hw/ip/soc_ctrl")),
+    IpRegs("power_manager", ROOT.joinpath("hw/ip/power_manager")),
+    IpRegs("pdm2pcm", ROOT.joinpath("hw/ip/pdm2pcm")),
+    IpRegs("pad_control", ROOT.joinpath("hw/system/pad_control"), structs=False),
+    IpRegs("dma", ROOT.joinpath("hw/vendor/xheep/dma")),
+]
+
+
+class ParsedIp:
+    """
+    The parsed registers description of an IP, kept in memory to generate all its outputs.
+
+    :param IpRegs ip: The IP.
+    :param str src: The content of the HJSON file.
+    :param dict raw: The parsed HJSON file, used for the C structs.
+    :param IpBlock block: The reggen block, used for the RTL, C defines and documentation.
+    """
+
+    def __init__(self, ip: IpRegs, src: str, raw: dict, block: IpBlock):
+        self.ip = ip
+        self.src = src
+        self.raw = raw
+        self.block = block
+
+
+def parse_ip(ip: IpRegs) -> ParsedIp:
+    """
+    Parse the HJSON description of an IP once.
+
+    :param IpRegs ip: The IP.
+    :return: The parsed IP.
+    :rtype: ParsedIp
+    :raise ValueError: when the HJSON description is invalid.
+    """
+    hjson_file = ip.hjson_file()
+    with open(hjson_file, "r", encoding="utf-8") as file:
+        src = file.read()
+    raw = hjson.loads(src, use_decimal=True)
+    block = IpBlock.from_raw([], raw, str(hjson_file))
+    return ParsedIp(ip, src, raw, block)
+
+
+def source_license(src: str):
+    """
+    Extract the copyright and license lines of the HJSON source, as done by regtool for the C defines.
+
+    :param str src: The content of the HJSON file.
+    :return: The license and the copyright strings.
+    :rtype: tuple[str, str]
+    """
+    src_lic = None
+    src_copy = ""
+    found_spdx = None
+    found_lunder = None
+    copy = re.compile(r".*(copyright.*)|(.*\(c\).*)", re.IGNORECASE)
+    spdx = re.compile(r".*(SPDX-License-Identifier:.+)")
+    lunder = re.compile(r".*(Licensed under.+)", re.IGNORECASE)
+    for line in src.splitlines():
+        mat = copy.match(line)
+        if mat is not None:
+            src_copy += mat.group(1)
+        mat = spdx.match(line)
+        if mat is not None:
+            found_spdx = mat.group(1)
+        mat = lunder.match(line)
+        if mat is not None:
+            found_lunder = mat.group(1)
+    if found_lunder:
+        src_lic = found_lunder
+    if found_spdx:
+        if src_lic is None:
+            src_lic = "\n" + found_spdx
+        else:
+            src_lic += "\n" + found_spdx
+    return src_lic, src_copy
+
+
+def generate_ip(parsed: ParsedIp) -> List[str]:
+    """
+    Generate the RTL, C defines, C structs and documentation of an IP.
+
+    :param ParsedIp parsed: The parsed IP.
+    :return: The generated outputs (e.g. "registers RTL").
+    :rtype: list[str]
+    :raise RuntimeError: when reggen fails to generate an output.
+    """
+    ip = parsed.ip
+    ip.rtl_dir().mkdir(parents=True, exist_ok=True)
+    ip.sw_dir.mkdir(parents=True, exist_ok=True)
+    generated = []
+
+    if gen_rtl.gen_rtl(parsed.block, str(ip.rtl_dir())) != 0:
+        raise RuntimeError(f"Failed to generate the {ip.name} registers RTL")
+    generated.append("registers RTL")
+
+    src_lic, src_copy = source_license(parsed.src)
+    with open(ip.sw_dir.joinpath(f"{ip.name}_regs.h"), "w") as file:
+        if gen_cheader.gen_cdefines(parsed.block, file, src_lic, src_copy) != 0:
+            raise RuntimeError(f"Failed to generate the {ip.name} software header")
+    generated.append("software header")
+
+    if ip.structs:
+        periph_structs_gen.write_output(
+            ip.sw_dir.joinpath(f"{ip.name}_structs.h"),
+            periph_structs_gen.generate_structs(parsed.raw, TEMPLATE_FILE),
+        )
+        generated.append("software header structs")
+
+    with open(ip.sw_dir.joinpath(f"{ip.name}_regs.md"), "w") as file:
+        if gen_md.gen_md(parsed.block, file) != 0:
+            raise RuntimeError(f"Failed to generate the {ip.name} documentation")
+    generated.append("documentation")
+
+    return generated
+
+
+def _parse_and_generate_ip(ip: IpRegs) -> List[str]:
+    return generate_ip(parse_ip(ip))
+
+
+def generate_ips(ips: List[IpRegs], jobs: int = 1):
+    """
+    Generate the registers of a list of IPs. With more than one job, the IPs are spread over a
+    process pool. The results are reported in the order of ips.
+
+    :param list[IpRegs] ips: The IPs.
+    :param int jobs: The number of worker processes, 0 to use one per available CPU.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(ips))
+
+    def report(ip, generated):
+        for output in generated:
+            print(f"Generating {ip.name} {output}... OK")
+
+    if jobs <= 1:
+        for ip in ips:
+            report(ip, _parse_and_generate_ip(ip))
+        return
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("fork")
+    else:
+        mp_context = None
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context) as executor:
+        futures = [executor.submit(_parse_and_generate_ip, ip) for ip in ips]
+        try:
+            for ip, future in zip(ips, futures):
+                report(ip, future.result())
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="ip_regs_gen",
+        description="Generates the registers RTL, software headers and documentation of the X-HEEP IPs in a single process.",
+    )
+    parser.add_argument(
+        "--ip",
+        action="append",
+        choices=[ip.name for ip in XHEEP_IP_REGS],
+        help="Only generate this IP. Can be given multiple times (default: all IPs).",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of processes used to generate the IPs in parallel, 0 to use all available CPUs (default 1)",
+    )
+    args = parser.parse_args()
+
+    if args.jobs < 0:
+        parser.error(
+            "--jobs must be a positive integer, or 0 to use all available CPUs"
+        )
+
+    logging.basicConfig(format="%(levelname)s: %(message)s")
+
+    ips = [ip for ip in XHEEP_IP_REGS if args.ip is None or ip.name in args.ip]
+    try:
+        generate_ips(ips, args.jobs)
+    except (ValueError, RuntimeError) as err:
+        sys.exit(f"ERROR: {err}")
+
+
+if __name__ == "__main__":
+    main()
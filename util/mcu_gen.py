@@ -12,11 +12,19 @@ import pathlib
 import sys
 import re
 import logging
+import os
+import hashlib
+import inspect
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from jsonref import JsonRef
+import mako
 from mako.template import Template
 import x_heep_gen.load_config
 from x_heep_gen.xheep import BusType
 from x_heep_gen.cpu.cpu import CPU
+from x_heep_gen.fingerprint import fingerprint
 
 
 # ANSI color codes for pretty printing
@@ -37,44 +45,365 @@ def string2int(hex_json_string):
     return (hex_json_string.split("x")[1]).split(",")[0]
 
 
-def write_template(tpl_path, outfile, **kwargs):
+def load_template(tpl_path, template_cache=None):
+    """
+    Load a Mako template, optionally using an on-disk cache of compiled templates.
+
+    The compiled module of a template is stored in template_cache under a name derived from the
+    template path, the template content and the Mako version, so it stays valid across runs and is
+    recompiled as soon as one of them changes. Outdated modules of the same template are removed.
+
+    :param pathlib.Path tpl_path: absolute path of the template
+    :param template_cache: directory of the compiled templates, None to compile in memory
+    :return: the loaded template
+    :rtype: Template
+    """
+    if template_cache is None:
+        return Template(filename=str(tpl_path))
+
+    template_cache = pathlib.Path(template_cache)
+    path_key = hashlib.sha1(str(tpl_path).encode()).hexdigest()[:16]
+    content_key = hashlib.sha1(
+        tpl_path.read_bytes() + mako.__version__.encode()
+    ).hexdigest()[:16]
+    module_name = f"{tpl_path.name.replace('.', '_')}-{path_key}-{content_key}"
+
+    # Remove the modules (and their bytecode) compiled from older versions of this template
+    stale_entries = list(template_cache.glob(f"*-{path_key}-*.py")) + list(
+        template_cache.glob(f"__pycache__/*-{path_key}-*.pyc")
+    )
+    for stale in stale_entries:
+        if not stale.name.startswith(f"{module_name}."):
+            stale.unlink(missing_ok=True)
+
+    return Template(
+        filename=str(tpl_path),
+        module_filename=str(template_cache / f"{module_name}.py"),
+    )
+
+
+def render_template(tpl, **kwargs):
+    """
+    Render a loaded template, trimming the trailing whitespaces of the lines.
+
+    :param Template tpl: the template
+    :param kwargs: arguments passed to the template
+    :return: the rendered content
+    :rtype: str
+    """
+    code = tpl.render_unicode(**kwargs, strict_undefined=True)
+    return re_trailws.sub("", code)
+
+
+def file_hash(path):
+    """
+    :param pathlib.Path path: path of a file
+    :return: the hash of the content of the file, None if it does not exist
+    """
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def write_template(tpl_path, outfile, template_cache=None, incremental=False, **kwargs):
+    """
+    Render a template into a file.
+
+    In incremental generation, the output file is only written if the rendered content differs from
+    the current content of the file, so that the modification time of unchanged files is preserved.
+    A missing output, or one edited since it was generated, is always written again.
+
+    :param pathlib.Path tpl_path: path of the template
+    :param outfile: path of the generated file, if None the template path without its extension is used
+    :param template_cache: directory of the compiled templates, None to compile in memory
+    :param bool incremental: only write the output file if its content changes
+    :param kwargs: arguments passed to the template
+    :return: the hash of the rendered content and whether the output file was written
+    :rtype: tuple[str, bool]
+    """
     if tpl_path:
         tpl_path = pathlib.Path(tpl_path).absolute()
         if tpl_path.exists():
-            tpl = Template(filename=str(tpl_path))
+            tpl = load_template(tpl_path, template_cache)
             if outfile:
-                filename = outfile
+                filename = pathlib.Path(outfile)
             else:
                 filename = tpl_path.with_suffix("")
 
+            code = render_template(tpl, **kwargs)
+            content_hash = hashlib.sha256(code.encode()).hexdigest()
+
+            if incremental and file_hash(filename) == content_hash:
+                return content_hash, False
+
             with open(filename, "w") as file:
-                code = tpl.render_unicode(**kwargs, strict_undefined=True)
-                code = re_trailws.sub("", code)
                 file.write(code)
+            return content_hash, True
         else:
             raise FileNotFoundError("Template file not found: {0}".format(tpl_path))
     else:
         raise FileNotFoundError("Template file not provided")
 
 
-def generate_xheep(args):
+# Template arguments shared by all the templates rendered in a worker process.
+# Set once per worker by _init_render_worker so the XHeep model is not sent again with every template.
+_worker_kwargs = None
+_worker_template_cache = None
 
-    if args.verbose:
-        logging.basicConfig(level=logging.DEBUG)
 
+def _init_render_worker(template_cache, kwargs):
+    global _worker_kwargs, _worker_template_cache
+    _worker_kwargs = kwargs
+    _worker_template_cache = template_cache
+
+
+def _render_worker(tpl_path, outfile, incremental):
+    return write_template(
+        tpl_path, outfile, _worker_template_cache, incremental, **_worker_kwargs
+    )
+
+
+# Matches the accesses of the templates to the parts of the XHeep model, e.g. xheep.memory_ss()
+re_xheep_accessor = re.compile(r"\bxheep\.(\w+)")
+
+
+def generator_fingerprint():
+    """
+    :return: a hash of the sources of mcu_gen.py, of the x_heep_gen package and of the Mako version.
+    :rtype: str
+    """
+    h = hashlib.sha256(mako.__version__.encode())
+    util_dir = pathlib.Path(__file__).resolve().parent
+    for source in [pathlib.Path(__file__).resolve()] + sorted(
+        util_dir.joinpath("x_heep_gen").rglob("*.py")
+    ):
+        h.update(source.read_bytes())
+    return h.hexdigest()
+
+
+def template_fingerprints(tpl_paths, **kwargs):
+    """
+    Compute a fingerprint of the inputs of each template: the template text, the template arguments
+    it uses (the values read from the HJSON configuration) and, for the XHeep model, only the parts
+    it accesses (e.g. xheep.memory_ss() or xheep.get_padring()). Each input is hashed once, even if
+    it is shared by several templates.
+
+    :param list[pathlib.Path] tpl_paths: paths of the templates
+    :param kwargs: arguments passed to the templates
+    :return: the fingerprint of each template, in the order of tpl_paths
+    :rtype: list[str]
+    """
+    generator = generator_fingerprint()
+    input_fingerprints = {}
+
+    def input_fingerprint(name):
+        if name not in input_fingerprints:
+            if name.startswith("xheep."):
+                xheep = kwargs["xheep"]
+                accessor = getattr(xheep, name[len("xheep.") :], None)
+                # Accessors that take arguments (e.g. get_extension) depend on the whole model
+                if inspect.ismethod(accessor) and not any(
+                    p.default is inspect.Parameter.empty
+                    for p in inspect.signature(accessor).parameters.values()
+                ):
+                    value = accessor()
+                else:
+                    value = xheep
+            else:
+                value = kwargs[name]
+            input_fingerprints[name] = fingerprint(value)
+        return input_fingerprints[name]
+
+    fingerprints = []
+    for tpl_path in tpl_paths:
+        text = tpl_path.read_text()
+        inputs = [
+            name
+            for name in sorted(kwargs)
+            if name != "xheep" and re.search(rf"\b{name}\b", text)
+        ]
+        if re.search(r"\bxheep\b(?!\.\w)", text):
+            inputs.append("xheep")
+        inputs += [f"xheep.{a}" for a in sorted(set(re_xheep_accessor.findall(text)))]
+
+        h = hashlib.sha256(generator.encode())
+        h.update(text.encode())
+        for name in inputs:
+            h.update(f"{name}={input_fingerprint(name)};".encode())
+        fingerprints.append(h.hexdigest())
+    return fingerprints
+
+
+def load_manifest(manifest_path):
+    """
+    Load the manifest of a previous incremental generation.
+
+    :param pathlib.Path manifest_path: path of the manifest
+    :return: the manifest entry of each generated file, empty if there is no valid manifest
+    :rtype: dict
+    """
+    try:
+        with open(manifest_path, "r") as file:
+            return json.load(file)["outputs"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def save_manifest(manifest_path, outputs, changed):
+    """
+    Save the manifest of an incremental generation.
+
+    :param pathlib.Path manifest_path: path of the manifest
+    :param dict outputs: the manifest entry of each generated file
+    :param list[str] changed: the generated files that were written by this run
+    """
+    manifest_path = pathlib.Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, "w") as file:
+        json.dump({"outputs": outputs, "changed": changed}, file, indent=2)
+
+
+def output_filename(tpl_path):
+    """
+    Generate the output filename from the template name by removing the .tpl extension.
+
+    :param pathlib.Path tpl_path: path of the template
+    :return: the path of the generated file
+    :rtype: pathlib.Path
+    """
+    tpl_str = str(tpl_path)
+    if tpl_str.endswith(".tpl"):
+        return pathlib.Path(tpl_str[:-4])
+    return tpl_path
+
+
+def write_templates(tpl_list, jobs=1, template_cache=None, manifest=None, **kwargs):
+    """
+    Render a list of templates, the output filename being generated from each template name.
+
+    With more than one job, the templates are spread over a process pool. Each worker receives the
+    template arguments (and thus the XHeep model) once when it starts. Progress and errors are
+    still reported in the order of tpl_list, so the output does not depend on the scheduling.
+
+    When a manifest is given (incremental generation), templates whose inputs have the same
+    fingerprint as in the manifest, and whose output still has the content they generated, are not
+    rendered again. The other ones are only written if their content changed. The manifest is updated with the entries of the rendered templates.
+
+    :param list[str] tpl_list: paths of the templates to render
+    :param int jobs: number of worker processes, 0 to use one per available CPU
+    :param template_cache: directory of the compiled templates, None to compile them in memory
+    :param dict manifest: manifest entries of the previous incremental run, None to always write the outputs
+    :param kwargs: arguments passed to the templates
+    :return: the generated files that were written
+    :rtype: list[str]
+    """
+    tpl_paths = [pathlib.Path(tpl.strip()) for tpl in tpl_list]
+    outfiles = [output_filename(tpl_path) for tpl_path in tpl_paths]
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    # Select the templates to render. An output that is missing, or that was edited (or reverted)
+    # since it was generated, is rendered again even if the inputs of its template did not change.
+    up_to_date = [False] * len(tpl_paths)
+    fingerprints = [None] * len(tpl_paths)
+    if manifest is not None:
+        fingerprints = template_fingerprints(tpl_paths, **kwargs)
+        for idx, (tpl_path, outfile) in enumerate(zip(tpl_paths, outfiles)):
+            entry = manifest.get(str(outfile), {})
+            up_to_date[idx] = (
+                entry.get("template") == str(tpl_path)
+                and entry.get("fingerprint") == fingerprints[idx]
+                and entry.get("content_hash") == file_hash(outfile)
+            )
+    incremental = manifest is not None
+    to_render = [idx for idx, done in enumerate(up_to_date) if not done]
+    jobs = min(jobs, len(to_render))
+
+    def results():
+        if jobs <= 1:
+            for idx in to_render:
+                yield idx, write_template(
+                    tpl_paths[idx],
+                    outfiles[idx],
+                    template_cache,
+                    incremental,
+                    **kwargs,
+                )
+            return
+
+        # Forked workers inherit the model instead of unpickling it, which also keeps working with
+        # classes defined in the Python configuration files.
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        else:
+            mp_context = None
+
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=mp_context,
+            initializer=_init_render_worker,
+            initargs=(template_cache, kwargs),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _render_worker, tpl_paths[idx], outfiles[idx], incremental
+                )
+                for idx in to_render
+            ]
+            try:
+                for idx, future in zip(to_render, futures):
+                    yield idx, future.result()
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+
+    rendered = results()
+    changed = []
+    for idx, (tpl_path, outfile) in enumerate(zip(tpl_paths, outfiles)):
+        line = f"{Colors.YELLOW}[MCU-GEN]{Colors.RESET} [{idx + 1}/{len(tpl_paths)}] {tpl_path.name} {Colors.YELLOW}→{Colors.RESET} {outfile.name}"
+        if up_to_date[idx]:
+            print(f"{line} (up to date)")
+            continue
+
+        print(line, end="" if manifest is not None else "\n", flush=True)
+        _, (content_hash, written) = next(rendered)
+        if written:
+            changed.append(str(outfile))
+        if manifest is not None:
+            print("" if written else " (unchanged)")
+            manifest[str(outfile)] = {
+                "template": str(tpl_path),
+                "fingerprint": fingerprints[idx],
+                "content_hash": content_hash,
+            }
+    return changed
+
+
+def load_xheep_config(config_path, python_config="", pads_cfg=""):
+    """
+    Load the X-HEEP configuration files, without building the system.
+
+    :param config_path: path of the general HJSON configuration
+    :param python_config: path of the general Python configuration, if empty the HJSON configuration is used
+    :param pads_cfg: path of the pads configuration
+    :return: the unbuilt XHeep model and the HJSON configuration
+    :rtype: tuple[XHeep, dict]
+    """
     # Load general configuration file.
     # This can be either the Python or HJSON config file.
     # If using the Python config file, the HJSON parameters that are supported by Python will be ignored
     # except for the peripherals. Any peripheral not configured in Python will be added from the HJSON config.
-    if args.python_config != None and args.python_config != "":
+    if python_config != None and python_config != "":
         xheep = x_heep_gen.load_config.load_cfg_file(
-            pathlib.PurePath(str(args.python_config))
+            pathlib.PurePath(str(python_config))
         )
     else:
-        xheep = x_heep_gen.load_config.load_cfg_file(pathlib.PurePath(str(args.config)))
+        xheep = x_heep_gen.load_config.load_cfg_file(pathlib.PurePath(str(config_path)))
 
     # We still need to load from the HJSON config the configuration options that are not yet supported in the Python model of X-HEEP
-    with open(args.config, "r") as file:
+    with open(config_path, "r") as file:
         try:
             srcfull = file.read()
             config = hjson.loads(srcfull, use_decimal=True)
@@ -83,28 +412,46 @@ def generate_xheep(args):
             raise SystemExit(sys.exc_info()[1])
 
     # Load pads HJSON configuration file
-    pad_ring = x_heep_gen.load_config.load_pad_cfg(pathlib.PurePath(str(args.pads_cfg)))
+    pad_ring = x_heep_gen.load_config.load_pad_cfg(pathlib.PurePath(str(pads_cfg)))
     if pad_ring is None:
-        exit(f"Error loading pads configuration file: {args.pads_cfg}")
+        exit(f"Error loading pads configuration file: {pads_cfg}")
     xheep.set_padring(pad_ring)
 
+    return xheep, config
+
+
+def configure_xheep(xheep, config, cpu="", bus="", memorybanks="", memorybanks_il=""):
+    """
+    Apply the command line overrides to the X-HEEP model, build and validate it, and compute the
+    template arguments.
+
+    :param XHeep xheep: the unbuilt XHeep model, modified in place
+    :param dict config: the HJSON configuration
+    :param str cpu: CPU type override, empty to keep the configured one
+    :param str bus: bus type override, empty to keep the configured one
+    :param memorybanks: number of continuous memory banks override, empty to keep the configured ones
+    :param memorybanks_il: number of interleaved memory banks override, empty to keep the configured ones
+    :return: the arguments passed to the templates
+    :rtype: dict
+    """
+
     try:
         has_spi_slave = 1 if config["debug"]["has_spi_slave"] == "yes" else 0
     except KeyError:
         has_spi_slave = 0
 
-    if args.bus != None and args.bus != "":
-        xheep.set_bus_type(BusType(args.bus))
+    if bus != None and bus != "":
+        xheep.set_bus_type(BusType(bus))
 
-    if args.memorybanks != None and args.memorybanks != "":
-        xheep.memory_ss().override_ram_banks(int(args.memorybanks))
+    if memorybanks != None and memorybanks != "":
+        xheep.memory_ss().override_ram_banks(int(memorybanks))
 
-    if args.memorybanks_il != None and args.memorybanks_il != "":
-        xheep.memory_ss().override_ram_banks_il(int(args.memorybanks_il))
+    if memorybanks_il != None and memorybanks_il != "":
+        xheep.memory_ss().override_ram_banks_il(int(memorybanks_il))
 
     # Override CPU setting if specified in the make arguments
-    if args.cpu != None and args.cpu != "":
-        xheep.set_cpu(CPU(args.cpu))
+    if cpu != None and cpu != "":
+        xheep.set_cpu(CPU(cpu))
 
     debug_start_address = string2int(config["debug"]["address"])
     if int(debug_start_address, 16) < int("10000", 16):
@@ -166,6 +513,17 @@ def generate_xheep(args):
     return kwargs
 
 
+def generate_xheep(args):
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+
+    xheep, config = load_xheep_config(args.config, args.python_config, args.pads_cfg)
+    return configure_xheep(
+        xheep, config, args.cpu, args.bus, args.memorybanks, args.memorybanks_il
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(prog="mcugen")
 
@@ -257,8 +615,36 @@ def main():
         "Intended for templates that are not in the X-HEEP repository, e.g. in the user's CHEEP repository.",
     )
 
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of processes used to render multiple templates in parallel, 0 to use all available CPUs (default 1)",
+    )
+
+    parser.add_argument(
+        "--template_cache",
+        type=pathlib.Path,
+        required=False,
+        help="Directory where compiled templates are cached across runs. If not provided, templates are compiled at every run.",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        type=pathlib.Path,
+        required=False,
+        help="Enable the incremental generation: templates are only rendered if their inputs changed, and files are only written if their content changed. "
+        "The manifest file keeps the fingerprints between runs and lists the files written by the last run.",
+    )
+
     args = parser.parse_args()
 
+    if args.jobs < 0:
+        parser.error(
+            "--jobs must be a positive integer, or 0 to use all available CPUs"
+        )
+
     print(f"{Colors.BLUE}[MCU-GEN]{Colors.RESET} Generating X-HEEP configuration...")
     kwargs = generate_xheep(args)
     print(
@@ -269,13 +655,32 @@ def main():
     outtpl_list = [t for t in re.split(r"[,\s]+", args.outtpl or "") if t]
     externaltpl_list = [t for t in re.split(r"[,\s]+", args.externaltpl or "") if t]
 
+    # Incremental generation
+    manifest = load_manifest(args.manifest) if args.manifest else None
+    changed = []
+
     if len(outtpl_list) == 1:  # Single template case
         if externaltpl_list:
             parser.error("Cannot specify --externaltpl when using a single template.")
         print(
             f"{Colors.BLUE}[MCU-GEN]{Colors.RESET} Processing template: {Colors.BOLD}{outtpl_list[0]}{Colors.RESET}"
         )
-        write_template(pathlib.Path(outtpl_list[0]), args.outfile, **kwargs)
+        if manifest is not None:
+            outfile = args.outfile or output_filename(pathlib.Path(outtpl_list[0]))
+        content_hash, written = write_template(
+            pathlib.Path(outtpl_list[0]),
+            args.outfile,
+            args.template_cache,
+            manifest is not None,
+            **kwargs,
+        )
+        if manifest is not None:
+            manifest[str(outfile)] = {
+                "template": str(pathlib.Path(outtpl_list[0])),
+                "content_hash": content_hash,
+            }
+            if written:
+                changed.append(str(outfile))
         print(f"{Colors.GREEN}[MCU-GEN]{Colors.RESET} Template processed successfully")
     else:
         # Multiple templates case
@@ -286,18 +691,9 @@ def main():
         print(
             f"{Colors.BLUE}[MCU-GEN]{Colors.RESET} Processing {Colors.BOLD}{len(outtpl_list)}{Colors.RESET} templates..."
         )
-        for idx, tpl in enumerate(outtpl_list, 1):
-            tpl_path = pathlib.Path(tpl.strip())
-            # Generate output filename from template name by removing .tpl extension
-            tpl_str = str(tpl_path)
-            if tpl_str.endswith(".tpl"):
-                generated_outfile = pathlib.Path(tpl_str[:-4])
-            else:
-                generated_outfile = tpl_path
-            print(
-                f"{Colors.YELLOW}[MCU-GEN]{Colors.RESET} [{idx}/{len(outtpl_list)}] {tpl_path.name} {Colors.YELLOW}→{Colors.RESET} {generated_outfile.name}"
-            )
-            write_template(tpl_path, generated_outfile, **kwargs)
+        changed += write_templates(
+            outtpl_list, args.jobs, args.template_cache, manifest, **kwargs
+        )
         print(
             f"{Colors.GREEN}[MCU-GEN]{Colors.RESET} All templates processed successfully"
         )
@@ -306,22 +702,19 @@ def main():
             print(
                 f"{Colors.BLUE}[MCU-GEN]{Colors.RESET} Processing {Colors.BOLD}{len(externaltpl_list)}{Colors.RESET} external templates..."
             )
-            for idx, tpl in enumerate(externaltpl_list, 1):
-                tpl_path = pathlib.Path(tpl.strip())
-                # Generate output filename from template name by removing .tpl extension
-                tpl_str = str(tpl_path)
-                if tpl_str.endswith(".tpl"):
-                    generated_outfile = pathlib.Path(tpl_str[:-4])
-                else:
-                    generated_outfile = tpl_path
-                print(
-                    f"{Colors.YELLOW}[MCU-GEN]{Colors.RESET} [{idx}/{len(externaltpl_list)}] {tpl_path.name} {Colors.YELLOW}→{Colors.RESET} {generated_outfile.name}"
-                )
-                write_template(tpl_path, generated_outfile, **kwargs)
+            changed += write_templates(
+                externaltpl_list, args.jobs, args.template_cache, manifest, **kwargs
+            )
             print(
                 f"{Colors.GREEN}[MCU-GEN]{Colors.RESET} All external templates processed successfully"
             )
 
+    if manifest is not None:
+        save_manifest(args.manifest, manifest, changed)
+        print(
+            f"{Colors.GREEN}[MCU-GEN]{Colors.RESET} {Colors.BOLD}{len(changed)}{Colors.RESET} generated files changed, see {args.manifest}"
+        )
+
 
 if __name__ == "__main__":
     main()
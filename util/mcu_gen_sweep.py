@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Description: Design-space sweep over the X-HEEP configuration model. Builds and validates every
+#   combination of a parameter grid (configuration files, CPU, bus, memory banks) and renders the
+#   mcu-gen templates of each valid variant into its own output directory.
+
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from mcu_gen import (
+    Colors,
+    configure_xheep,
+    load_template,
+    load_xheep_config,
+    output_filename,
+    render_template,
+)
+
+
+class Variant:
+    """
+    A point of the design space.
+
+    :param str config: path of the general HJSON configuration
+    :param str python_config: path of the general Python configuration, empty to only use the HJSON one
+    :param str pads_cfg: path of the pads configuration
+    :param str cpu: CPU type, empty to keep the configured one
+    :param str bus: bus type, empty to keep the configured one
+    :param str memorybanks: number of continuous memory banks, empty to keep the configured ones
+    :param str memorybanks_il: number of interleaved memory banks, empty to keep the configured ones
+    """
+
+    def __init__(
+        self,
+        config: str,
+        python_config: str,
+        pads_cfg: str,
+        cpu: str = "",
+        bus: str = "",
+        memorybanks: str = "",
+        memorybanks_il: str = "",
+    ):
+        self.config = config
+        self.python_config = python_config
+        self.pads_cfg = pads_cfg
+        self.cpu = cpu
+        self.bus = bus
+        self.memorybanks = memorybanks
+        self.memorybanks_il = memorybanks_il
+
+    def config_key(self):
+        """
+        :return: the configuration files of the variant, which identify the parsed configuration it is built from.
+        :rtype: tuple[str, str, str]
+        """
+        return (self.config, self.python_config, self.pads_cfg)
+
+    def name(self) -> str:
+        """
+        :return: a name identifying the variant, also used as its output directory. It ends with
+            a short hash of the paths of all the configuration files, so that variants of configurations
+            with the same name (e.g. in different directories) do not share a directory.
+        :rtype: str
+        """
+        config = pathlib.Path(self.python_config or self.config).stem
+        config_paths = "\0".join(
+            str(pathlib.Path(path).resolve()) if path else ""
+            for path in self.config_key()
+        )
+        return "-".join(
+            [
+                config,
+                hashlib.sha256(config_paths.encode()).hexdigest()[:8],
+                self.cpu or "cfgcpu",
+                self.bus or "cfgbus",
+                f"b{self.memorybanks or 'cfg'}",
+                f"il{self.memorybanks_il or 'cfg'}",
+            ]
+        )
+
+
+def make_grid(
+    configs: List[str],
+    python_configs: List[str],
+    pads_cfg: str,
+    cpus: List[str],
+    buses: List[str],
+    memorybanks: List[str],
+    memorybanks_il: List[str],
+) -> List[Variant]:
+    """
+    Build the cartesian product of the parameter values. An empty list of values (or the value "")
+    keeps the value of the configuration files.
+
+    :return: the variants of the grid
+    :rtype: list[Variant]
+    """
+    return [
+        Variant(config, python_config, pads_cfg, cpu, bus, banks, banks_il)
+        for config, python_config, cpu, bus, banks, banks_il in itertools.product(
+            configs or [""],
+            python_configs or [""],
+            cpus or [""],
+            buses or [""],
+            memorybanks or [""],
+            memorybanks_il or [""],
+        )
+    ]
+
+
+# Parsed configurations and compiled templates shared by all the variants rendered in a process.
+# When the workers are forked, they inherit the ones loaded by the main process.
+_configs = {}
+_templates = {}
+_template_cache = None
+
+
+def _init_sweep_worker(configs, templates, template_cache):
+    global _configs, _templates, _template_cache
+    _configs = configs
+    _templates = templates
+    _template_cache = template_cache
+
+
+def _get_config(variant: Variant):
+    key = variant.config_key()
+    if key not in _configs:
+        _configs[key] = load_xheep_config(*key)
+    return _configs[key]
+
+
+def _get_template(tpl_path: pathlib.Path):
+    if tpl_path not in _templates:
+        _templates[tpl_path] = load_template(tpl_path, _template_cache)
+    return _templates[tpl_path]
+
+
+def output_path(outdir: pathlib.Path, variant: Variant, tpl_path: pathlib.Path):
+    """
+    :return: the path where the template is rendered for the variant, i.e. the path of the file generated by mcu-gen, relative to the current directory, inside the directory of the variant.
+    :rtype: pathlib.Path
+    """
+    generated = pathlib.Path(os.path.relpath(output_filename(tpl_path)))
+    if generated.parts and generated.parts[0] == "..":
+        generated = pathlib.Path(generated.name)
+    return outdir.joinpath(variant.name(), generated)
+
+
+def run_variant(variant: Variant, tpl_paths: List[pathlib.Path], outdir, render=True):
+    """
+    Build and validate a variant, and render the templates into its output directory.
+
+    :param Variant variant: the variant
+    :param list[pathlib.Path] tpl_paths: absolute paths of the templates
+    :param pathlib.Path outdir: the directory containing the output directories of the variants
+    :param bool render: if False, the variant is only built and validated
+    :return: the summary of the variant
+    :rtype: dict
+    """
+    summary = {
+        "variant": variant.name(),
+        "config": variant.config,
+        "python_config": variant.python_config,
+        "cpu": variant.cpu,
+        "bus": variant.bus,
+        "memorybanks": variant.memorybanks,
+        "memorybanks_il": variant.memorybanks_il,
+        "valid": False,
+        "error": "",
+        "generated": [],
+    }
+    try:
+        xheep, config = _get_config(variant)
+        kwargs = configure_xheep(
+            copy.deepcopy(xheep),
+            config,
+            variant.cpu,
+            variant.bus,
+            variant.memorybanks,
+            variant.memorybanks_il,
+        )
+    except (Exception, SystemExit) as err:
+        # configure_xheep exits on some invalid configurations
+        summary["error"] = str(err).splitlines()[0] if str(err) else type(err).__name__
+        return summary
+
+    xheep = kwargs["xheep"]
+    summary["valid"] = True
+    summary["cpu"] = xheep.cpu().get_name()
+    summary["bus"] = xheep.bus_type().value
+    summary["memorybanks"] = xheep.memory_ss().ram_numbanks()
+    summary["memorybanks_il"] = xheep.memory_ss().ram_numbanks_il()
+    summary["ram_size"] = xheep.memory_ss().ram_size_address()
+    summary["peripherals"] = sum(
+        len(domain.get_peripherals())
+        for domain in [
+            xheep.get_base_peripheral_domain(),
+            xheep.get_user_peripheral_domain(),
+        ]
+        if domain is not None
+    )
+
+    if render:
+        for tpl_path in tpl_paths:
+            outfile = output_path(outdir, variant, tpl_path)
+            outfile.parent.mkdir(parents=True, exist_ok=True)
+            with open(outfile, "w") as file:
+                file.write(render_template(_get_template(tpl_path), **kwargs))
+            summary["generated"].append(str(outfile))
+    return summary
+
+
+def run_sweep(
+    variants: List[Variant],
+    tpl_list: List[str],
+    outdir,
+    jobs: int = 1,
+    template_cache=None,
+    render: bool = True,
+):
+    """
+    Build, validate and render all the variants, over a process pool if jobs is not 1.
+
+    The configuration files are parsed once, and the templates are compiled once, before starting
+    the workers, which inherit them when they are forked (otherwise each worker loads them once).
+
+    :param list[Variant] variants: the variants
+    :param list[str] tpl_list: paths of the templates
+    :param outdir: the directory containing the output directories of the variants
+    :param int jobs: number of worker processes, 0 to use one per available CPU
+    :param template_cache: directory of the compiled templates, None to compile them in memory
+    :param bool render: if False, the variants are only built and validated
+    :return: the summary of each variant, in the order of variants
+    :rtype: list[dict]
+    """
+    global _template_cache
+    tpl_paths = [pathlib.Path(tpl.strip()).absolute() for tpl in tpl_list]
+    outdir = pathlib.Path(outdir)
+    _template_cache = template_cache
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(variants))
+
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    if jobs <= 1 or fork:
+        for variant in variants:
+            try:
+                _get_config(variant)
+            except (Exception, SystemExit):
+                pass  # Reported by run_variant
+        if render:
+            for tpl_path in tpl_paths:
+                _get_template(tpl_path)
+
+    if jobs <= 1:
+        return [run_variant(v, tpl_paths, outdir, render) for v in variants]
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context("fork") if fork else None,
+        initializer=_init_sweep_worker,
+        initargs=(
+            _configs if fork else {},
+            _templates if fork else {},
+            template_cache,
+        ),
+    ) as executor:
+        futures = [
+            executor.submit(run_variant, v, tpl_paths, outdir, render) for v in variants
+        ]
+        return [future.result() for future in futures]
+
+
+def print_summary(summaries: List[dict]):
+    """
+    Print a table with the result of each variant.
+
+    :param list[dict] summaries: the summaries returned by run_sweep
+    """
+    header = ["Variant", "Valid", "RAM (KiB)", "Peripherals", "Files", "Error"]
+    rows = []
+    for s in summaries:
+        rows.append(
+            [
+                s["variant"],
+                "yes" if s["valid"] else "no",
+                str(s["ram_size"] // 1024) if s["valid"] else "-",
+                str(s["peripherals"]) if s["valid"] else "-",
+                str(len(s["generated"])),
+                s["error"],
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+
+    def print_row(row, color=""):
+        cells = [cell.ljust(width) for cell, width in zip(row, widths)]
+        print(color + " | ".join(cells).rstrip() + (Colors.RESET if color else ""))
+
+    print_row(header, Colors.BOLD)
+    print("-+-".join("-" * width for width in widths))
+    for s, row in zip(summaries, rows):
+        print_row(row, Colors.GREEN if s["valid"] else Colors.RED)
+
+    num_valid = sum(s["valid"] for s in summaries)
+    print(
+        f"{Colors.BLUE}[MCU-GEN-SWEEP]{Colors.RESET} {num_valid}/{len(summaries)} valid variants"
+    )
+
+
+def split_list(values):
+    """
+    :return: the values of a comma or space separated list argument
+    :rtype: list[str]
+    """
+    return [v for v in re.split(r"[,\s]+", values or "") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="mcu_gen_sweep",
+        description="Builds, validates and generates every combination of the given X-HEEP parameters. "
+        "Each list argument is a comma-separated list of values, an empty list keeps the value of the configuration files.",
+    )
+    parser.add_argument(
+        "--config",
+        required=True,
+        help="X-HEEP general HJSON configurations",
+    )
+    parser.add_argument(
+        "--python_config",
+        default="",
+        help="X-HEEP general Python configurations",
+    )
+    parser.add_argument(
+        "--pads_cfg",
+        "-pc",
+        required=True,
+        help="Pads configuration",
+    )
+    parser.add_argument(
+        "--cpu", default="", help="CPU types (cv32e20,cv32e40p,cv32e40x,cv32e40px)"
+    )
+    parser.add_argument("--bus", default="", help="Bus types (onetoM,NtoM)")
+    parser.add_argument(
+        "--memorybanks", default="", help="Numbers of continuous memory banks"
+    )
+    parser.add_argument(
+        "--memorybanks_il", default="", help="Numbers of interleaved memory banks"
+    )
+    parser.add_argument(
+        "--outtpl",
+        "-ot",
+        default="",
+        help="Templates to render for each variant",
+    )
+    parser.add_argument(
+        "--outdir",
+        type=pathlib.Path,
+        required=True,
+        help="Directory where the output directory of each variant is created",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of processes used to run the variants in parallel, 0 to use all available CPUs (default 1)",
+    )
+    parser.add_argument(
+        "--template_cache",
+        type=pathlib.Path,
+        required=False,
+        help="Directory where compiled templates are cached across runs",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only build and validate the variants, without rendering the templates",
+    )
+    parser.add_argument(
+        "--summary",
+        type=pathlib.Path,
+        required=False,
+        help="JSON file where the summary of the variants is written (default: <outdir>/summary.json)",
+    )
+    args = parser.parse_args()
+
+    if args.jobs < 0:
+        parser.error(
+            "--jobs must be a positive integer, or 0 to use all available CPUs"
+        )
+
+    variants = make_grid(
+        split_list(args.config),
+        split_list(args.python_config),
+        args.pads_cfg,
+        split_list(args.cpu),
+        split_list(args.bus),
+        split_list(args.memorybanks),
+        split_list(args.memorybanks_il),
+    )
+    print(
+        f"{Colors.BLUE}[MCU-GEN-SWEEP]{Colors.RESET} Running {Colors.BOLD}{len(variants)}{Colors.RESET} variants..."
+    )
+    summaries = run_sweep(
+        variants,
+        split_list(args.outtpl),
+        args.outdir,
+        args.jobs,
+        args.template_cache,
+        not args.validate_only,
+    )
+    print_summary(summaries)
+
+    summary_path = args.summary or args.outdir.joinpath("summary.json")
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_path, "w") as file:
+        json.dump(summaries, file, indent=2)
+    print(
+        f"{Colors.BLUE}[MCU-GEN-SWEEP]{Colors.RESET} Summary written to {summary_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -392,30 +392,54 @@ def add_registers(peripheral_hjson):
     return reg_struct, reg_enum
 
 
-def format_dma_channels(file_path):
+def format_dma_channels(content):
     """
-    Formats the DMA peripheral file to support multiple channels.
-    :param file_path: The path to the DMA peripheral file.
+    Formats the DMA peripheral header to support multiple channels.
+    :param content: The content of the DMA peripheral header.
+    :return: the content with the base address of the registers of each channel
     """
-    try:
-        # Read the contents of the file
-        with open(file_path, "r") as file:
-            content = file.read()
-
-        # Replace 'DMA_START_ADDRESS' with 'new_address'
-        updated_content = content.replace(
-            "#define dma_peri ((volatile dma *) DMA_START_ADDRESS)",
-            "#define dma_peri(channel) ((volatile dma *) (DMA_START_ADDRESS + DMA_CH_SIZE * channel))",
-        )
+    # Replace 'DMA_START_ADDRESS' with the address of the channel
+    return content.replace(
+        "#define dma_peri ((volatile dma *) DMA_START_ADDRESS)",
+        "#define dma_peri(channel) ((volatile dma *) (DMA_START_ADDRESS + DMA_CH_SIZE * channel))",
+    )
+
+
+def generate_structs(data, input_template, header_filename="core_v_mini_mcu.h"):
+    """
+    Generates the structs and enums of the registers of a peripheral and formats them using the template.
+
+    :param data: the hjson-like description of the registers of the peripheral
+    :param input_template: filename of the template for the final file generation
+    :param header_filename: name of the file in which register addresses are found
+    :return: the string containing the formatted template
+    """
+
+    # Two strings used to store all the structs and enums #
+    structs_definitions = "typedef struct {\n"  # used to store all the struct definitions to write in the template in the end
+    enums_definitions = ""  # used to store all the enums definitions, if present
+
+    # START OF THE GENERATION #
+
+    reg_structs, reg_enums = add_registers(data)
+    structs_definitions += reg_structs
+    enums_definitions += reg_enums
+
+    structs_definitions += "}} {};".format(data["name"])
+
+    final_output = write_template(
+        input_template,
+        structs_definitions,
+        enums_definitions,
+        data["name"],
+        header_filename,
+    )
 
-        # Write the updated content back to the file
-        with open(file_path, "w") as file:
-            file.write(updated_content)
+    # Formats the DMA peripheral to support multiple channels
+    if data["name"].lower() == "dma":
+        final_output = format_dma_channels(final_output)
 
-    except FileNotFoundError:
-        print(f"The file {file_path} does not exist.")
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
+    return final_output
 
 
 def main(arg_vect):
@@ -447,36 +471,10 @@ def main(arg_vect):
 
     args = parser.parse_args(arg_vect)
 
-    input_template = args.template_filename
-    input_hjson_file = args.hjson_filename
-    output_filename = args.output_filename
-    header_filename = args.header_filename
-
-    data = read_hjson(input_hjson_file)
+    data = read_hjson(args.hjson_filename)
 
-    # Two strings used to store all the structs and enums #
-    structs_definitions = "typedef struct {\n"  # used to store all the struct definitions to write in the template in the end
-    enums_definitions = ""  # used to store all the enums definitions, if present
-
-    # START OF THE GENERATION #
-
-    reg_structs, reg_enums = add_registers(data)
-    structs_definitions += reg_structs
-    enums_definitions += reg_enums
-
-    structs_definitions += "}} {};".format(data["name"])
-
-    final_output = write_template(
-        input_template,
-        structs_definitions,
-        enums_definitions,
-        data["name"],
-        header_filename,
-    )
-    write_output(output_filename, final_output)
-
-    if data["name"].lower() == "dma":
-        format_dma_channels(output_filename)
+    final_output = generate_structs(data, args.template_filename, args.header_filename)
+    write_output(args.output_filename, final_output)
 
 
 if __name__ == "__main__":
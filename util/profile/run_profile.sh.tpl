@@ -1,15 +1,17 @@
 #!/bin/bash
-# Script that runs the rv_profile tool to generate a flamegraph after RTL
-# simulation.
+# Script that profiles the firmware of the last RTL simulation with the
+# xheep_profile package and generates a flamegraph.
 # Args:
-#  <rv_profile> : Path to the rv_profile tool
-RV_PROFILE=$1
+#  <python> : Path to the Python interpreter
+#  [args]   : Additional arguments of xheep_profile (e.g. --dump-trace trace.txt.gz)
+PYTHON=$1
 
-# Check if the rv_profile tool is provided
-if [ -z "$RV_PROFILE" ]; then
-    echo "Usage: $0 <rv_profile>"
+# Check if the Python interpreter is provided
+if [ -z "$PYTHON" ]; then
+    echo "Usage: $0 <python> [args]"
     exit 1
 fi
+shift
 
 # Get the upper root directory
 ROOT_DIR=$(git rev-parse --show-toplevel 2>/dev/null || realpath "$(dirname "$0")/../..")
@@ -30,7 +32,9 @@ PROFILE_REPORT_DIR=$ROOT_DIR/util/profile
 PROFILE_CONFIG_FILE=$PROFILE_REPORT_DIR/configs/${xheep.cpu().get_name()}.wal
 
 # Run the profiler
-$RV_PROFILE --elf $ROOT_DIR/sw/build/main.elf \
+PYTHONPATH=$PROFILE_REPORT_DIR $PYTHON -m xheep_profile \
+            --elf $ROOT_DIR/sw/build/main.elf \
             --fst $WAVE_FILE \
             --cfg $PROFILE_CONFIG_FILE \
-            --out $PROFILE_REPORT_DIR/flamegraph.svg
\ No newline at end of file
+            --out $PROFILE_REPORT_DIR/flamegraph.svg \
+            "$@"
\ No newline at end of file
@@ -0,0 +1,113 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Profiles a firmware from an RTL simulation: reconstructs the call stacks of the executed
+instructions and writes the cycles of each function and a flamegraph.
+
+Examples (with util/profile in the PYTHONPATH):
+    python3 -m xheep_profile --elf sw/build/main.elf --fst build/.../waveform.fst \\
+        --cfg util/profile/configs/cv32e20.wal --out util/profile/flamegraph.svg \\
+        --dump-trace util/profile/trace.txt.gz
+    python3 -m xheep_profile --elf sw/build/main.elf --trace util/profile/trace.txt.gz \\
+        --out util/profile/flamegraph.svg
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from .config import ProfileConfig
+from .flamegraph import write_flamegraph
+from .profiler import Profiler
+from .symbols import SymbolIndex
+from .trace import FST2VCD, open_text, read_fst, read_pc_trace, read_vcd, write_pc_trace
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile a firmware from the waveform or the PC trace of an RTL simulation"
+    )
+    parser.add_argument("--elf", required=True, help="ELF of the firmware (main.elf).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fst", help="FST waveform of the simulation.")
+    source.add_argument(
+        "--vcd", help="VCD waveform of the simulation (.vcd or .vcd.gz)."
+    )
+    source.add_argument(
+        "--trace", help="PC trace written by --dump-trace (.txt or .txt.gz)."
+    )
+    parser.add_argument(
+        "--cfg",
+        help="WAL configuration of the CPU (util/profile/configs/<cpu>.wal), needed for the waveforms.",
+    )
+    parser.add_argument(
+        "--out", default="flamegraph.svg", help="Flamegraph (default flamegraph.svg)."
+    )
+    parser.add_argument(
+        "--folded",
+        help="Collapsed stacks, for flamegraph.pl or speedscope (default: next to --out).",
+    )
+    parser.add_argument(
+        "--report",
+        help="Exclusive and inclusive cycles of each function (default: next to --out).",
+    )
+    parser.add_argument(
+        "--dump-trace",
+        help="Also write the PC trace of the waveform, to profile it again without the waveform.",
+    )
+    parser.add_argument(
+        "--fst2vcd",
+        default=FST2VCD,
+        help=f"Program converting the FST to VCD (default {FST2VCD}).",
+    )
+    args = parser.parse_args()
+
+    base = os.path.splitext(args.out)[0]
+    folded = args.folded or base + ".folded"
+    report = args.report or base + ".txt"
+
+    start = time.time()
+    try:
+        symbols = SymbolIndex.from_elf(args.elf)
+        if args.trace:
+            steps = read_pc_trace(args.trace)
+        else:
+            if not args.cfg:
+                parser.error("--cfg is needed to profile a waveform")
+            config = ProfileConfig.from_wal(args.cfg)
+            if args.fst:
+                steps = read_fst(args.fst, config, args.fst2vcd)
+            else:
+                waveform = open_text(args.vcd)
+                steps = read_vcd(waveform, config)
+            if args.dump_trace:
+                steps = write_pc_trace(steps, args.dump_trace)
+
+        profiler = Profiler(symbols)
+        profiler.run(steps)
+    except (OSError, ValueError, RuntimeError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+
+    if not profiler.stacks:
+        print("ERROR: No instruction was executed in the trace", file=sys.stderr)
+        return 1
+
+    write_flamegraph(profiler.stacks, args.out, title=os.path.basename(args.elf))
+    profiler.write_collapsed(folded)
+    profiler.write_report(report)
+    print(
+        f"Profiled {profiler.instructions} instructions, {profiler.total_cycles} cycles "
+        f"in {time.time() - start:.1f} s"
+    )
+    print(f"Flamegraph: {args.out}")
+    print(f"Collapsed stacks: {folded}")
+    print(f"Report: {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
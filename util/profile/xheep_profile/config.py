@@ -0,0 +1,69 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import re
+
+# Signals that every configuration must define
+REQUIRED_SIGNALS = ("clk", "rst_ni", "pc", "instr", "instr_valid")
+
+ALIAS_PATTERN = re.compile(r"\(alias\s+(\S+)\s+([^\s()]+)\)")
+FIRE_PATTERN = re.compile(r"\(defmacro\s+fire\s+\[\]\s+`\(&&\s+([^()]*)\)\)")
+INDEX_PATTERN = re.compile(r"[<(\[](\d+)[>)\]]")
+
+
+def normalize_signal(name):
+    """
+    :return: The hierarchical name of a signal with its index written as [i], since the .wal
+        configurations write mhpmcounter<0> and the waveform dumpers mhpmcounter(0) or
+        mhpmcounter[0].
+    """
+    return INDEX_PATTERN.sub(r"[\1]", name)
+
+
+class ProfileConfig:
+    """
+    Signals of a CPU used to profile a simulation, read from its WAL configuration
+    (util/profile/configs/<cpu>.wal): the clock, the reset, the PC, the instruction and the
+    instruction valid of the decode stage, and the signals whose conjunction (the fire macro) tells
+    that an instruction is in the decode stage.
+    """
+
+    def __init__(self, signals, fire):
+        """
+        Constructor for ProfileConfig.
+
+        :param dict signals: The hierarchical name of each alias.
+        :param list fire: The aliases of the fire macro.
+        """
+        missing = [alias for alias in REQUIRED_SIGNALS if alias not in signals]
+        if missing:
+            raise ValueError(
+                f"Missing signals in the configuration: {', '.join(missing)}"
+            )
+        undefined = [alias for alias in fire if alias not in signals]
+        if undefined:
+            raise ValueError(
+                f"Undefined signals in the fire macro: {', '.join(undefined)}"
+            )
+        self.signals = signals
+        self.fire = fire
+
+    @classmethod
+    def from_wal(cls, path):
+        """
+        :return: The ProfileConfig of a .wal file, which defines the signals with alias and fire
+            with a defmacro of a conjunction of aliases.
+        """
+        with open(path, "r") as f:
+            content = f.read()
+        content = "\n".join(line.split(";", 1)[0] for line in content.splitlines())
+
+        signals = dict(ALIAS_PATTERN.findall(content))
+        fire_match = FIRE_PATTERN.search(content)
+        fire = (
+            fire_match.group(1).split()
+            if fire_match
+            else ["clk", "rst_ni", "instr_valid"]
+        )
+        return cls(signals, fire)
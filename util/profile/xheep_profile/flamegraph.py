@@ -0,0 +1,101 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import html
+import zlib
+
+# Geometry of the flamegraph, in pixels
+WIDTH = 1200
+FRAME_HEIGHT = 16
+MARGIN = 10
+TITLE_HEIGHT = 30
+FONT_SIZE = 12
+CHAR_WIDTH = 7
+MIN_FRAME_WIDTH = 0.1
+
+
+def build_tree(stacks):
+    """
+    :param dict stacks: The cycles of each call stack (tuple of functions, outermost first).
+
+    :return: The root of the call tree, a [cycles, children] list where children maps the
+        function names to their own [cycles, children] lists.
+    """
+    root = [0, {}]
+    for stack, cycles in stacks.items():
+        node = root
+        node[0] += cycles
+        for function in stack:
+            node = node[1].setdefault(function, [0, {}])
+            node[0] += cycles
+    return root
+
+
+def frame_color(name):
+    """
+    :return: The warm color of a frame, derived from the function name so that a function keeps
+        its color across flamegraphs.
+    """
+    h = zlib.crc32(name.encode())
+    return f"rgb({205 + h % 50},{80 + (h >> 8) % 150},{(h >> 16) % 55})"
+
+
+def write_flamegraph(stacks, path, title="Flame Graph", unit="cycles"):
+    """
+    Write the flamegraph of the call stacks as a standalone SVG: the width of a frame is the share
+    of the cycles of its function in its call stack, its callees are stacked above it.
+
+    :param dict stacks: The cycles of each call stack (tuple of functions, outermost first).
+    :param str path: The path of the SVG.
+    :param str title: The title of the flamegraph.
+    :param str unit: The unit of the counts, shown in the tooltips.
+    """
+    root = build_tree(stacks)
+    total = root[0] or 1
+    scale = (WIDTH - 2 * MARGIN) / total
+
+    frames = []
+    max_depth = 0
+    # Depth-first traversal with an explicit stack: (name, node, x, depth)
+    pending = [("all", root, MARGIN, 0)]
+    while pending:
+        name, node, x, depth = pending.pop()
+        width = node[0] * scale
+        if width < MIN_FRAME_WIDTH:
+            continue
+        frames.append((name, node[0], x, depth, width))
+        max_depth = max(max_depth, depth)
+        child_x = x
+        for child_name, child in sorted(node[1].items()):
+            pending.append((child_name, child, child_x, depth + 1))
+            child_x += child[0] * scale
+
+    height = TITLE_HEIGHT + (max_depth + 1) * FRAME_HEIGHT + 2 * MARGIN
+    with open(path, "w") as f:
+        f.write(
+            f'<?xml version="1.0" standalone="no"?>\n'
+            f'<svg version="1.1" width="{WIDTH}" height="{height}" viewBox="0 0 {WIDTH} {height}" '
+            f'xmlns="http://www.w3.org/2000/svg" font-family="Verdana" font-size="{FONT_SIZE}">\n'
+            f'<rect x="0" y="0" width="{WIDTH}" height="{height}" fill="#f8f8f8"/>\n'
+            f'<text x="{WIDTH / 2}" y="{TITLE_HEIGHT - 10}" text-anchor="middle" font-size="{FONT_SIZE + 5}">'
+            f"{html.escape(title)}</text>\n"
+        )
+        for name, count, x, depth, width in frames:
+            y = height - MARGIN - (depth + 1) * FRAME_HEIGHT
+            label = html.escape(name)
+            fill = "rgb(200,200,200)" if depth == 0 else frame_color(name)
+            f.write(
+                f"<g><title>{label} ({count} {unit}, {100 * count / total:.2f}%)</title>"
+                f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{FRAME_HEIGHT - 1}" '
+                f'fill="{fill}" rx="2" ry="2"/>'
+            )
+            # Only the labels that fit in the frame are drawn, truncated with ..
+            chars = int((width - 6) // CHAR_WIDTH)
+            if chars >= 3:
+                text = name if len(name) <= chars else name[: chars - 2] + ".."
+                f.write(
+                    f'<text x="{x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{html.escape(text)}</text>'
+                )
+            f.write("</g>\n")
+        f.write("</svg>\n")
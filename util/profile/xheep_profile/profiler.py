@@ -0,0 +1,180 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+# Link registers of the RISC-V calling convention (ra and t0)
+LINK_REGISTERS = (1, 5)
+
+# Maximum depth of the reconstructed call stack, deeper calls replace the innermost function
+MAX_STACK_DEPTH = 256
+
+# Kinds of control transfer of an instruction
+CALL = 1
+RETURN = 2
+
+
+def control_transfer(instr):
+    """
+    :param int instr: The encoding of the instruction, 32-bit or compressed.
+
+    :return: CALL if the instruction is a call (jal or jalr writing a link register), RETURN if it
+        is a return (jalr to a link register without writing a register), None otherwise.
+    """
+    if instr is None:
+        return None
+    if instr & 0x3 == 0x3:
+        opcode = instr & 0x7F
+        rd = (instr >> 7) & 0x1F
+        if opcode == 0x6F:
+            # jal
+            return CALL if rd in LINK_REGISTERS else None
+        if opcode == 0x67:
+            # jalr
+            rs1 = (instr >> 15) & 0x1F
+            if rd in LINK_REGISTERS:
+                return CALL
+            if rd == 0 and rs1 in LINK_REGISTERS:
+                return RETURN
+        return None
+
+    # Compressed instruction
+    quadrant = instr & 0x3
+    funct3 = (instr >> 13) & 0x7
+    if quadrant == 0x1 and funct3 == 0x1:
+        # c.jal (RV32 only)
+        return CALL
+    if quadrant == 0x2 and funct3 == 0x4 and (instr >> 2) & 0x1F == 0:
+        rs1 = (instr >> 7) & 0x1F
+        if rs1 == 0:
+            return None
+        if (instr >> 12) & 0x1:
+            # c.jalr
+            return CALL
+        # c.jr
+        return RETURN if rs1 in LINK_REGISTERS else None
+    return None
+
+
+class Profiler:
+    """
+    Reconstructs the call stack of the executed instructions and counts the cycles of each stack.
+    A call pushes the function of the next instruction and a return pops it. Any other change of
+    function (a tail call, a trap, a longjmp) returns to the function if it is in the stack, and
+    pushes it otherwise, so that the stack resynchronizes after the control transfers that are not
+    decoded. The memory only depends on the number of distinct stacks, not on the trace length.
+    """
+
+    def __init__(self, symbols):
+        """
+        Constructor for Profiler.
+
+        :param SymbolIndex symbols: The functions of the firmware.
+        """
+        self.symbols = symbols
+        self.stack = []
+        self.key = ()
+        self.stacks = {}
+        self.total_cycles = 0
+        self.instructions = 0
+        self._pending = None
+
+    def step(self, pc, instr, cycles):
+        """
+        Count the cycles of an executed instruction.
+
+        :param int pc: The PC of the instruction.
+        :param int instr: The encoding of the instruction.
+        :param int cycles: The cycles spent by the instruction.
+        """
+        function = self.symbols.lookup(pc)
+        stack = self.stack
+        pending = self._pending
+
+        if pending == CALL:
+            self._push(function)
+            self.key = tuple(stack)
+        elif pending == RETURN or not stack or function != stack[-1]:
+            if pending == RETURN and stack:
+                stack.pop()
+            if function in stack:
+                # Return to the innermost call of the function
+                del stack[len(stack) - stack[::-1].index(function) :]
+            else:
+                self._push(function)
+            self.key = tuple(stack)
+
+        self.stacks[self.key] = self.stacks.get(self.key, 0) + cycles
+        self.total_cycles += cycles
+        self.instructions += 1
+        self._pending = control_transfer(instr)
+
+    def _push(self, function):
+        if len(self.stack) < MAX_STACK_DEPTH:
+            self.stack.append(function)
+        else:
+            self.stack[-1] = function
+
+    def run(self, steps):
+        """
+        Count the cycles of all the steps of a trace.
+
+        :param steps: Iterable of (pc, instr, cycles) steps.
+        """
+        for pc, instr, cycles in steps:
+            self.step(pc, instr, cycles)
+
+    def exclusive_cycles(self):
+        """
+        :return: A dictionary of the cycles spent in each function itself.
+        """
+        cycles = {}
+        for stack, count in self.stacks.items():
+            cycles[stack[-1]] = cycles.get(stack[-1], 0) + count
+        return cycles
+
+    def inclusive_cycles(self):
+        """
+        :return: A dictionary of the cycles spent in each function and in the functions it calls,
+            counted once for recursive functions.
+        """
+        cycles = {}
+        for stack, count in self.stacks.items():
+            for function in set(stack):
+                cycles[function] = cycles.get(function, 0) + count
+        return cycles
+
+    def write_collapsed(self, path):
+        """
+        Write the collapsed stacks ("main;foo;bar <cycles>" lines), the input of flamegraph.pl and
+        of most flamegraph viewers (e.g. speedscope).
+
+        :param str path: The path of the output file.
+        """
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def write_report(self, path):
+        """
+        Write the exclusive and inclusive cycles of each function, sorted by exclusive cycles.
+
+        :param str path: The path of the output file.
+        """
+        exclusive = self.exclusive_cycles()
+        inclusive = self.inclusive_cycles()
+        total = self.total_cycles or 1
+        width = max([len("function")] + [len(name) for name in inclusive])
+        with open(path, "w") as f:
+            f.write(
+                f"Total: {self.total_cycles} cycles, {self.instructions} instructions\n\n"
+            )
+            f.write(
+                f"{'function':<{width}} {'exclusive':>12} {'%':>7} {'inclusive':>12} {'%':>7}\n"
+            )
+            for name in sorted(
+                inclusive, key=lambda n: (-exclusive.get(n, 0), -inclusive[n], n)
+            ):
+                f.write(
+                    f"{name:<{width}} {exclusive.get(name, 0):>12} {100 * exclusive.get(name, 0) / total:>6.2f}% "
+                    f"{inclusive[name]:>12} {100 * inclusive[name] / total:>6.2f}%\n"
+                )
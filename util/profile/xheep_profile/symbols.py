@@ -0,0 +1,131 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import bisect
+import struct
+
+# ELF constants
+ELF_MAGIC = b"\x7fELF"
+ELFCLASS32 = 1
+ELFDATA2LSB = 1
+SHT_SYMTAB = 2
+SHF_EXECINSTR = 0x4
+STT_NOTYPE = 0
+STT_FUNC = 2
+SHN_UNDEF = 0
+SHN_LORESERVE = 0xFF00
+
+# Name of the function of the PCs that are not covered by any symbol
+UNKNOWN_FUNCTION = "[unknown]"
+
+
+def read_elf_functions(path):
+    """
+    Read the functions of a 32-bit little-endian ELF (e.g. sw/build/main.elf): the STT_FUNC
+    symbols, and the labels of the executable sections (e.g. the assembly entry points of the
+    runtime and the trap handlers).
+
+    :param str path: The path of the ELF.
+
+    :return: A list of (address, size, name, is_function) tuples, the size is 0 for labels.
+    """
+    with open(path, "rb") as f:
+        elf = f.read()
+
+    if elf[:4] != ELF_MAGIC:
+        raise ValueError(f"{path} is not an ELF file")
+    if elf[4] != ELFCLASS32 or elf[5] != ELFDATA2LSB:
+        raise ValueError(f"{path} is not a 32-bit little-endian ELF file")
+
+    e_shoff, e_shentsize, e_shnum = (
+        struct.unpack_from("<I", elf, 32)[0],
+        *struct.unpack_from("<HH", elf, 46),
+    )
+    sections = [
+        struct.unpack_from("<IIIIIIIIII", elf, e_shoff + i * e_shentsize)
+        for i in range(e_shnum)
+    ]
+
+    functions = []
+    for _, sh_type, _, _, sh_offset, sh_size, sh_link, _, _, sh_entsize in sections:
+        if sh_type != SHT_SYMTAB:
+            continue
+        strtab_offset = sections[sh_link][4]
+        for offset in range(sh_offset, sh_offset + sh_size, sh_entsize):
+            st_name, st_value, st_size, st_info, _, st_shndx = struct.unpack_from(
+                "<IIIBBH", elf, offset
+            )
+            st_type = st_info & 0xF
+            if st_shndx == SHN_UNDEF or st_shndx >= SHN_LORESERVE:
+                continue
+            if st_type == STT_FUNC:
+                is_function = True
+            elif st_type == STT_NOTYPE and sections[st_shndx][2] & SHF_EXECINSTR:
+                is_function = False
+            else:
+                continue
+            name_end = elf.index(b"\0", strtab_offset + st_name)
+            name = elf[strtab_offset + st_name : name_end].decode(errors="replace")
+            # Skip the local labels and the mapping symbols of the assembler
+            if not name or name.startswith((".L", "$")):
+                continue
+            functions.append(
+                (st_value, st_size if is_function else 0, name, is_function)
+            )
+
+    return functions
+
+
+class SymbolIndex:
+    """
+    Maps the PCs to the functions of a firmware with a bisection over the sorted start addresses.
+    The index is built once from the ELF, and the function of each PC is memoized since a trace
+    executes the same PCs many times.
+    """
+
+    def __init__(self, functions):
+        """
+        Constructor for SymbolIndex.
+
+        :param list functions: The (address, size, name, is_function) tuples returned by
+            read_elf_functions. A label (size 0) covers the addresses up to the next symbol.
+        """
+        # At the same address, a function wins over a label and a sized symbol over an alias
+        by_start = {}
+        for address, size, name, is_function in sorted(
+            functions, key=lambda f: (f[0], f[3], f[1], f[2])
+        ):
+            by_start[address] = (size, name)
+
+        self.starts = sorted(by_start)
+        self.ends = []
+        self.names = []
+        for i, start in enumerate(self.starts):
+            size, name = by_start[start]
+            next_start = (
+                self.starts[i + 1] if i + 1 < len(self.starts) else start + max(size, 4)
+            )
+            self.ends.append(start + size if size else next_start)
+            self.names.append(name)
+        self._cache = {}
+
+    @classmethod
+    def from_elf(cls, path):
+        """
+        :return: The SymbolIndex of the functions of an ELF.
+        """
+        return cls(read_elf_functions(path))
+
+    def lookup(self, pc):
+        """
+        :param int pc: The program counter.
+
+        :return: The name of the function of the PC, or UNKNOWN_FUNCTION.
+        """
+        name = self._cache.get(pc)
+        if name is None:
+            i = bisect.bisect_right(self.starts, pc) - 1
+            name = self.names[i] if i >= 0 and pc < self.ends[i] else UNKNOWN_FUNCTION
+            self._cache[pc] = name
+        return name
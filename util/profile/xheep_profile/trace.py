@@ -0,0 +1,259 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Streaming readers of the executed instructions of a simulation. Every reader yields
+(pc, instr, cycles) steps: the instruction instr at pc was in the decode stage for cycles
+cycles. The traces are read line by line, so that multi-GB waveforms are processed in bounded
+memory.
+"""
+
+import gzip
+import shutil
+import subprocess
+
+from .config import REQUIRED_SIGNALS, normalize_signal
+
+# Program converting an FST waveform to VCD on its standard output (part of GTKWave)
+FST2VCD = "fst2vcd"
+
+# Number of characters of a VCD read at once
+VCD_BLOCK_SIZE = 1 << 22
+
+# Returned by last_change when a signal does not change in a timestamp
+NO_CHANGE = object()
+
+
+def open_text(path, mode="r"):
+    """
+    :return: The text file, compressed with gzip if its name ends with .gz.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def read_vcd_header(lines, config):
+    """
+    Read the definitions of a VCD up to $enddefinitions.
+
+    :param lines: The iterator of the lines of the VCD, stopped after $enddefinitions.
+    :param ProfileConfig config: The signals to find.
+
+    :return: A dictionary from the identifier codes of the signals of the configuration to their
+        aliases.
+    """
+    wanted = {}
+    for alias, name in config.signals.items():
+        wanted.setdefault(normalize_signal(name), []).append(alias)
+
+    def tokens():
+        for line in lines:
+            yield from line.split()
+
+    ids = {}
+    found = set()
+    scopes = []
+    token_iter = tokens()
+    for token in token_iter:
+        if token == "$scope":
+            _, name = next(token_iter), next(token_iter)
+            scopes.append(name)
+            next(token_iter)
+        elif token == "$upscope":
+            scopes.pop()
+            next(token_iter)
+        elif token == "$var":
+            fields = []
+            for field in token_iter:
+                if field == "$end":
+                    break
+                fields.append(field)
+            # $var <type> <size> <identifier code> <reference> [<bit range>] $end
+            name = normalize_signal(".".join(scopes + [fields[3]]))
+            if name in wanted:
+                ids.setdefault(fields[2], []).extend(wanted[name])
+                found.add(name)
+        elif token == "$enddefinitions":
+            next(token_iter)
+            break
+        elif token.startswith("$"):
+            # $date, $version, $timescale, $comment...
+            for field in token_iter:
+                if field == "$end":
+                    break
+
+    # The other signals of the configuration (e.g. mcycle) are not used
+    used = set(REQUIRED_SIGNALS) | set(config.fire)
+    missing = [
+        f"{alias} ({name})"
+        for name, aliases in wanted.items()
+        if name not in found
+        for alias in aliases
+        if alias in used
+    ]
+    if missing:
+        raise ValueError(f"Signals not found in the waveform: {', '.join(missing)}")
+    return ids
+
+
+def last_change(changes, key):
+    """
+    :param str changes: The value changes of a timestamp.
+    :param str key: The identifier code of a signal followed by a new line.
+
+    :return: The last value of the signal in the changes (None for x or z bits), or NO_CHANGE.
+    """
+    pos = changes.rfind(key)
+    while pos > 0:
+        start = changes.rfind("\n", 0, pos) + 1
+        if start + 1 == pos:
+            # Scalar change, e.g. 1!
+            value = changes[start]
+            return 1 if value == "1" else 0 if value == "0" else None
+        if changes[pos - 1] == " " and changes[start] in "bB":
+            # Vector change, e.g. b1010 #
+            try:
+                return int(changes[start + 1 : pos - 1], 2)
+            except ValueError:
+                return None
+        # The key is the end of another identifier code
+        pos = changes.rfind(key, 0, pos)
+    return NO_CHANGE
+
+
+def read_vcd(stream, config):
+    """
+    Read the executed instructions of a VCD waveform. Every rising edge of the clock out of reset
+    is a cycle, which belongs to the last instruction that fired (i.e. the conjunction of the fire
+    signals was true), so that the stalls are counted in the instruction that waits. A new step
+    starts when an instruction with a different PC fires.
+
+    The VCD is read in blocks split at the timestamps, and only the identifier codes of the
+    signals of the configuration are searched in the changes of each timestamp, so that the
+    changes of the other signals of the design are never parsed.
+
+    :param stream: The VCD, a text file object.
+    :param ProfileConfig config: The signals of the CPU.
+
+    :return: A generator of (pc, instr, cycles) steps.
+    """
+    ids = read_vcd_header(iter(stream.readline, ""), config)
+
+    aliases = list(config.signals)
+    signals = [
+        (ident + "\n", [aliases.index(alias) for alias in id_aliases])
+        for ident, id_aliases in ids.items()
+    ]
+    clk_i, rst_i, pc_i, instr_i = (
+        aliases.index(alias) for alias in ("clk", "rst_ni", "pc", "instr")
+    )
+    fire = [aliases.index(alias) for alias in config.fire]
+    values = [None] * len(aliases)
+    pc = instr = None
+    cycles = 0
+
+    # Every timestamp starts with a new line followed by #
+    rest = "\n"
+    while True:
+        block = stream.read(VCD_BLOCK_SIZE)
+        text = rest + block
+        end = text.rfind("\n#") if block else len(text)
+        if end <= 0:
+            rest = text
+            continue
+        text, rest = text[:end], text[end:]
+
+        for changes in text.split("\n#"):
+            # The new line of the last change was taken by the split
+            changes += "\n"
+            clk = values[clk_i]
+            for key, indexes in signals:
+                if key in changes:
+                    value = last_change(changes, key)
+                    if value is not NO_CHANGE:
+                        for i in indexes:
+                            values[i] = value
+
+            # Rising edge of the clock out of reset
+            if values[clk_i] != 1 or clk != 0 or values[rst_i] != 1:
+                continue
+            if all(values[i] == 1 for i in fire) and values[pc_i] is not None:
+                if values[pc_i] != pc:
+                    if cycles:
+                        yield pc, instr, cycles
+                    pc, instr, cycles = values[pc_i], values[instr_i], 0
+                cycles += 1
+            elif cycles:
+                cycles += 1
+
+        if not block:
+            break
+
+    if cycles:
+        yield pc, instr, cycles
+
+
+def read_fst(path, config, fst2vcd=FST2VCD):
+    """
+    Read the executed instructions of an FST waveform, streamed as VCD through fst2vcd.
+
+    :param str path: The path of the FST.
+    :param ProfileConfig config: The signals of the CPU.
+    :param str fst2vcd: The fst2vcd program.
+
+    :return: A generator of (pc, instr, cycles) steps.
+    """
+    if shutil.which(fst2vcd) is None:
+        raise RuntimeError(
+            f"{fst2vcd} (GTKWave) is needed to read FST waveforms, install it or profile a VCD or a PC trace"
+        )
+    process = subprocess.Popen(
+        [fst2vcd, "-f", path],
+        stdout=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        bufsize=1 << 20,
+    )
+    try:
+        yield from read_vcd(process.stdout, config)
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def read_pc_trace(path):
+    """
+    Read a PC trace written by write_pc_trace: one "<pc> <instr> <cycles>" line per step, the PC
+    and the instruction in hexadecimal. Lines starting with # are comments.
+
+    :param str path: The path of the trace, compressed with gzip if it ends with .gz.
+
+    :return: A generator of (pc, instr, cycles) steps.
+    """
+    with open_text(path) as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            pc, instr, cycles = line.split()
+            yield int(pc, 16), int(instr, 16), int(cycles)
+
+
+def write_pc_trace(steps, path):
+    """
+    Write the steps to a PC trace while passing them through, so that a waveform is converted
+    while it is profiled. The trace is much smaller than the waveform and faster to profile again
+    (e.g. with another ELF of the same firmware).
+
+    :param steps: Iterable of (pc, instr, cycles) steps.
+    :param str path: The path of the trace, compressed with gzip if it ends with .gz.
+
+    :return: A generator of the same steps.
+    """
+    with open_text(path, "w") as f:
+        f.write("# pc instr cycles\n")
+        for pc, instr, cycles in steps:
+            f.write(f"{pc:08x} {instr or 0:08x} {cycles}\n")
+            yield pc, instr, cycles
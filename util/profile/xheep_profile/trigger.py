@@ -0,0 +1,135 @@
+# Copyright 2026 EPFL
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Prints the simulation parameters of the Verilator testbench that trace a window of the simulation,
+e.g. from the entry of a function of the firmware, so that a kernel is traced and profiled
+without tracing the whole simulation.
+
+Example (with util/profile in the PYTHONPATH):
+    make verilator-run SIM_ARGS="$(python3 -m xheep_profile.trigger --elf sw/build/main.elf \\
+        --cfg util/profile/configs/cv32e20.wal --cycles 200000 matmul)"
+    make profile
+"""
+
+import argparse
+import os
+import sys
+
+from .config import ProfileConfig, normalize_signal
+from .symbols import read_elf_functions
+
+
+def symbol_address(functions, symbol):
+    """
+    :param list functions: The (address, size, name, is_function) tuples returned by
+        read_elf_functions.
+    :param str symbol: The name of a symbol, optionally followed by +<offset> (e.g. main+0x10).
+
+    :return: The address of the symbol.
+    """
+    name, _, offset = symbol.partition("+")
+    addresses = sorted({address for address, _, n, _ in functions if n == name})
+    if not addresses:
+        raise ValueError(f"Symbol {name} not found in the ELF")
+    if len(addresses) > 1:
+        raise ValueError(
+            f"Symbol {name} is defined at several addresses: "
+            + ", ".join(f"0x{address:08x}" for address in addresses)
+        )
+    try:
+        return addresses[0] + (int(offset, 0) if offset else 0)
+    except ValueError:
+        raise ValueError(f"Invalid offset in {symbol}") from None
+
+
+def profile_scope(config):
+    """
+    :param ProfileConfig config: The signals of the CPU.
+
+    :return: The innermost scope that contains every signal of the configuration, so that the
+        waveform only holds the part of the CPU needed by the profiler.
+    """
+    scopes = [
+        normalize_signal(name).split(".")[:-1] for name in config.signals.values()
+    ]
+    return ".".join(os.path.commonprefix(scopes))
+
+
+def trace_args(pc=None, start=None, stop=None, cycles=None, scopes=()):
+    """
+    :param int pc: If set, the tracing starts when the CPU decodes the instruction at pc.
+    :param int start: If set, the cycle from which the tracing starts.
+    :param int stop: If set, the cycle at which the tracing stops.
+    :param int cycles: If set, the number of cycles traced once the tracing started.
+    :param list scopes: If not empty, only the signals of these scopes are traced.
+
+    :return: The list of the simulation parameters.
+    """
+    args = []
+    if pc is not None:
+        args.append(f"+trace_pc=0x{pc:08x}")
+    if start is not None:
+        args.append(f"+trace_start={start}")
+    if stop is not None:
+        args.append(f"+trace_stop={stop}")
+    if cycles is not None:
+        args.append(f"+trace_cycles={cycles}")
+    if scopes:
+        args.append(f"+trace_scope={','.join(scopes)}")
+    return args
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print the simulation parameters tracing a window of a Verilator simulation"
+    )
+    parser.add_argument(
+        "symbol",
+        nargs="?",
+        help="Symbol (or symbol+offset) of the firmware whose execution starts the tracing.",
+    )
+    parser.add_argument(
+        "--elf", default="sw/build/main.elf", help="ELF of the firmware (main.elf)."
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        help="Cycle from which the tracing starts (or the symbol is waited for).",
+    )
+    parser.add_argument("--stop", type=int, help="Cycle at which the tracing stops.")
+    parser.add_argument(
+        "--cycles",
+        type=int,
+        help="Number of cycles traced once the tracing started.",
+    )
+    parser.add_argument(
+        "--cfg",
+        help="WAL configuration of the CPU (util/profile/configs/<cpu>.wal): only trace the signals needed by the profiler.",
+    )
+    parser.add_argument(
+        "--scope",
+        action="append",
+        default=[],
+        help="Only trace the signals of this scope, e.g. TOP.testharness.x_heep_system_i. Can be given multiple times.",
+    )
+    args = parser.parse_args()
+
+    scopes = list(args.scope)
+    try:
+        pc = None
+        if args.symbol:
+            pc = symbol_address(read_elf_functions(args.elf), args.symbol)
+        if args.cfg:
+            scopes.append(profile_scope(ProfileConfig.from_wal(args.cfg)))
+    except (OSError, ValueError) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 1
+
+    print(" ".join(trace_args(pc, args.start, args.stop, args.cycles, scopes)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
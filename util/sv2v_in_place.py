@@ -6,6 +6,8 @@
 # pylint: disable=raise-missing-from, unused-argument, consider-merging-isinstance
 # pylint: disable=redefined-builtin, global-statement, subprocess-run-check, consider-using-sys-exit
 import argparse
+import concurrent.futures
+import hashlib
 import logging
 import os
 import re
@@ -13,7 +15,10 @@ import shlex
 import shutil
 import subprocess
 import tempfile
-from typing import List, Pattern, Tuple
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# `include directive, with the name of the included file if it is a literal
+INCLUDE_RE = re.compile(rb'`include\s*(?:"([^"]*)"|<([^>]*)>|(\S*))')
 
 
 def read_file_list(path: str) -> List[str]:
@@ -25,6 +30,127 @@ def read_file_list(path: str) -> List[str]:
     return ret
 
 
+def sv2v_version(sv2v: str) -> str:
+    """Get the version printed by sv2v"""
+    try:
+        proc = subprocess.run([sv2v, "--version"], capture_output=True, text=True)
+    except OSError as err:
+        raise RuntimeError("Failed to run {}: {}".format(sv2v, err))
+    if proc.returncode != 0:
+        raise RuntimeError(
+            "Failed to get the version of {}. Exit code: {}".format(
+                sv2v, proc.returncode
+            )
+        )
+    return proc.stdout.strip()
+
+
+class Sv2vCache:
+    """Persistent cache of the sv2v conversions.
+
+    The key of a conversion is the hash of the sv2v version, the command line
+    (defines and include dirs), the content of the packages and of the
+    converted file, and the content of every file they include, directly or
+    not, resolved as sv2v does. The conversions of files with an `include of
+    a macro are not cached.
+    """
+
+    def __init__(self, cache_dir: str, sv2v: str, incdirs: List[str]):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.incdirs = incdirs
+        self._file_hashes: Dict[str, str] = {}
+        self._file_includes: Dict[str, Optional[List[str]]] = {}
+        self.common = hashlib.sha256(sv2v_version(sv2v).encode() + b"\0")
+
+    def file_hash(self, path: str) -> str:
+        """Hash the content of a file, once per file (e.g. the packages)"""
+        file_hashes = self._file_hashes
+        if path not in file_hashes:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    hasher.update(chunk)
+            file_hashes[path] = hasher.hexdigest()
+        return file_hashes[path]
+
+    def file_includes(self, path: str) -> Optional[List[str]]:
+        """Get the names of the files included by a file, whether their
+        `include is active or not, or None if one of them is a macro"""
+        file_includes = self._file_includes
+        if path not in file_includes:
+            with open(path, "rb") as handle:
+                matches = INCLUDE_RE.findall(handle.read())
+            names: Optional[List[str]] = []
+            for quoted, angled, other in matches:
+                if not quoted and not angled:
+                    names = None
+                    break
+                names.append(os.fsdecode(quoted or angled))
+            file_includes[path] = names
+        return file_includes[path]
+
+    def resolve_include(self, name: str, including_path: str) -> Optional[str]:
+        """Find an included file as sv2v does: next to the including file,
+        then in the include dirs. Returns None if it is not found."""
+        for incdir in [os.path.dirname(including_path)] + self.incdirs:
+            path = os.path.join(incdir, name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def key(self, args: List[str], paths: List[str]) -> Optional[str]:
+        """Get the key of the conversion of paths with the sv2v arguments, or
+        None if the files it includes cannot be known"""
+        hasher = self.common.copy()
+        for arg in args:
+            hasher.update(arg.encode() + b"\0")
+        for path in paths:
+            hasher.update(self.file_hash(path).encode())
+
+        # Included files, in the order in which they are first found
+        pending = list(paths)
+        seen = set(paths)
+        while pending:
+            including_path = pending.pop(0)
+            names = self.file_includes(including_path)
+            if names is None:
+                return None
+            for name in names:
+                path = self.resolve_include(name, including_path)
+                hasher.update(name.encode() + b"\0")
+                if path is None:
+                    # The include may still be found if the file is created
+                    hasher.update(b"\0")
+                    continue
+                hasher.update(path.encode() + b"\0")
+                hasher.update(self.file_hash(path).encode())
+                if path not in seen:
+                    seen.add(path)
+                    pending.append(path)
+        return hasher.hexdigest()
+
+    def load(self, key: str, dst_path: str) -> bool:
+        """Copy the cached conversion to dst_path, if there is one"""
+        try:
+            shutil.copyfile(os.path.join(self.cache_dir, key + ".v"), dst_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key: str, dst_path: str) -> None:
+        """Store the conversion in dst_path. It is copied to a temporary file
+        which is then renamed, so a concurrent run never reads a partial one."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(dst_path, tmp_path)
+            os.replace(tmp_path, os.path.join(self.cache_dir, key + ".v"))
+        except OSError:
+            os.remove(tmp_path)
+            raise
+
+
 def transform_one(
     sv2v: str,
     defines: List[str],
@@ -32,8 +158,10 @@ def transform_one(
     pkg_paths: List[str],
     sv_path: str,
     dst_path: str,
-) -> None:
-    """Run sv2v to edit a file in place"""
+    cache: Optional[Sv2vCache] = None,
+) -> bool:
+    """Run sv2v to edit a file in place, returns True if the conversion was
+    taken from the cache"""
     defines_args = ["--define=" + d for d in defines]
     incdirs_args = ["--incdir=" + d for d in incdirs]
     paths = pkg_paths + ([] if sv_path in pkg_paths else [sv_path])
@@ -51,6 +179,13 @@ def transform_one(
         + incdirs_args
         + paths
     )
+    key = None
+    if cache is not None:
+        key = cache.key(cmd[1:], paths)
+        if key is not None and cache.load(key, dst_path):
+            logging.info("Reusing the cached sv2v conversion of {}".format(sv_path))
+            return True
+
     logging.info("Running sv2v on {}".format(sv_path))
     logging.debug("Command: {}".format(cmd))
     with open(dst_path, "w") as dst_file:
@@ -64,6 +199,10 @@ def transform_one(
                 )
             )
 
+    if key is not None:
+        cache.store(key, dst_path)
+    return False
+
 
 def parse_define_if(arg: str) -> Tuple[Pattern[str], str]:
     """Handle a --define-if argument"""
@@ -105,13 +244,24 @@ def transform(
     incdirs: List[str],
     pkg_paths: List[str],
     sv_paths: List[str],
+    jobs: int = 1,
+    cache_dir: Optional[str] = None,
 ) -> None:
-    """Run sv2v to transform a list of files in-place"""
+    """Run sv2v to transform a list of files in-place.
+
+    With more than one job, up to jobs sv2v processes run at once (0 to use
+    one per available CPU). With a cache dir, the files whose conversion is
+    in the cache are not converted again.
+    """
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    cache = Sv2vCache(cache_dir, sv2v, incdirs) if cache_dir else None
+
     with tempfile.TemporaryDirectory() as tmpdir:
         # First write each file to a file in a temporary directory, then copy
         # everything back. We have to do it like this because otherwise we
         # might trash a file that needs to be included by a later one.
-        dst_paths = []
+        conversions = []
         for idx, src_path in enumerate(sv_paths):
             dst_path = os.path.join(tmpdir, str(idx))
 
@@ -120,15 +270,39 @@ def transform(
                 if regex.search(src_path):
                     extra_file_defines.append(define)
 
-            transform_one(
-                sv2v,
-                defines + extra_file_defines,
-                incdirs,
-                pkg_paths,
-                src_path,
-                dst_path,
+            conversions.append(
+                (
+                    sv2v,
+                    defines + extra_file_defines,
+                    incdirs,
+                    pkg_paths,
+                    src_path,
+                    dst_path,
+                    cache,
+                )
+            )
+        dst_paths = [conversion[5] for conversion in conversions]
+
+        if jobs <= 1 or len(conversions) <= 1:
+            cached = [transform_one(*conversion) for conversion in conversions]
+        else:
+            # Each job waits for its sv2v process, so threads are enough
+            with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = [
+                    executor.submit(transform_one, *conversion)
+                    for conversion in conversions
+                ]
+                try:
+                    cached = [future.result() for future in futures]
+                except BaseException:
+                    executor.shutdown(cancel_futures=True)
+                    raise
+        if cache is not None:
+            logging.info(
+                "Reused {} of {} sv2v conversions from the cache.".format(
+                    sum(cached), len(cached)
+                )
             )
-            dst_paths.append(dst_path)
 
         # Now copy everything back, overwriting the original code
         for dst_path, src_path in zip(dst_paths, sv_paths):
@@ -191,6 +365,26 @@ def main() -> int:
         help=("Specify the name or path of the sv2v binary. " "Defaults to 'sv2v'."),
     )
 
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help=(
+            "Number of sv2v processes run in parallel, 0 to use all "
+            "available CPUs. Defaults to 1."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("SV2V_CACHE_DIR") or None,
+        help=(
+            "Directory where the conversions are cached across runs, so "
+            "that the unchanged files are not converted again. Defaults to "
+            "the SV2V_CACHE_DIR environment variable, if set."
+        ),
+    )
+
     parser.add_argument(
         "--merge",
         "-m",
@@ -200,6 +394,11 @@ def main() -> int:
 
     args = parser.parse_args()
 
+    if args.jobs < 0:
+        parser.error(
+            "--jobs must be a positive integer, or 0 to use all available CPUs"
+        )
+
     if args.verbose:
         logging.basicConfig(level=logging.INFO)
 
@@ -255,7 +454,14 @@ def main() -> int:
 
     try:
         transform(
-            args.sv2v, args.defines, args.defines_if, args.incdirs, pkg_paths, sv_paths
+            args.sv2v,
+            args.defines,
+            args.defines_if,
+            args.incdirs,
+            pkg_paths,
+            sv_paths,
+            args.jobs,
+            args.cache_dir,
         )
     except RuntimeError as err:
         logging.error(err)
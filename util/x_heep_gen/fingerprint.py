@@ -0,0 +1,99 @@
+# Content fingerprints of the configuration objects, used to detect which generated files are affected by a configuration change
+
+import hashlib
+import types
+from decimal import Decimal
+from enum import Enum
+
+
+def fingerprint(obj) -> str:
+    """
+    Computes a fingerprint of an object from its content, so that two objects built from the same configuration have the same fingerprint across runs.
+
+    Objects are walked recursively through their attributes (`__dict__` and `__slots__`), containers through their items. Sets are hashed independently of their iteration order. Shared and cyclic references are handled.
+
+    :param Any obj: the object to fingerprint
+    :return: the hexadecimal SHA-256 digest of the object content
+    :rtype: str
+    """
+    h = hashlib.sha256()
+    _update(h, obj, {})
+    return h.hexdigest()
+
+
+def _update(h, obj, memo: dict):
+    """
+    Feeds the content of obj to the hash object h.
+
+    :param h: hashlib hash object
+    :param Any obj: the object to hash
+    :param dict memo: maps the id of already visited objects to their visit index
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes, Decimal)):
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+        return
+
+    if isinstance(obj, Enum):
+        h.update(f"{type(obj).__qualname__}.{obj.name};".encode())
+        return
+
+    if isinstance(
+        obj,
+        (
+            type,
+            types.FunctionType,
+            types.BuiltinFunctionType,
+            types.MethodType,
+            types.ModuleType,
+        ),
+    ):
+        name = getattr(obj, "__qualname__", obj.__name__)
+        h.update(f"{type(obj).__name__}:{name};".encode())
+        return
+
+    if id(obj) in memo:
+        h.update(f"ref:{memo[id(obj)]};".encode())
+        return
+    memo[id(obj)] = len(memo)
+
+    if isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}[{len(obj)}];".encode())
+        for item in obj:
+            _update(h, item, memo)
+        return
+
+    if isinstance(obj, dict):
+        h.update(f"dict[{len(obj)}];".encode())
+        for key, value in obj.items():
+            _update(h, key, memo)
+            _update(h, value, memo)
+        return
+
+    if isinstance(obj, (set, frozenset)):
+        h.update(f"set[{len(obj)}];".encode())
+        for item_fingerprint in sorted(fingerprint(item) for item in obj):
+            h.update(f"{item_fingerprint};".encode())
+        return
+
+    h.update(f"{type(obj).__module__}.{type(obj).__qualname__}{{".encode())
+    for name, value in _attributes(obj):
+        h.update(f"{name}=".encode())
+        _update(h, value, memo)
+    h.update(b"};")
+
+
+def _attributes(obj):
+    """
+    :param Any obj: an object
+    :return: the (name, value) pairs of the attributes of obj, in a deterministic order
+    :rtype: list[tuple[str, Any]]
+    """
+    attributes = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                attributes[name] = getattr(obj, name)
+    return sorted(attributes.items(), key=lambda item: item[0])
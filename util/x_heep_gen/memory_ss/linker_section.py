@@ -7,8 +7,14 @@ class LinkerSection:
     Object representing a section in the linker configuration.
 
     If the end address is set to `None` it will be infered in the building process.
+
+    Two sections with the same members are equal. The hash only depends on the name and the start
+    address, which are not modified once the section is created, unlike the end address inferred by
+    the build, so a section stays found in the sets and dictionaries it was added to.
     """
 
+    __slots__ = ("name", "start", "end", "subsections")
+
     name: str
     """
     The name of the section
@@ -46,6 +52,29 @@ class LinkerSection:
 
         self.check()
 
+    def _key(self) -> tuple:
+        return (self.name, self.start, self.end, tuple(self.subsections))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LinkerSection):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.start))
+
+    def copy(self) -> "LinkerSection":
+        """
+        :return: a copy of the section and of its subsections
+        :rtype: LinkerSection
+        """
+        return LinkerSection(
+            self.name,
+            self.start,
+            self.end,
+            [subsection.copy() for subsection in self.subsections],
+        )
+
     def __str__(self) -> str:
         return f"LinkerSection(name={self.name}, start=0x{self.start:08X}, end={'None' if self.end is None else f'0x{self.end:08X}'})"
 
@@ -7,8 +7,12 @@ class LinkerSubsection:
     It's a group of input sections that are placed together in the same linker section.
 
     If the end address is set to `None` it will be infered in the building process.
+
+    Two subsections with the same members are equal and have the same hash.
     """
 
+    __slots__ = ("name", "subsections_names", "provide_start", "provide_end")
+
     name: str
     """The main name of the subsection"""
 
@@ -46,6 +50,31 @@ class LinkerSubsection:
 
         self.check()
 
+    def _key(self) -> tuple:
+        return (
+            self.name,
+            tuple(self.subsections_names),
+            self.provide_start,
+            self.provide_end,
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LinkerSubsection):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def copy(self) -> "LinkerSubsection":
+        """
+        :return: a copy of the subsection, with its own list of names
+        :rtype: LinkerSubsection
+        """
+        return LinkerSubsection(
+            self.name, self.subsections_names, self.provide_start, self.provide_end
+        )
+
     def check(self):
         """
         Does basic type checking and sanity checking.
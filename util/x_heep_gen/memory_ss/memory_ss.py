@@ -1,4 +1,3 @@
-from copy import deepcopy
 from typing import List, Set, Iterable, Generator, Optional, Union
 from .ram_bank import Bank, is_pow2
 from .il_ram_group import ILRamGroup
@@ -245,7 +244,7 @@ class MemorySS:
             raise ValueError("linker section names should be unique")
 
         self._used_section_names.add(section.name)
-        self._linker_sections.append(deepcopy(section))
+        self._linker_sections.append(section.copy())
 
     def ram_start_address(self) -> int:
         """
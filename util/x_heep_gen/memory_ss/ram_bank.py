@@ -22,8 +22,19 @@ class Bank:
     :raise ValueError: when size_k isn't a power of two.
     :raise ValueError: when start_address is not aligned on size.
     :raise ValueError: when il_offset is to big for the given il_level().
+
+    Banks are immutable value objects: their attributes cannot be set once they are initialized. Two banks with the same parameters are equal and have the same hash, so they can be used as dictionary keys. Copying a bank returns the bank itself.
     """
 
+    __slots__ = (
+        "_size_k",
+        "_start_address",
+        "_map_idx",
+        "_il_level",
+        "_il_offset",
+        "_end_address",
+    )
+
     def __init__(
         self,
         size_k: int,
@@ -72,6 +83,38 @@ class Bank:
             self._start_address + self._size_k * 1024 * 2**self._il_level
         )
 
+    def __setattr__(self, name, value):
+        # Each attribute is only set once, by __init__
+        if hasattr(self, name):
+            raise AttributeError(f"Bank is immutable, cannot set {name}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Bank is immutable, cannot delete {name}")
+
+    def _key(self) -> tuple:
+        return (
+            self._size_k,
+            self._start_address,
+            self._map_idx,
+            self._il_level,
+            self._il_offset,
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Bank):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __copy__(self) -> "Bank":
+        return self
+
+    def __deepcopy__(self, memo) -> "Bank":
+        return self
+
     def __str__(self) -> str:
         return f"Bank(size_k={self._size_k}, start_address=0x{self._start_address:08X}, end_address=0x{self._end_address:08X}, map_idx={self._map_idx}, il_level={self._il_level}, il_offset={self._il_offset})"
 
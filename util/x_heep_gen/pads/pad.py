@@ -18,8 +18,28 @@ class Pad:
     """
     Represents an element that goes into the padring. Can be a pad, but can also be a PRCUT or a
     CORNER cell, or anything.
+
+    Two pads of the same class with the same attributes, pins and cells are equal. The hash only
+    depends on the class, name, global index and location, so that it stays cheap to compute.
     """
 
+    __slots__ = (
+        "global_index",
+        "pins",
+        "side",
+        "side_index",
+        "orientation",
+        "space",
+        "offset",
+        "iocell_center_to_ring_edge",
+        "bondpad_center_to_ring_edge",
+        "bp_space",
+        "name",
+        "attributes",
+        "iocell",
+        "bondpad",
+    )
+
     def __init__(self, global_index: int, pins: List[Pin] = None):
         """
         Constructor for Pad.
@@ -99,11 +119,41 @@ class Pad:
         """
         return len(self.pins) > 1
 
+    def __eq__(self, other):
+        if not isinstance(other, Pad):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and all(
+                getattr(self, name, None) == getattr(other, name, None)
+                for name in Pad.__slots__
+                if name not in ("iocell", "bondpad")
+            )
+            and cell_key(self.iocell) == cell_key(other.iocell)
+            and cell_key(self.bondpad) == cell_key(other.bondpad)
+        )
+
+    def __hash__(self):
+        return hash(
+            (type(self), self.name, self.global_index, self.side, self.side_index)
+        )
+
     def copy(self):
-        return copy.deepcopy(self)
+        """
+        Returns a copy of the pad. The list of pins, the attributes and the cells are copied, the
+        pins themselves are shared.
+        """
+        pad = copy.copy(self)
+        pad.pins = list(self.pins)
+        pad.attributes = dict(self.attributes)
+        pad.iocell = None if self.iocell is None else self.iocell.copy()
+        pad.bondpad = None if self.bondpad is None else self.bondpad.copy()
+        return pad
 
 
 class Physical(Pad):
+    __slots__ = ()
+
     def __init__(self, name, iocell, bondpad, attributes=None):
         super().__init__(global_index=None)
         self.name = name
@@ -114,4 +164,4 @@ class Physical(Pad):
 
 
 class Corner(Physical):
-    pass
+    __slots__ = ()
@@ -9,11 +9,33 @@ from .cell import *
 from enum import Enum
 
 
+def cell_key(cell: Cell):
+    """
+    Returns the content of a cell as a tuple, used to compare the cells of pins and pads.
+
+    :param cell: The cell, or None.
+    """
+    if cell is None:
+        return None
+    return (
+        cell.name,
+        cell.dimension.width,
+        cell.dimension.height,
+        tuple(cell.connections),
+        cell.rtl_wrapper,
+    )
+
+
 class Pin:
     """
     Represents a pin (signal) in the system that can be assigned to a pad.
+
+    Two pins of the same class with the same name, module, attributes and cells are equal. The hash
+    only depends on the class, name and module, so that it stays cheap to compute.
     """
 
+    __slots__ = ("name", "module", "attributes", "iocell", "bondpad")
+
     # Default module to which the pin will be attached to. See Pin.module.
     DEFAULT_MODULE = "core_v_mini_mcu"
 
@@ -49,6 +71,21 @@ class Pin:
     def __str__(self):
         return self.name
 
+    def __eq__(self, other):
+        if not isinstance(other, Pin):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and self.name == other.name
+            and self.module == other.module
+            and self.attributes == other.attributes
+            and cell_key(self.iocell) == cell_key(other.iocell)
+            and cell_key(self.bondpad) == cell_key(other.bondpad)
+        )
+
+    def __hash__(self):
+        return hash((type(self), self.name, self.module))
+
     def rtl_name(self) -> str:
         """
         Returns the RTL name of the pin including an underscore '_' as suffix. If the pin is active
@@ -67,6 +104,8 @@ class PinDigital(Pin):
     This class will have the digital bondpad and iocell assigned.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, module=None, attributes=None):
         super().__init__(name, module, attributes)
         self.iocell = iocell_d.copy()
@@ -78,6 +117,8 @@ class Input(PinDigital):
     Represents a digital input pin.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, module=None, attributes=None):
         super().__init__(name, module, attributes)
         self.iocell.rtl_wrapper = "pad_cell_input"
@@ -88,6 +129,8 @@ class Output(PinDigital):
     Represents a digital output pin.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, module=None, attributes=None):
         super().__init__(name, module, attributes)
         self.iocell.rtl_wrapper = "pad_cell_output"
@@ -98,6 +141,8 @@ class Inout(PinDigital):
     Represents a digital inout pin.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, module=None, attributes=None):
         super().__init__(name, module, attributes)
         self.iocell.rtl_wrapper = "pad_cell_inout"
@@ -108,6 +153,8 @@ class Asignal(Pin):
     Represents a generic analog signal pin.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, module=None, attributes=None):
         super().__init__(name, module, attributes)
         self.iocell = iocell_a.copy()
@@ -9,6 +9,8 @@ from enum import Enum
 from copy import deepcopy
 from typing import List
 
+from .address_map import AddressMap, AllocationPolicy
+
 
 class Peripheral(ABC):
     """
@@ -21,6 +23,7 @@ class Peripheral(ABC):
     _length: int = int("0x00010000", 16)  # default length of 64KB
     _name: str
     _address: int = None
+    _frozen: bool = False
 
     def __init__(self, offset=None, length=None):
         """
@@ -37,6 +40,26 @@ class Peripheral(ABC):
         if length is not None:
             self._length = length
 
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise RuntimeError(
+                f"[MCU-GEN - Peripheral] ERROR: Peripheral {self.get_name()} is frozen and cannot be modified (tried to set {name})."
+            )
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """
+        Make the peripheral read-only. Any later attribute assignment raises a RuntimeError. A deepcopy of a frozen peripheral is also frozen.
+        """
+        object.__setattr__(self, "_frozen", True)
+
+    def is_frozen(self):
+        """
+        :return: True if the peripheral is read-only.
+        :rtype: bool
+        """
+        return self._frozen
+
     def get_address(self):
         """
         :return: The virtual (in peripheral domain) memory address of the peripheral. If not set, return None.
@@ -93,6 +116,10 @@ class PeripheralDomain(ABC):
     _peripherals: List[
         Peripheral
     ]  # type has to be precised for filtering in validation
+    _allocation_policy: AllocationPolicy = AllocationPolicy.FIRST_FIT
+    _align: bool = False
+    _address_map: AddressMap = None
+    _frozen: bool = False
 
     @abstractmethod
     def __init__(self, name: str, start_address: int, length: int):
@@ -142,15 +169,42 @@ class PeripheralDomain(ABC):
 
     def get_peripherals(self):
         """
-        :return: A copy of the list of peripherals in the domain.
-        :rtype: list[Peripheral]
+        :return: A copy of the list of peripherals in the domain. Once the domain is frozen, the peripherals are read-only and the tuple of peripherals of the domain is returned without copy.
+        :rtype: list[Peripheral] | tuple[Peripheral]
         """
+        if self._frozen:
+            return self._peripherals
         return (
             []
             if self._peripherals is None or len(self._peripherals) == 0
             else [deepcopy(p) for p in self._peripherals]
         )
 
+    def freeze(self):
+        """
+        Make the domain and its peripherals read-only, so that they can be shared without copy (e.g. with the templates). Called by XHeep.build once the domain is built.
+        """
+        self._peripherals = tuple(self._peripherals)
+        for p in self._peripherals:
+            p.freeze()
+        self._frozen = True
+
+    def is_frozen(self):
+        """
+        :return: True if the domain is read-only.
+        :rtype: bool
+        """
+        return self._frozen
+
+    def _check_not_frozen(self):
+        """
+        :raise RuntimeError: when the domain is frozen.
+        """
+        if self._frozen:
+            raise RuntimeError(
+                f"[MCU-GEN - PeripheralDomain] ERROR: {self._name} is frozen and cannot be modified."
+            )
+
     def contains_peripheral(self, peripheral_name: str):
         """
         Check if the peripheral domain contains a peripheral with the given name.
@@ -161,13 +215,61 @@ class PeripheralDomain(ABC):
         """
         return any(p.get_name() == peripheral_name for p in self._peripherals)
 
+    def set_allocation_policy(
+        self, policy: AllocationPolicy = AllocationPolicy.FIRST_FIT, align: bool = False
+    ):
+        """
+        Set how the peripherals without offset are placed during build.
+
+        :param AllocationPolicy policy: The policy used to choose the free space of each peripheral. Defaults to first fit.
+        :param bool align: If True, each peripheral is naturally aligned (its offset is a multiple of its length rounded up to a power of two). Defaults to False.
+        """
+        self._check_not_frozen()
+        if not isinstance(policy, AllocationPolicy):
+            raise TypeError(
+                f"policy should be of type AllocationPolicy not {type(policy)}"
+            )
+        self._allocation_policy = policy
+        self._align = align
+
+    def get_address_map(self):
+        """
+        :return: The address map of the domain computed during build, None if the domain is not built.
+        :rtype: AddressMap
+        """
+        return self._address_map
+
+    def get_fragmentation(self):
+        """
+        :return: The fragmentation of the free space of the domain after build (see AddressMap.fragmentation), None if the domain is not built.
+        :rtype: float
+        """
+        return None if self._address_map is None else self._address_map.fragmentation()
+
     # Build function
 
     def build(self):
         """
         Build the peripheral domain. This function will compute the offset of the peripherals that have no offset.
+
+        The peripherals with an offset are reserved first in the address map of the domain. Then the other peripherals are placed from the largest to the smallest one, according to the allocation policy of the domain.
         """
-        # Setup
+        self._check_not_frozen()
+        address_map = AddressMap(self._length)
+
+        # Reserving the space of the peripherals with address
+        for p in self._peripherals:
+            if p is None or p.get_address() is None:
+                continue
+            if p.get_address() + p.get_length() > self._length:
+                raise ValueError(
+                    f"Peripheral {p.get_name()} has an address that ends after the end of the domain ({p.get_name()} ends at {hex(p.get_address() + p.get_length())} but the domain ends at {hex(self._length)})"
+                )
+            if not address_map.is_free(p.get_address(), p.get_length()):
+                raise ValueError(
+                    f"Peripheral {p.get_name()} has an address that overlaps with another peripheral ({p.get_name()} starts at {hex(p.get_address())} and ends at {hex(p.get_address() + p.get_length())})"
+                )
+            address_map.reserve(p.get_address(), p.get_length())
 
         # List of peripherals without address, sorted by length in descending order. Original index is kept to update the peripheral with the offset after placement.
         peripherals_without_address = [
@@ -177,114 +279,26 @@ class PeripheralDomain(ABC):
             key=lambda tuple: tuple[1].get_length(), reverse=True
         )
 
-        # List of peripherals with address, sorted by address. Original index is kept to update the peripheral with the offset after placement.
-        peripherals_with_address = [
-            (i, p)
-            for i, p in enumerate(self._peripherals)
-            if p is not None and p.get_address() is not None
-        ]
-        peripherals_with_address.sort(key=lambda tuple: tuple[1].get_address())
-
-        # List of free spaces of intervals of free memory space in the domain. In the beggining, there is only one free space, the whole domain.
-        free_space = [[0, self._length]]
-
-        # Number of peripherals with address
-        num_peripherals_with_address = (
-            0 if peripherals_with_address == None else len(peripherals_with_address)
-        )
-
-        # Number of peripherals without address
-        num_peripherals_without_address = (
-            0
-            if peripherals_without_address == None
-            else len(peripherals_without_address)
-        )
-
-        # Creating the list of intervals of free space
-
-        # Works because peripherals_with_address is sorted by address
-        # Splits the last free space into two new lists, one before the peripheral and one after
-        for i in range(num_peripherals_with_address):
-            # Removes last free space to split it
-            last_free_space = free_space[-1]
-            free_space.pop()
-            current_peripheral = peripherals_with_address[i][1]
-
-            # Checks if the peripheral domain is in free space
-            if current_peripheral.get_address() < last_free_space[0]:
-                if i == 0:
-                    raise ValueError(
-                        f"Peripheral {current_peripheral.get_name()} has an address that starts before the first free space ({current_peripheral.get_name()} starts at {hex(current_peripheral.get_address())} but first free space starts at {hex(last_free_space[0])})"
-                    )
-                else:
-                    raise ValueError(
-                        f"Peripheral {current_peripheral.get_name()} has an address that starts in {peripherals_with_address[i-1].get_name()} domain ({current_peripheral.get_name()} starts at {hex(current_peripheral.get_address())} but {peripherals_with_address[i-1].get_name()} ends at {hex(last_free_space[0])}"
-                    )
-
-            if (
-                current_peripheral.get_address() + current_peripheral.get_length()
-            ) > last_free_space[1]:
-                raise ValueError(
-                    f"Peripheral {current_peripheral.get_name()} has an address that ends after the last free space ({current_peripheral.get_name()} ends at {hex(current_peripheral.get_address() + current_peripheral.get_length())} but last free space ends at {hex(last_free_space[1])})"
-                )
-
-            # If the peripheral starts after the last free space, add it to the free space before the peripheral
-            if last_free_space[0] > current_peripheral.get_address():
-                free_space.append(
-                    [last_free_space[0], current_peripheral.get_address()]
-                )
-
-            # If the peripheral ends before the last free space, add it to the free space after the peripheral
-            if (
-                current_peripheral.get_address() + current_peripheral.get_length()
-            ) < last_free_space[1]:
-                free_space.append(
-                    [
-                        current_peripheral.get_address()
-                        + current_peripheral.get_length(),
-                        last_free_space[1],
-                    ]
-                )
-
-        # Placing peripherals in free spaces
-
-        # Place peripherals where in the first free space where they fit, works because peripherals_without_address is sorted by length in descending order
         offsets = (
             {}
         )  # Will contain the offsets of the peripherals, and then update the peripherals with the offsets if they all fit
 
-        for i in range(num_peripherals_without_address):
-            fit = False  # Check if the peripheral fits in the free space
-            current_peripheral = peripherals_without_address[i][1]
-            for j in range(len(free_space)):
-                if (
-                    current_peripheral.get_length()
-                    <= free_space[j][1] - free_space[j][0]
-                ):
-                    offsets[peripherals_without_address[i][0]] = free_space[j][
-                        0
-                    ]  # Since there can be multiple instances of the same peripheral, we must map indexes from self._peripherals instead of peripheral names (two peripherals can have the same name)
-
-                    # Either remove space if the peripheral exactly fits the space, or shrinks the space
-                    if (
-                        free_space[j][0] + current_peripheral.get_length()
-                        == free_space[j][1]
-                    ):
-                        free_space.pop(j)
-                    else:
-                        free_space[j][0] += current_peripheral.get_length()
-
-                    # Ends search for free space
-                    fit = True
-                    break
-            if not fit:
-                raise ValueError(
-                    f"Could not find a free space large enough for peripheral {current_peripheral.get_name()} with length {hex(current_peripheral.get_length())}"
+        for idx, p in peripherals_without_address:
+            try:
+                # Since there can be multiple instances of the same peripheral, we must map indexes from self._peripherals instead of peripheral names (two peripherals can have the same name)
+                offsets[idx] = address_map.allocate(
+                    p.get_length(), self._allocation_policy, self._align
                 )
+            except ValueError:
+                raise ValueError(
+                    f"Could not find a free space large enough for peripheral {p.get_name()} with length {hex(p.get_length())}"
+                ) from None
 
         # Setting peripherals addresses if there is enough space
-        for idx, _ in peripherals_without_address:
-            self._peripherals[idx].set_address(offsets[idx])
+        for idx, offset in offsets.items():
+            self._peripherals[idx].set_address(offset)
+
+        self._address_map = address_map
 
     def validate(self):
         """
@@ -0,0 +1,308 @@
+# Address map allocator used to place the peripherals in their domain
+
+import random
+from enum import Enum
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+class AllocationPolicy(Enum):
+    """Enumeration of the policies used to choose the free space where a peripheral is placed"""
+
+    FIRST_FIT = "first_fit"
+    """The free space with the lowest address where the peripheral fits"""
+    BEST_FIT = "best_fit"
+    """The smallest free space where the peripheral fits, the one with the lowest address if several have the same size"""
+
+
+def natural_alignment(length: int) -> int:
+    """
+    :param int length: the length of a memory range
+    :return: the natural alignment of the range, the smallest power of two greater or equal to length
+    :rtype: int
+    """
+    return 1 << max(length - 1, 0).bit_length()
+
+
+class _Node:
+    """Node of a _Treap, holding the free interval [start, end)."""
+
+    __slots__ = ("key", "start", "end", "priority", "left", "right", "max_size")
+
+    def __init__(self, key, start: int, end: int, priority: float):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.priority = priority
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.max_size = end - start
+
+
+def _update(node: _Node) -> _Node:
+    """Recomputes the size of the largest interval of the subtree of node from its children."""
+    node.max_size = max(
+        node.end - node.start,
+        node.left.max_size if node.left else 0,
+        node.right.max_size if node.right else 0,
+    )
+    return node
+
+
+def _split(node: Optional[_Node], key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """
+    :return: the subtrees of the nodes whose key is lower than key, and of the other nodes.
+    """
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        return _update(node), right
+    left, node.left = _split(node.left, key)
+    return left, _update(node)
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """
+    :return: the union of two subtrees, every key of left being lower than the keys of right.
+    """
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+class _Treap:
+    """
+    Balanced binary search tree (a treap) of free intervals ordered by a key. Each node also holds
+    the size of the largest interval of its subtree, so that the subtrees without a large enough
+    interval are skipped by the searches. Insertions, removals and lookups take O(log n) expected
+    time.
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        # Fixed seed, the shape of the tree does not depend on the run
+        self._random = random.Random(0)
+
+    def __iter__(self) -> Iterator[_Node]:
+        return self.iter_from(None)
+
+    def insert(self, key, start: int, end: int):
+        left, right = _split(self._root, key)
+        node = _Node(key, start, end, self._random.random())
+        self._root = _merge(_merge(left, node), right)
+
+    def remove(self, key):
+        def remove_from(node: Optional[_Node]) -> Optional[_Node]:
+            if node is None:
+                raise KeyError(key)
+            if key < node.key:
+                node.left = remove_from(node.left)
+            elif node.key < key:
+                node.right = remove_from(node.right)
+            else:
+                return _merge(node.left, node.right)
+            return _update(node)
+
+        self._root = remove_from(self._root)
+
+    def max_size(self) -> int:
+        """
+        :return: the size of the largest interval, 0 if the tree is empty.
+        """
+        return self._root.max_size if self._root else 0
+
+    def floor(self, key) -> Optional[_Node]:
+        """
+        :return: the node with the greatest key lower or equal to key, None if there is none.
+        """
+        node, found = self._root, None
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            else:
+                node, found = node.right, node
+        return found
+
+    def iter_from(self, key) -> Iterator[_Node]:
+        """
+        :return: an iterator over the nodes whose key is greater or equal to key (all the nodes if key is None), in key order.
+        """
+        stack = []
+        node = self._root
+        while node is not None or stack:
+            while node is not None:
+                if key is not None and node.key < key:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if stack:
+                node = stack.pop()
+                yield node
+                node = node.right
+
+    def first_fit(
+        self, length: int, fit: Callable[[_Node], Optional[int]]
+    ) -> Optional[Tuple[_Node, int]]:
+        """
+        :param int length: length of the range to place
+        :param fit: returns the address where the range is placed in the interval of a node, None if it does not fit
+        :return: the first node in key order where the range fits, and the address returned by fit, None if it fits nowhere.
+        """
+
+        def search(node: Optional[_Node]) -> Optional[Tuple[_Node, int]]:
+            if node is None or node.max_size < length:
+                return None
+            found = search(node.left)
+            if found is None and node.end - node.start >= length:
+                address = fit(node)
+                if address is not None:
+                    found = node, address
+            return found or search(node.right)
+
+        return search(self._root)
+
+
+class AddressMap:
+    """
+    Free space of an address range, from 0 to length, as a set of non-overlapping intervals.
+
+    The free intervals are indexed by two balanced search trees, one by address and one by size,
+    each node knowing the largest interval of its subtree. The interval containing an address, the
+    first interval where a range fits and the smallest interval where it fits are found in
+    O(log n), and so are the updates of the free intervals. With natural alignment, the intervals
+    that are large enough but where the aligned range does not fit are also visited.
+
+    :param int length: The length of the address range.
+    """
+
+    def __init__(self, length: int):
+        self._length = length
+        # Free intervals [start, end), keyed by start
+        self._by_start = _Treap()
+        # Free intervals keyed by (size, start)
+        self._by_size = _Treap()
+        self._free = 0
+        self._insert_free(0, length)
+
+    def _insert_free(self, start: int, end: int):
+        if start >= end:
+            return
+        self._by_start.insert(start, start, end)
+        self._by_size.insert((end - start, start), start, end)
+        self._free += end - start
+
+    def _take(self, node: _Node, address: int, length: int):
+        """
+        Marks [address, address + length) as used, the range being inside the free interval of node.
+        """
+        start, end = node.start, node.end
+        self._by_start.remove(start)
+        self._by_size.remove((end - start, start))
+        self._free -= end - start
+        self._insert_free(start, address)
+        self._insert_free(address + length, end)
+
+    def _fit(self, node: _Node, length: int, align: bool):
+        """
+        :return: the address where a range of the given length can be placed in the free interval of node, None if it does not fit.
+        """
+        address = node.start
+        if align:
+            alignment = natural_alignment(length)
+            address = (address + alignment - 1) // alignment * alignment
+        return address if address + length <= node.end else None
+
+    def is_free(self, address: int, length: int) -> bool:
+        """
+        :param int address: start of the range
+        :param int length: length of the range
+        :return: True if the whole range is free.
+        :rtype: bool
+        """
+        node = self._by_start.floor(address)
+        return node is not None and address + length <= node.end
+
+    def reserve(self, address: int, length: int):
+        """
+        Marks a range as used.
+
+        :param int address: start of the range
+        :param int length: length of the range
+        :raise ValueError: when the range is not entirely free.
+        """
+        node = self._by_start.floor(address)
+        if node is None or address + length > node.end:
+            raise ValueError(
+                f"The range [{address:#x}, {address + length:#x}) is not free in the address map"
+            )
+        self._take(node, address, length)
+
+    def allocate(
+        self,
+        length: int,
+        policy: AllocationPolicy = AllocationPolicy.FIRST_FIT,
+        align: bool = False,
+    ) -> int:
+        """
+        Finds a free range of the given length according to the policy and marks it as used.
+
+        :param int length: length of the range
+        :param AllocationPolicy policy: how to choose among the free intervals where the range fits
+        :param bool align: if True, the range is naturally aligned (its address is a multiple of its length rounded up to a power of two)
+        :return: the address of the range
+        :rtype: int
+        :raise ValueError: when no free interval can hold the range.
+        """
+        if policy == AllocationPolicy.BEST_FIT:
+            # Only intervals at least as large as the range are considered, from the smallest one
+            for node in self._by_size.iter_from((length, -1)):
+                address = self._fit(node, length, align)
+                if address is not None:
+                    self._take(node, address, length)
+                    return address
+        else:
+            found = self._by_start.first_fit(
+                length, lambda node: self._fit(node, length, align)
+            )
+            if found is not None:
+                node, address = found
+                self._take(node, address, length)
+                return address
+
+        raise ValueError(
+            f"No free range of length {length:#x} in the address map (largest free range is {self.largest_free():#x})"
+        )
+
+    def free_intervals(self) -> List[Tuple[int, int]]:
+        """
+        :return: the free intervals as (start, end) tuples, sorted by address.
+        :rtype: list[tuple[int, int]]
+        """
+        return [(node.start, node.end) for node in self._by_start]
+
+    def free_size(self) -> int:
+        """
+        :return: the total free space.
+        :rtype: int
+        """
+        return self._free
+
+    def largest_free(self) -> int:
+        """
+        :return: the size of the largest free interval, 0 if there is no free space.
+        :rtype: int
+        """
+        return self._by_start.max_size()
+
+    def fragmentation(self) -> float:
+        """
+        :return: the external fragmentation of the free space, 1 - largest free interval / total free space. 0 when the free space is contiguous (or empty), close to 1 when it is split into many small intervals.
+        :rtype: float
+        """
+        free = self.free_size()
+        return 0.0 if free == 0 else 1.0 - self.largest_free() / free
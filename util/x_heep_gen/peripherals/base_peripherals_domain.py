@@ -63,6 +63,7 @@ class BasePeripheralDomain(PeripheralDomain):
         """
         if not isinstance(peripheral, BasePeripheral):
             raise ValueError("Peripheral is not a BasePeripheral")
+        self._check_not_frozen()
         self._peripherals.append(peripheral)
 
     def remove_peripheral(self, peripheral: BasePeripheral):
@@ -71,6 +72,7 @@ class BasePeripheralDomain(PeripheralDomain):
 
         :param BasePeripheral peripheral: The peripheral to remove.
         """
+        self._check_not_frozen()
         if peripheral not in self._peripherals:
             print(
                 f"Warning : Peripheral {peripheral.get_name()} is not in the domain {self._name}"
@@ -105,7 +107,7 @@ class BasePeripheralDomain(PeripheralDomain):
         dmas = []
         for p in self._peripherals:
             if isinstance(p, DMA):
-                dmas.append(deepcopy(p))
+                dmas.append(p if self._frozen else deepcopy(p))
         if len(dmas) == 0:
             raise ValueError("No DMA peripheral found")
         return dmas
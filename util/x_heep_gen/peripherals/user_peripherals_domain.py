@@ -48,6 +48,7 @@ class UserPeripheralDomain(PeripheralDomain):
         """
         if not isinstance(peripheral, UserPeripheral):
             raise ValueError("Peripheral is not a UserPeripheral")
+        self._check_not_frozen()
         self._peripherals.append(peripheral)
 
     def remove_peripheral(self, peripheral: UserPeripheral):
@@ -56,6 +57,7 @@ class UserPeripheralDomain(PeripheralDomain):
 
         :param UserPeripheral peripheral: The peripheral to remove.
         """
+        self._check_not_frozen()
         if peripheral not in self._peripherals:
             print(
                 f"Warning : Peripheral {peripheral.get_name()} is not in the domain {self._name}"
@@ -184,21 +184,32 @@ class XHeep:
 
     def get_user_peripheral_domain(self):
         """
-        Returns a deepcopy of the user peripheral domain.
+        Returns a deepcopy of the user peripheral domain. Once the system is built, the domain is frozen and returned without copy.
 
         :return: The user peripheral domain.
         :rtype: UserPeripheralDomain
         """
-        return deepcopy(self._user_peripheral_domain)
+        return self._shared_domain(self._user_peripheral_domain)
 
     def get_base_peripheral_domain(self):
         """
-        Returns a deepcopy of the base peripheral domain.
+        Returns a deepcopy of the base peripheral domain. Once the system is built, the domain is frozen and returned without copy.
 
         :return: The base peripheral domain.
         :rtype: BasePeripheralDomain
         """
-        return deepcopy(self._base_peripheral_domain)
+        return self._shared_domain(self._base_peripheral_domain)
+
+    @staticmethod
+    def _shared_domain(domain: PeripheralDomain):
+        """
+        :param PeripheralDomain domain: A domain of the system.
+        :return: The domain itself if it is frozen (read-only), a deepcopy of it otherwise.
+        :rtype: PeripheralDomain
+        """
+        if domain is None or domain.is_frozen():
+            return domain
+        return deepcopy(domain)
 
     # ------------------------------------------------------------
     # Pad Ring
@@ -259,15 +270,17 @@ class XHeep:
 
     def build(self):
         """
-        Makes the system ready to be used.
+        Makes the system ready to be used. The peripheral domains are frozen once built, so that they are shared with the templates without copy.
         """
 
         if self.memory_ss():
             self.memory_ss().build()
         if self.are_base_peripherals_configured():
             self._base_peripheral_domain.build()
+            self._base_peripheral_domain.freeze()
         if self.are_user_peripherals_configured():
             self._user_peripheral_domain.build()
+            self._user_peripheral_domain.freeze()
 
     def validate(self):
         """